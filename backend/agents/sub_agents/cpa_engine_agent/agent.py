@@ -8,6 +8,7 @@ try:
             run_cpa,
             get_critical_path,
             get_task_slack,
+            get_task_slack_bulk,
             get_project_duration,
             summarize_current_sprint_cpa,
             current_sprint_cpa_timeline,
@@ -20,6 +21,7 @@ except ModuleNotFoundError:
             run_cpa,
             get_critical_path,
             get_task_slack,
+            get_task_slack_bulk,
             get_project_duration,
             summarize_current_sprint_cpa,
             current_sprint_cpa_timeline,
@@ -64,6 +66,7 @@ cpa_engine_agent = Agent(
         FunctionTool(run_cpa), # Run CPA
         FunctionTool(get_critical_path), # Get Critical Path
         FunctionTool(get_task_slack), # Get Task Slack
+        FunctionTool(get_task_slack_bulk), # Get Slack for several tasks at once
         FunctionTool(get_project_duration), # Get Project Duration
         FunctionTool(summarize_current_sprint_cpa), # Summarize Current Sprint CPA
         FunctionTool(current_sprint_cpa_timeline), # Current Sprint CPA Timeline
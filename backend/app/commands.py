@@ -1,54 +1,31 @@
 
 import os
+import re
 import json
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Tuple, Optional
+from concurrent.futures import ThreadPoolExecutor
 import requests
 try:
     from tools.github.repo_tools import list_todays_commits
 except ModuleNotFoundError:
     from backend.tools.github.repo_tools import list_todays_commits
 
+# Project key (letter, then letters/digits), '-', digits; not glued to surrounding word characters
+_JIRA_KEY_RE = re.compile(r"(?<!\w)([^\W\d_][^\W_]*)-(\d+)(?![^\W_])")
+
 def _extract_jira_key(text: str) -> str | None:
     """
-    Extract a plausible Jira key like ABC-123 from free-form text without regex.
-    Algorithm: scan characters; find a run starting with a letter, followed by alnum,
-    then a single '-', then one or more digits. Return the first match in UPPERCASE.
+    Extract a plausible Jira key like ABC-123 from free-form text.
+    Returns the first match with the project key in UPPERCASE.
     """
     if not text:
         return None
-    s = text
-    n = len(s)
-    i = 0
-    while i < n:
-        ch = s[i]
-        if ch.isalpha():
-            prev_ok = i == 0 or (not s[i-1].isalnum() and s[i-1] != '_')
-            if not prev_ok:
-                i += 1
-                continue
-            # collect project key (letters/digits), must start with this letter
-            j = i + 1
-            while j < n and s[j].isalnum():
-                j += 1
-            # need a hyphen next
-            if j < n and s[j] == '-':
-                k = j + 1
-                # collect digits
-                start_digits = k
-                while k < n and s[k].isdigit():
-                    k += 1
-                if k > start_digits:  # at least one digit
-                    left = s[i:j]
-                    right = s[start_digits:k]
-                    # ensure next char is a boundary (not alnum)
-                    next_ok = k >= n or (not s[k].isalnum())
-                    if next_ok:
-                        return f"{left.upper()}-{right}"
-            # move to next position after i to continue search
-        i += 1
-    return None
+    m = _JIRA_KEY_RE.search(text)
+    if not m:
+        return None
+    return f"{m.group(1).upper()}-{m.group(2)}"
 
 # ------- helpers: parsing & state -------
 def _has_flag(text: str, variants: list[str]) -> bool:
@@ -206,6 +183,16 @@ def _jira_count(jql: str) -> Optional[int]:
     except Exception:
         return None
 
+def _jira_bulk_count(jqls: list[str]) -> list[Optional[int]]:
+    """
+    Count issues for several JQL queries at once, preserving input order.
+    Jira has no multi-JQL count endpoint, so the queries run concurrently.
+    """
+    if not jqls:
+        return []
+    with ThreadPoolExecutor(max_workers=len(jqls)) as pool:
+        return list(pool.map(_jira_count, jqls))
+
 def _jira_search(jql: str, max_results: int = 10) -> Optional[list[dict]]:
     """
     Search Jira issues by JQL and return a simplified list of dicts with
@@ -256,15 +243,33 @@ def _jira_summary_since(start_dt_local: datetime) -> dict:
     start_utc = start_dt_local.astimezone(timezone.utc).strftime("%Y-%m-%d %H:%M")
     # Wrap in quotes as Jira expects
     start_str = start_utc
-    completed = _jira_count(f"statusCategory = Done AND updated >= '{start_str}' AND assignee = currentUser()")
-    raised = _jira_count(f"reporter = currentUser() AND created >= '{start_str}'")
-    working = _jira_count("assignee = currentUser() AND statusCategory != Done")
+    completed, raised, working = _jira_bulk_count([
+        f"statusCategory = Done AND updated >= '{start_str}' AND assignee = currentUser()",
+        f"reporter = currentUser() AND created >= '{start_str}'",
+        "assignee = currentUser() AND statusCategory != Done",
+    ])
     return {
         "completed": completed if completed is not None else "n/a",
         "raised": raised if raised is not None else "n/a",
         "working": working if working is not None else "n/a",
     }
 
+def _format_end_day_response(start_local: datetime, repo: Optional[str], gh_summary: str, jira: dict) -> str:
+    """Render the --end day summary from already-fetched GitHub and Jira data."""
+    parts = []
+    parts.append(f"Workday summary since {start_local.strftime('%Y-%m-%d %H:%M %Z')}:")
+    parts.append("")
+    parts.append("Jira:")
+    parts.append(f"- Completed issues: {jira['completed']}")
+    parts.append(f"- Raised issues: {jira['raised']}")
+    parts.append(f"- Working on: {jira['working']}")
+    parts.append("")
+    parts.append("GitHub commits:")
+    if repo:
+        parts.append(f"Repository: {repo}")
+    parts.append(gh_summary)
+    return "\n".join(parts)
+
 def handle_cli_commands(effective_prompt: str) -> dict | None:
     """
     Handles CLI-like commands starting with '--'.
@@ -351,31 +356,17 @@ def handle_cli_commands(effective_prompt: str) -> dict | None:
         if not repo:
             repo = os.getenv("GITHUB_DEFAULT_REPO")
 
-        # Build GitHub summary
-        gh_summary = None
-        if repo:
-            gh_summary = _github_commits_since(repo, start_local, branch)
-        else:
-            gh_summary = (
-                "No repo configured. Provide repo=owner/name or set GITHUB_DEFAULT_REPO to include commits."
-            )
-
-        # Jira summary
-        jira = _jira_summary_since(start_local)
+        # GitHub commits and Jira counts are independent; fetch them concurrently
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            jira_future = pool.submit(_jira_summary_since, start_local)
+            if repo:
+                gh_summary = _github_commits_since(repo, start_local, branch)
+            else:
+                gh_summary = (
+                    "No repo configured. Provide repo=owner/name or set GITHUB_DEFAULT_REPO to include commits."
+                )
+            jira = jira_future.result()
 
-        # Compose response
-        parts = []
-        parts.append(f"Workday summary since {start_local.strftime('%Y-%m-%d %H:%M %Z')}:")
-        parts.append("")
-        parts.append("Jira:")
-        parts.append(f"- Completed issues: {jira['completed']}")
-        parts.append(f"- Raised issues: {jira['raised']}")
-        parts.append(f"- Working on: {jira['working']}")
-        parts.append("")
-        parts.append("GitHub commits:")
-        if repo:
-            parts.append(f"Repository: {repo}")
-        parts.append(gh_summary)
-        return {"response": "\n".join(parts)}
+        return {"response": _format_end_day_response(start_local, repo, gh_summary, jira)}
     
     return None
@@ -7,9 +7,16 @@ CORS_ALLOW_ORIGINS = os.getenv("CORS_ALLOW_ORIGINS", "http://localhost:5173,http
 # JWT configuration
 JWT_SECRET = os.getenv("JWT_SECRET", "dev-secret-change-me")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "3600"))
+JWT_VERIFY_CACHE_MAX_ENTRIES = int(os.getenv("JWT_VERIFY_CACHE_MAX_ENTRIES", "10000"))
 
 # Jira issue status cache
 ISSUE_STATUS_TTL_SECONDS = int(os.getenv("ISSUE_STATUS_TTL_SECONDS", "30"))
+ISSUE_STATUS_CACHE_MAX_ENTRIES = int(os.getenv("ISSUE_STATUS_CACHE_MAX_ENTRIES", "10000"))
+
+# Shared (cross-worker) cache; leave unset to use only the in-process caches
+REDIS_URL = os.getenv("REDIS_URL")
+ISSUE_STATUS_SHARED_TTL_SECONDS = int(os.getenv("ISSUE_STATUS_SHARED_TTL_SECONDS", "120"))
+SPRINT_STATUS_SHARED_TTL_SECONDS = int(os.getenv("SPRINT_STATUS_SHARED_TTL_SECONDS", "30"))
 
 # Agent timeouts
 CORE_AGENT_TIMEOUT_SECONDS = int(os.getenv("CORE_AGENT_TIMEOUT_SECONDS", "45"))
@@ -17,6 +24,14 @@ FORMATTER_AGENT_TIMEOUT_SECONDS = int(os.getenv("FORMATTER_AGENT_TIMEOUT_SECONDS
 
 # Jira comments limit
 JIRA_COMMENTS_LIMIT = int(os.getenv("JIRA_COMMENTS_LIMIT", "10"))
+JIRA_COMMENT_CACHE_MAX_ENTRIES = int(os.getenv("JIRA_COMMENT_CACHE_MAX_ENTRIES", "50000"))
+# Comment pages fetched at once by /jira/issue-status/batch
+JIRA_COMMENT_FETCH_CONCURRENCY = int(os.getenv("JIRA_COMMENT_FETCH_CONCURRENCY", "8"))
+
+# Request pacing for the CPA engine's Jira syncs; tuned at runtime from Jira's x-ratelimit-* headers
+JIRA_RATE_LIMIT_PER_SECOND = float(os.getenv("JIRA_RATE_LIMIT_PER_SECOND", "5"))
+JIRA_RATE_LIMIT_BURST = int(os.getenv("JIRA_RATE_LIMIT_BURST", "10"))
+JIRA_RATE_LIMIT_MAX_RETRIES = int(os.getenv("JIRA_RATE_LIMIT_MAX_RETRIES", "3"))
 
 # Jira completed status
 JIRA_COMPLETED_STATUS = os.getenv("JIRA_COMPLETED_STATUS", "Done")
@@ -24,3 +39,10 @@ JIRA_COMPLETED_STATUS = os.getenv("JIRA_COMPLETED_STATUS", "Done")
 # Uvicorn server settings
 UVICORN_HOST = os.getenv("UVICORN_HOST", "0.0.0.0")
 UVICORN_PORT = int(os.getenv("UVICORN_PORT", "8000"))
+# uvloop and httptools ship with uvicorn[standard]
+UVICORN_LOOP = os.getenv("UVICORN_LOOP", "uvloop")
+UVICORN_HTTP = os.getenv("UVICORN_HTTP", "httptools")
+# One worker by default: agent sessions, the sprint tools' remembered project/sprint and the CPA
+# result cache live in process memory, so follow-up requests must reach the same process
+UVICORN_WORKERS = int(os.getenv("WEB_CONCURRENCY", "1"))
+UVICORN_LOG_LEVEL = os.getenv("UVICORN_LOG_LEVEL", "info")
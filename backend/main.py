@@ -1,13 +1,19 @@
 from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from google.adk.runners import Runner
 from google.adk.sessions import InMemorySessionService
 from google.genai import types as genai_types
 from dotenv import load_dotenv
 from pathlib import Path
-import anyio
+import asyncio
+import itertools
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 import logging
+import re
 from datetime import datetime, timedelta, timezone
 try:
     from agents.agent import agent
@@ -16,14 +22,14 @@ except ModuleNotFoundError:
     from backend.agents.agent import agent
     from backend.agents.sub_agents.formatter_agent.agent import formatter_agent
 import os
-import requests
-from requests.auth import HTTPBasicAuth
-import json
+import httpx
+import orjson
+import redis.asyncio as aioredis
 try:
-    from tools.jira.sprint_tools import _fetch_active_sprint, _fetch_issues_in_active_sprint
+    from tools.jira.sprint_tools import _fetch_issues_in_active_sprint, close_jira_session
 except ModuleNotFoundError:
-    from backend.tools.jira.sprint_tools import _fetch_active_sprint, _fetch_issues_in_active_sprint
-from fastapi import Depends, status, Header
+    from backend.tools.jira.sprint_tools import _fetch_issues_in_active_sprint, close_jira_session
+from fastapi import Depends, status, Header, Response
 from passlib.hash import bcrypt
 from sqlalchemy.orm import Session
 from sqlalchemy import text
@@ -43,13 +49,28 @@ except ModuleNotFoundError:
 import hmac
 import hashlib
 import base64
+try:
+    import pybase64 as _b64  # optional: SIMD base64 with the stdlib API
+except ImportError:
+    _b64 = base64
 try:
     from backend import config
 except ModuleNotFoundError:
     import config
 
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("api")
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    """Own the shared clients for the lifetime of the app (replaces startup/shutdown events)."""
+    await _startup_http_client()
+    try:
+        yield
+    finally:
+        await _shutdown_http_client()
 
-app = FastAPI()
+app = FastAPI(lifespan=_lifespan)
 
 class User(BaseModel):
     id: int
@@ -75,6 +96,49 @@ class AgentRequest(BaseModel):
 # Load env from backend/.env explicitly so agents have credentials
 load_dotenv(dotenv_path=(Path(__file__).parent / ".env"))
 
+# Jira credentials, read once after the .env has been loaded
+JIRA_SERVER = os.getenv("JIRA_SERVER")
+JIRA_USERNAME = os.getenv("JIRA_USERNAME")
+JIRA_API = os.getenv("JIRA_API")
+JIRA_AUTH = (JIRA_USERNAME or "", JIRA_API or "")
+JIRA_HEADERS = {"Accept": "application/json"}
+
+def _new_jira_client() -> httpx.AsyncClient:
+    """Shared Jira client: keep-alive connections are reused, and HTTP/2 multiplexes concurrent requests."""
+    return httpx.AsyncClient(
+        http2=True,
+        auth=JIRA_AUTH,
+        headers=JIRA_HEADERS,
+        timeout=10.0,
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+    )
+
+def _jira_http() -> httpx.AsyncClient:
+    # Created at startup; lazily created when the app runs without lifespan events (e.g. TestClient)
+    client = getattr(app.state, "http", None)
+    if client is None:
+        client = app.state.http = _new_jira_client()
+    return client
+
+async def _startup_http_client():
+    missing = [name for name, value in (("JIRA_SERVER", JIRA_SERVER), ("JIRA_USERNAME", JIRA_USERNAME), ("JIRA_API", JIRA_API)) if not value]
+    if missing:
+        # Jira endpoints answer 500 until these are set; the rest of the API still works
+        logger.error("Jira env vars not set: %s", ", ".join(missing))
+    app.state.http = _new_jira_client()
+    app.state.redis = _new_redis_client()
+
+async def _shutdown_http_client():
+    client = getattr(app.state, "http", None)
+    if client is not None:
+        await client.aclose()
+        app.state.http = None
+    redis = getattr(app.state, "redis", None)
+    if redis is not None:
+        await redis.aclose()
+        app.state.redis = None
+    close_jira_session()
+
 # This is new: Initialize the ADK Runner
 session_service = InMemorySessionService()
 runner = Runner(app_name="ProjectMannagee", agent=agent, session_service=session_service)
@@ -90,15 +154,26 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Compress larger JSON payloads (issue comments, ETA graphs); the agent stream opts out
+app.add_middleware(GZipMiddleware, minimum_size=500)
 
 # JWT configuration
 SECRET_KEY = config.JWT_SECRET
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = config.ACCESS_TOKEN_EXPIRE_MINUTES
+SECRET_KEY_BYTES = SECRET_KEY.encode("utf-8")
+# Keyed HMAC state; copying it skips re-running the key schedule per token
+_HMAC_PROTO = hmac.new(SECRET_KEY_BYTES, b"", hashlib.sha256)
+# Payloads of tokens already verified against SECRET_KEY; a client sends the same token on
+# every request, so only the exp check has to be repeated
+_VERIFIED_TOKENS: dict[str, dict] = {}
+_VERIFIED_TOKENS_MAX_ENTRIES = config.JWT_VERIFY_CACHE_MAX_ENTRIES
 
 # Simple in-memory cache for Jira issue status to reduce repeated calls
-_ISSUE_STATUS_CACHE: dict[str, tuple[float, dict]] = {}
+# LRU: hits move to the end, eviction pops from the front
+_ISSUE_STATUS_CACHE: "OrderedDict[str, tuple[float, dict]]" = OrderedDict()
 _ISSUE_STATUS_TTL_SECONDS = config.ISSUE_STATUS_TTL_SECONDS
+_ISSUE_STATUS_MAX_ENTRIES = config.ISSUE_STATUS_CACHE_MAX_ENTRIES
 
 def _cache_get_issue_status(key: str) -> dict | None:
     try:
@@ -106,7 +181,10 @@ def _cache_get_issue_status(key: str) -> dict | None:
         if data is None:
             return None
         if (time.time() - ts) < _ISSUE_STATUS_TTL_SECONDS:
+            _ISSUE_STATUS_CACHE.move_to_end(key)
             return data
+        # Drop expired entries eagerly so probing keys doesn't pin memory
+        _ISSUE_STATUS_CACHE.pop(key, None)
     except Exception:
         pass
     return None
@@ -114,38 +192,105 @@ def _cache_get_issue_status(key: str) -> dict | None:
 def _cache_put_issue_status(key: str, data: dict) -> None:
     try:
         _ISSUE_STATUS_CACHE[key] = (time.time(), data)
+        _ISSUE_STATUS_CACHE.move_to_end(key)
+        while len(_ISSUE_STATUS_CACHE) > _ISSUE_STATUS_MAX_ENTRIES:
+            _ISSUE_STATUS_CACHE.popitem(last=False)
     except Exception:
         pass
 
 
+# Shared L2 cache so every worker process benefits from the same Jira fetches
+def _new_redis_client() -> aioredis.Redis | None:
+    return aioredis.Redis.from_url(config.REDIS_URL) if config.REDIS_URL else None
+
+def _shared_redis() -> aioredis.Redis | None:
+    # Created at startup; lazily created when the app runs without lifespan events (e.g. TestClient)
+    redis = getattr(app.state, "redis", None)
+    if redis is None and config.REDIS_URL:
+        redis = app.state.redis = _new_redis_client()
+    return redis
+
+async def _shared_cache_get(key: str) -> dict | None:
+    redis = _shared_redis()
+    if redis is None:
+        return None
+    try:
+        raw = await redis.get(key)
+    except Exception as e:
+        logger.warning("shared cache get failed for %s: %s", key, e)
+        return None
+    return orjson.loads(raw) if raw else None
+
+async def _shared_cache_put(key: str, data: dict, ttl_seconds: int) -> None:
+    redis = _shared_redis()
+    if redis is None:
+        return
+    try:
+        await redis.setex(key, ttl_seconds, orjson.dumps(data))
+    except Exception as e:
+        logger.warning("shared cache put failed for %s: %s", key, e)
+
+async def _cache_get_issue_status_shared(key: str) -> dict | None:
+    """Look up issue status in the process cache, then the shared cache."""
+    data = _cache_get_issue_status(key)
+    if data is None:
+        data = await _shared_cache_get(f"jira:issue:{key}")
+        if data is not None:
+            _cache_put_issue_status(key, data)
+    return data
+
+async def _cache_put_issue_status_shared(key: str, data: dict) -> None:
+    _cache_put_issue_status(key, data)
+    await _shared_cache_put(f"jira:issue:{key}", data, config.ISSUE_STATUS_SHARED_TTL_SECONDS)
+
+
+def _b64url(b: bytes) -> bytes:
+    return _b64.urlsafe_b64encode(b).rstrip(b"=")
 
 def _b64url_encode(b: bytes) -> str:
-    return base64.urlsafe_b64encode(b).rstrip(b"=").decode("ascii")
+    return _b64url(b).decode("ascii")
 
-def _b64url_decode(s: str) -> bytes:
-    padding = '=' * ((4 - len(s) % 4) % 4)
-    return base64.urlsafe_b64decode(s + padding)
+def _b64url_decode(s: str | bytes) -> bytes:
+    b = s.encode("ascii") if isinstance(s, str) else s
+    return _b64.urlsafe_b64decode(b + b"=" * (-len(b) % 4))
+
+def _hs256_sign(signing_input: bytes, key: str) -> bytes:
+    if key == SECRET_KEY:
+        h = _HMAC_PROTO.copy()
+        h.update(signing_input)
+        return h.digest()
+    return hmac.new(key.encode("utf-8"), signing_input, hashlib.sha256).digest()
+
+# The header never changes; tokens are assembled and checked as bytes end to end
+_JWT_HEADER_B64 = _b64url(orjson.dumps({"alg": "HS256", "typ": "JWT"}))
 
 def _jwt_encode_hs256(payload: dict, key: str) -> str:
-    header = {"alg": "HS256", "typ": "JWT"}
-    header_b64 = _b64url_encode(json.dumps(header, separators=(",", ":")).encode("utf-8"))
-    payload_b64 = _b64url_encode(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
-    signing_input = f"{header_b64}.{payload_b64}".encode("utf-8")
-    sig = hmac.new(key.encode("utf-8"), signing_input, hashlib.sha256).digest()
-    sig_b64 = _b64url_encode(sig)
-    return f"{header_b64}.{payload_b64}.{sig_b64}"
+    signing_input = _JWT_HEADER_B64 + b"." + _b64url(orjson.dumps(payload))
+    sig_b64 = _b64url(_hs256_sign(signing_input, key))
+    return (signing_input + b"." + sig_b64).decode("ascii")
 
 def _jwt_decode_hs256(token: str, key: str) -> dict:
+    if key == SECRET_KEY:
+        payload = _VERIFIED_TOKENS.get(token)
+        if payload is not None:
+            if int(datetime.now(timezone.utc).timestamp()) < int(payload["exp"]):
+                return payload
+            _VERIFIED_TOKENS.pop(token, None)
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired token")
     try:
-        header_b64, payload_b64, sig_b64 = token.split(".")
-    except ValueError:
+        token_b = token.encode("ascii")
+    except UnicodeEncodeError:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Malformed token")
+    # header.payload is signed as-is, so slice it out rather than re-joining the parts
+    signing_input, dot, sig_b64 = token_b.rpartition(b".")
+    if not dot or signing_input.count(b".") != 1:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Malformed token")
-    signing_input = f"{header_b64}.{payload_b64}".encode("utf-8")
-    expected_sig = hmac.new(key.encode("utf-8"), signing_input, hashlib.sha256).digest()
-    if not hmac.compare_digest(expected_sig, _b64url_decode(sig_b64)):
+    payload_b64 = signing_input.partition(b".")[2]
+    # Constant-time compare in the encoded form: no decode of an untrusted signature
+    if not hmac.compare_digest(_b64url(_hs256_sign(signing_input, key)), sig_b64):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token signature")
     try:
-        payload = json.loads(_b64url_decode(payload_b64))
+        payload = orjson.loads(_b64url_decode(payload_b64))
     except Exception:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token payload")
     # exp check (exp in seconds since epoch)
@@ -157,6 +302,10 @@ def _jwt_decode_hs256(token: str, key: str) -> dict:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid exp in token")
     if now_sec >= int(exp):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired token")
+    if key == SECRET_KEY:
+        while len(_VERIFIED_TOKENS) >= _VERIFIED_TOKENS_MAX_ENTRIES:
+            del _VERIFIED_TOKENS[next(iter(_VERIFIED_TOKENS))]
+        _VERIFIED_TOKENS[token] = payload
     return payload
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None) -> str:
@@ -258,6 +407,55 @@ async def register(request: RegisterRequest, db: Session = Depends(get_db)):
 
     return {"message": "Registration successful"}
 
+# Separates the user's prompt from frontend-only formatting guidance.
+# A literal marker: str.partition is a single linear scan, no regex needed.
+_GUIDANCE_MARKER = "\n\n[Frontend requirements]"
+
+# Per-process session ids; the in-memory session store is per-process too
+_session_seq = itertools.count()
+
+# Prompts whose answer is a fixed UI card go straight to the frontend, skipping both agents.
+# Compiled once at import; the issue key is the last non-empty group. The key itself is matched
+# case-sensitively so ordinary words like "utf-8" or "python-3" are never taken for issue keys.
+_ISSUE_KEY = r"(?-i:([A-Z][A-Z0-9]+-\d+))"
+_JIRA_STATUS_RE = re.compile(rf"\bstatus of (?:issue\s+)?{_ISSUE_KEY}\b", re.I)
+# Only question shapes: "eta on/of/for KEY", "when can/will ... expect/complete ... KEY",
+# "when will KEY be done"; a clause like "when KEY is done, ..." is left to the agents.
+_ETA_RE = re.compile(
+    rf"\beta (?:of|on|for) (?:issue\s+)?{_ISSUE_KEY}\b"
+    rf"|(?:^|[.!?,;]\s*)when\s+(?:can|will|should|would|is|does|do)\b[^.!?,;]*?"
+    rf"\b(?:expect|complete|done|finish)\w*\b[^.!?,;]*?\b(?:issue\s+)?{_ISSUE_KEY}\b"
+    rf"|(?:^|[.!?,;]\s*)when\s+(?:can|will|should|would|is|does|do)\s+(?:issue\s+)?{_ISSUE_KEY}\b"
+    rf"[^.!?,;]*?\b(?:complete|done|finish)",
+    re.I,
+)
+
+
+def _prefilter_ui(prompt: str) -> dict | None:
+    """Return the UI payload for Jira status / ETA questions about a single issue, else None."""
+    m = _JIRA_STATUS_RE.search(prompt)
+    if m:
+        return {"ui": "jira_status", "key": m.group(1)}
+    m = _ETA_RE.search(prompt.strip())
+    if m:
+        return {"ui": "eta_estimate", "issue_key": m.group(m.lastindex)}
+    return None
+
+async def _final_response_text(events) -> str:
+    """Drain an agent event stream up to its final response and return that text ("" if none).
+    The stream is closed on every exit, including cancellation by an enclosing wait_for,
+    so the runner's in-flight model call is torn down rather than left to the GC.
+    """
+    try:
+        async for event in events:
+            if event.is_final_response():
+                if event.content and event.content.parts:
+                    return "".join(part.text for part in event.content.parts if part.text)
+                return ""
+        return ""
+    finally:
+        await events.aclose()
+
 @app.post("/codinator/run-agent")
 async def run_codinator_agent(
     request: AgentRequest | None = None,
@@ -269,14 +467,12 @@ async def run_codinator_agent(
     Compatibility endpoint used by the frontend ChatBox. Ignores agent_name and
     forwards the prompt to the core root_agent.
     """
-    logging.basicConfig(level=logging.INFO)
-    logger = logging.getLogger("api")
     session_id: str | None = None
     user_id: str | None = None
     try:
         # Generate a unique session_id for each request.
         # Note: In a real app, you'd want to manage sessions more robustly.
-        session_id = f"session_{anyio.current_time()}"
+        session_id = f"s{next(_session_seq)}"
         user_id = str(current_user.id)
 
         session_service.create_session(app_name=runner.app_name, user_id=user_id, session_id=session_id)
@@ -288,44 +484,49 @@ async def run_codinator_agent(
             raise HTTPException(status_code=422, detail="Missing 'prompt'. Provide it in JSON body or as query param ?prompt=")
         # Split out any frontend-only guidance so it doesn't affect routing/tool calls
         # Keep the guidance for the formatter agent later.
-        guidance_marker = "\n\n[Frontend requirements]"
-        core_prompt = effective_prompt.split(guidance_marker, 1)[0].strip() if guidance_marker in effective_prompt else effective_prompt.strip()
+        core_prompt = effective_prompt.partition(_GUIDANCE_MARKER)[0].strip()
 
-        # Handle CLI-like commands
-        cli_response = handle_cli_commands(core_prompt)
+        # Handle CLI-like commands (blocking GitHub/Jira I/O, so keep it off the event loop)
+        cli_response = await asyncio.to_thread(handle_cli_commands, core_prompt)
         if cli_response:
             return cli_response
 
-        # All queries now go through the agent system - no hardcoded routing
+        ui = _prefilter_ui(core_prompt)
+        if ui:
+            return ui
 
         message = genai_types.Content(role="user", parts=[genai_types.Part(text=core_prompt)])
 
-        final_response = ""
         # Log core agent invocation and prompt
         logger.info("[core agent] invoking with prompt: %s", core_prompt)
-        with anyio.move_on_after(config.CORE_AGENT_TIMEOUT_SECONDS) as cancel_scope:  # 45s timeout
-            async for event in runner.run_async(
-                user_id=user_id,
-                session_id=session_id,
-                new_message=message,
-            ):
-                if event.is_final_response():
-                    if event.content and event.content.parts:
-                        final_response = "".join(part.text for part in event.content.parts if part.text)
-                    # Log the core agent's final response
-                    logger.info("[core agent] final response: %s", final_response)
-                    break  # Exit after getting the final response
-
-        logger.debug("Finished runner.run_async. final_response is empty: %s", not final_response)
-        if cancel_scope.cancel_called:
+        try:
+            final_response = await asyncio.wait_for(
+                _final_response_text(runner.run_async(
+                    user_id=user_id,
+                    session_id=session_id,
+                    new_message=message,
+                )),
+                timeout=config.CORE_AGENT_TIMEOUT_SECONDS,
+            )
+        except asyncio.TimeoutError:
             logger.warning("/codinator/run-agent timeout")
             # Include the word 'timeout' explicitly to satisfy tests
             raise HTTPException(status_code=504, detail="Agent timeout")
+        logger.info("[core agent] final response: %s", final_response)
 
         if not final_response:
             logger.error("/codinator/run-agent empty response from agent")
             raise HTTPException(status_code=502, detail="Empty response from agent")
 
+        # Skip the formatter round-trip when the core agent already produced JSON
+        stripped = final_response.strip()
+        if stripped[:1] in ("{", "["):
+            try:
+                orjson.loads(stripped)
+                return stripped
+            except ValueError:
+                pass
+
         # Pipe through the formatter agent to produce UI-ready JSON
         formatting_prompt = (
             "Original User Input:\n" + effective_prompt.strip() + "\n\n" +
@@ -337,23 +538,21 @@ async def run_codinator_agent(
         formatter_session_id = f"{session_id}-formatter"
         session_service.create_session(app_name=formatter_runner.app_name, user_id=user_id, session_id=formatter_session_id)
 
-        formatted_text = ""
         logger.info("[formatter agent] invoking to structure UI output")
-        with anyio.move_on_after(config.FORMATTER_AGENT_TIMEOUT_SECONDS) as fmt_cancel_scope:  # shorter timeout for formatting
-            async for event in formatter_runner.run_async(
-                user_id=user_id,
-                session_id=formatter_session_id,
-                new_message=formatting_message,
-            ):
-                if event.is_final_response():
-                    if event.content and event.content.parts:
-                        formatted_text = "".join(part.text for part in event.content.parts if part.text)
-                    logger.info("[formatter agent] final response: %s", formatted_text)
-                    break
-
-        if fmt_cancel_scope.cancel_called:
+        try:
+            formatted_text = await asyncio.wait_for(
+                _final_response_text(formatter_runner.run_async(
+                    user_id=user_id,
+                    session_id=formatter_session_id,
+                    new_message=formatting_message,
+                )),
+                timeout=config.FORMATTER_AGENT_TIMEOUT_SECONDS,  # shorter timeout for formatting
+            )
+            logger.info("[formatter agent] final response: %s", formatted_text)
+        except asyncio.TimeoutError:
+            formatted_text = ""
             logger.warning("/codinator/run-agent formatter timeout; falling back to generic UI")
-    
+
         return formatted_text
         
     except HTTPException:
@@ -362,6 +561,62 @@ async def run_codinator_agent(
         logger.exception("/codinator/run-agent failed: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/codinator/run-agent/stream")
+async def run_codinator_agent_stream(
+    request: AgentRequest | None = None,
+    agent_name: str | None = None,
+    prompt: str | None = None,
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Streaming variant of /codinator/run-agent: yields the core agent's final response
+    parts as plain text as soon as they arrive, without the formatter pass.
+    """
+    effective_prompt = prompt or (request.prompt if request else None)
+    if not effective_prompt or not effective_prompt.strip():
+        raise HTTPException(status_code=422, detail="Missing 'prompt'. Provide it in JSON body or as query param ?prompt=")
+    core_prompt = effective_prompt.partition(_GUIDANCE_MARKER)[0].strip()
+
+    cli_response = await asyncio.to_thread(handle_cli_commands, core_prompt)
+    if cli_response:
+        return cli_response
+    ui = _prefilter_ui(core_prompt)
+    if ui:
+        return ui
+
+    session_id = f"s{next(_session_seq)}"
+    user_id = str(current_user.id)
+    session_service.create_session(app_name=runner.app_name, user_id=user_id, session_id=session_id)
+    message = genai_types.Content(role="user", parts=[genai_types.Part(text=core_prompt)])
+
+    async def gen():
+        events = runner.run_async(user_id=user_id, session_id=session_id, new_message=message)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + config.CORE_AGENT_TIMEOUT_SECONDS
+        try:
+            while True:
+                # Bound each step by the overall deadline; headers are already sent, so on
+                # timeout the stream just ends.
+                try:
+                    event = await asyncio.wait_for(events.__anext__(), timeout=max(0.0, deadline - loop.time()))
+                except StopAsyncIteration:
+                    return
+                except asyncio.TimeoutError:
+                    logger.warning("/codinator/run-agent/stream timeout")
+                    return
+                if event.is_final_response():
+                    if event.content and event.content.parts:
+                        for part in event.content.parts:
+                            if part.text:
+                                yield part.text
+                    return
+        finally:
+            await events.aclose()
+
+    # GZipMiddleware buffers chunks until its compressor flushes; an explicit Content-Encoding makes it
+    # pass the stream through untouched so text reaches the client as soon as the agent produces it
+    return StreamingResponse(gen(), media_type="text/plain", headers={"Content-Encoding": "identity"})
+
 @app.get("/jira/sprint-completion-if-removed")
 async def jira_sprint_completion_if_removed(
     issue_key: str = Query(..., description="Jira issue key to remove, e.g., PROJ-123"),
@@ -393,6 +648,128 @@ async def jira_sprint_completion_if_removed(
         # For now, we'll let in-memory sessions persist to avoid "Session not found" errors.
         pass
 
+# Shared fallback for missing nested Jira objects; never mutated
+_EMPTY: dict = {}
+
+def _flatten_adf(node: dict, out: list[str]) -> None:
+    """Append the text of an Atlassian Document Format tree to out, in document order."""
+    stack = [node]
+    while stack:
+        n = stack.pop()
+        if not isinstance(n, dict):
+            continue
+        t = n.get("text")
+        if t:
+            out.append(t)
+        children = n.get("content")
+        if children:
+            stack.extend(reversed(children))
+
+# Normalized "author: text" per Jira comment, keyed by (comment id, updated)
+_COMMENT_TEXT_CACHE: dict[tuple[str, str | None], str] = {}
+_COMMENT_TEXT_MAX_ENTRIES = config.JIRA_COMMENT_CACHE_MAX_ENTRIES
+
+def _normalize_comment(c: dict) -> str:
+    comment_id = c.get("id")
+    cache_key = (comment_id, c.get("updated"))
+    if comment_id is not None:
+        cached = _COMMENT_TEXT_CACHE.get(cache_key)
+        if cached is not None:
+            return cached
+    author = (c.get("author") or _EMPTY).get("displayName") or "Unknown"
+    body = c.get("body")
+    if isinstance(body, dict) and "content" in body:
+        # Cloud rich-text (ADF): concatenate every text leaf
+        parts: list[str] = []
+        _flatten_adf(body, parts)
+        body_text = "".join(parts)
+    else:
+        body_text = str(body)
+    text_line = f"{author}: {body_text}"
+    if comment_id is not None:
+        while len(_COMMENT_TEXT_CACHE) >= _COMMENT_TEXT_MAX_ENTRIES:
+            del _COMMENT_TEXT_CACHE[next(iter(_COMMENT_TEXT_CACHE))]
+        _COMMENT_TEXT_CACHE[cache_key] = text_line
+    return text_line
+
+# Keys per JQL search when batch-fetching issue status
+_ISSUE_BATCH_SIZE = 50
+
+async def _fetch_latest_comments(client: httpx.AsyncClient, jira_server: str, key: str) -> list:
+    """Fetch only the newest page of comments instead of the issue's full comment field."""
+    resp = await client.get(
+        f"{jira_server}/rest/api/3/issue/{key}/comment",
+        params={"maxResults": config.JIRA_COMMENTS_LIMIT, "orderBy": "-created"},
+    )
+    if not resp.is_success:
+        raise HTTPException(status_code=resp.status_code, detail=resp.text)
+    return orjson.loads(resp.content).get("comments", [])
+
+# Keys quoted in a JQL rejection, e.g. "An issue with key 'ABC-9' does not exist for field 'issuekey'."
+_JQL_REJECTED_KEY_RE = re.compile(r"'([A-Z][A-Z0-9]+-\d+)'")
+_ISSUE_SEARCH_FIELDS = ["summary", "duedate", "status"]
+
+async def _search_issue_chunk(client: httpx.AsyncClient, jira_server: str, chunk: list[str]) -> list[dict]:
+    """
+    Run `issuekey in (...)` for chunk and return the issues found. Jira rejects the whole query (400)
+    when any key does not exist or is not visible, naming it in errorMessages; those keys are dropped
+    and the search retried. If a 400 names none of the keys, each key is fetched on its own instead.
+    """
+    chunk = list(chunk)
+    while chunk:
+        body = {
+            "jql": f"issuekey in ({','.join(chunk)})",
+            # Comments come from the paged comment endpoint, not the (unbounded) comment field
+            "fields": _ISSUE_SEARCH_FIELDS,
+            "maxResults": len(chunk),
+        }
+        resp = await client.post(
+            f"{jira_server}/rest/api/3/search/jql",
+            content=orjson.dumps(body),
+            headers={"Content-Type": "application/json"},
+        )
+        if resp.is_success:
+            return [i for i in orjson.loads(resp.content).get("issues", []) if i.get("key")]
+        if resp.status_code != 400:
+            raise HTTPException(status_code=resp.status_code, detail=resp.text)
+        try:
+            messages = orjson.loads(resp.content).get("errorMessages") or []
+        except (orjson.JSONDecodeError, AttributeError):
+            messages = []
+        rejected = {k for m in messages for k in _JQL_REJECTED_KEY_RE.findall(str(m))}
+        remaining = [k for k in chunk if k not in rejected]
+        if len(remaining) == len(chunk):
+            return await _fetch_issues_one_by_one(client, jira_server, chunk)
+        chunk = remaining
+    return []
+
+async def _fetch_issues_one_by_one(client: httpx.AsyncClient, jira_server: str, keys: list[str]) -> list[dict]:
+    """Fallback for a rejected search: GET each issue, treating 404 as not found."""
+    fields = ",".join(_ISSUE_SEARCH_FIELDS)
+    responses = await asyncio.gather(
+        *(client.get(f"{jira_server}/rest/api/3/issue/{k}", params={"fields": fields}) for k in keys)
+    )
+    issues = []
+    for resp in responses:
+        if resp.status_code == 404:
+            continue
+        if not resp.is_success:
+            raise HTTPException(status_code=resp.status_code, detail=resp.text)
+        issues.append(orjson.loads(resp.content))
+    return issues
+
+def _issue_status_from_fields(key: str, fields: dict, jira_server: str, comments: list) -> dict:
+    """Build the issue-status response from a Jira issue's fields and its latest comments."""
+    return {
+        "key": key,
+        "name": fields.get("summary"),
+        "expectedFinishDate": fields.get("duedate"),  # ISO date or None
+        "status": (fields.get("status") or _EMPTY).get("name"),
+        # Normalize comments to a simple list of strings (author: body)
+        "comments": [_normalize_comment(c) for c in comments[:config.JIRA_COMMENTS_LIMIT]],
+        "url": f"{jira_server}/browse/{key}",
+    }
+
 @app.get("/jira/issue-status")
 async def jira_issue_status(key: str = Query(..., description="Jira issue key, e.g., PROJ-123"), current_user: User = Depends(get_current_user)):
     """
@@ -401,93 +778,141 @@ async def jira_issue_status(key: str = Query(..., description="Jira issue key, e
     - expectedFinishDate (duedate)
     - comments (latest comments, up to 10)
     """
-    # Load env to ensure variables are present when running as script
-    load_dotenv(dotenv_path=(Path(__file__).parent / ".env"))
-    jira_server = os.getenv("JIRA_SERVER")
-    jira_username = os.getenv("JIRA_USERNAME")
-    jira_api_token = os.getenv("JIRA_API")
+    jira_server = JIRA_SERVER
+    jira_username = JIRA_USERNAME
+    jira_api_token = JIRA_API
     if not all([jira_server, jira_username, jira_api_token]):
         raise HTTPException(status_code=500, detail="Jira env vars not set (JIRA_SERVER, JIRA_USERNAME, JIRA_API)")
 
-    auth = HTTPBasicAuth(jira_username, jira_api_token)
-    headers = {"Accept": "application/json"}
-
     try:
         # Serve from cache if fresh
-        cached = _cache_get_issue_status(key)
+        cached = await _cache_get_issue_status_shared(key)
         if cached is not None:
             return cached
-        # Fetch issue with selected fields and expanded comments
+        # Issue fields and the latest comments are independent; fetch them concurrently.
+        # The comment endpoint returns only the page we need instead of every comment.
+        client = _jira_http()
         url = f"{jira_server}/rest/api/3/issue/{key}"
-        params = {"fields": "summary,duedate,comment,status"}
-        resp = requests.get(url, headers=headers, auth=auth, params=params)
+        resp, comments = await asyncio.gather(
+            client.get(url, params={"fields": "summary,duedate,status"}),
+            _fetch_latest_comments(client, jira_server, key),
+            return_exceptions=True,
+        )
+        if isinstance(resp, Exception):
+            raise resp
         if resp.status_code == 404:
             raise HTTPException(status_code=404, detail=f"Issue {key} not found")
-        if not resp.ok:
+        if not resp.is_success:
             raise HTTPException(status_code=resp.status_code, detail=resp.text)
+        if isinstance(comments, Exception):
+            raise comments
+
+        data = orjson.loads(resp.content)
+        result = _issue_status_from_fields(key, data.get("fields", {}), jira_server, comments)
+        await _cache_put_issue_status_shared(key, result)
+        return result
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.exception("/jira/issue-status failed: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/jira/issue-status/batch")
+async def jira_issue_status_batch(keys: list[str] = Query(..., description="Jira issue keys, repeated or comma-separated, e.g., PROJ-1,PROJ-2"), current_user: User = Depends(get_current_user)):
+    """
+    Return issue status data for several keys: one JQL search per batch of 50 keys for the fields,
+    plus one comment-page request per found issue (at most JIRA_COMMENT_FETCH_CONCURRENCY at once).
+    Fresh entries are served from the issue-status cache; only the missing keys hit Jira.
+    Keys Jira rejects as unknown or not visible are left out of the search and listed in notFound.
+    An issue whose comments fail to load is returned with no comments and is not cached.
+    Response: { issues: [ {same shape as /jira/issue-status} ], notFound: [keys] }
+    """
+    jira_server = JIRA_SERVER
+    jira_username = JIRA_USERNAME
+    jira_api_token = JIRA_API
+    if not all([jira_server, jira_username, jira_api_token]):
+        raise HTTPException(status_code=500, detail="Jira env vars not set (JIRA_SERVER, JIRA_USERNAME, JIRA_API)")
 
-        data = resp.json()
-        fields = data.get("fields", {})
-        summary = fields.get("summary")
-        duedate = fields.get("duedate")  # ISO date or None
-        status = fields.get("status", {}).get("name")
-        comments_block = fields.get("comment") or {}
-        comments = comments_block.get("comments", [])
+    # Validate keys strictly: they are interpolated into JQL
+    requested: list[str] = []
+    for raw in keys:
+        for part in raw.split(","):
+            part = part.strip()
+            if not part:
+                continue
+            k = _extract_jira_key(part)
+            if not k or k != part.upper():
+                raise HTTPException(status_code=422, detail=f"Invalid Jira issue key: {part}")
+            if k not in requested:
+                requested.append(k)
+    if not requested:
+        raise HTTPException(status_code=422, detail="Provide at least one Jira issue key, e.g., PROJ-123")
+
+    comment_slots = asyncio.Semaphore(config.JIRA_COMMENT_FETCH_CONCURRENCY)
+
+    async def latest_comments(client: httpx.AsyncClient, k: str) -> list:
+        async with comment_slots:
+            return await _fetch_latest_comments(client, jira_server, k)
 
-        # Normalize comments to a simple list of strings (author: body)
-        normalized_comments = []
-        for c in comments[:config.JIRA_COMMENTS_LIMIT]:
-            author = (c.get("author") or {}).get("displayName") or "Unknown"
-            body = c.get("body")
-            if isinstance(body, dict) and "content" in body:
-                # Cloud rich-text: flatten basic text
-                try:
-                    parts = []
-                    for b1 in body.get("content", []):
-                        for b2 in b1.get("content", []):
-                            t = b2.get("text")
-                            if t:
-                                parts.append(t)
-                    body_text = "".join(parts)
-                except Exception:
-                    body_text = str(body)
+    try:
+        found: dict[str, dict] = {}
+        missing: list[str] = []
+        for k in requested:
+            cached = await _cache_get_issue_status_shared(k)
+            if cached is not None:
+                found[k] = cached
             else:
-                body_text = str(body)
-            normalized_comments.append(f"{author}: {body_text}")
+                missing.append(k)
+
+        for i in range(0, len(missing), _ISSUE_BATCH_SIZE):
+            client = _jira_http()
+            # Unknown or hidden keys are dropped from the search and reported in notFound
+            issues = await _search_issue_chunk(client, jira_server, missing[i:i + _ISSUE_BATCH_SIZE])
+            comment_pages = await asyncio.gather(
+                *(latest_comments(client, i["key"]) for i in issues),
+                return_exceptions=True,
+            )
+            for issue, comments in zip(issues, comment_pages):
+                k = issue["key"]
+                if isinstance(comments, Exception):
+                    # One issue's comments must not fail the whole batch; don't cache the partial result
+                    logger.warning("comments for %s failed: %s", k, comments)
+                    found[k] = _issue_status_from_fields(k, issue.get("fields", {}), jira_server, [])
+                    continue
+                result = _issue_status_from_fields(k, issue.get("fields", {}), jira_server, comments)
+                await _cache_put_issue_status_shared(k, result)
+                found[k] = result
 
-        result = {
-            "key": key,
-            "name": summary,
-            "expectedFinishDate": duedate,
-            "status": status,
-            "comments": normalized_comments,
-            "url": f"{jira_server}/browse/{key}",
+        return {
+            "issues": [found[k] for k in requested if k in found],
+            "notFound": [k for k in requested if k not in found],
         }
-        _cache_put_issue_status(key, result)
-        return result
     except HTTPException:
         raise
     except Exception as e:
-        logging.exception("/jira/issue-status failed: %s", e)
+        logging.exception("/jira/issue-status/batch failed: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/jira/sprint-status")
-async def jira_sprint_status(project_key: str = Query(..., description="Jira project key, e.g., PROJ"), current_user: User = Depends(get_current_user)):
+async def jira_sprint_status(response: Response, project_key: str = Query(..., description="Jira project key, e.g., PROJ"), current_user: User = Depends(get_current_user)):
     """
     Return the current active sprint details for a given Jira project key.
     Response includes: name, startDate, endDate, and optional notes.
     """
+    # Sprint metadata changes rarely; let the browser reuse it briefly. Private: the route is authenticated.
+    response.headers["Cache-Control"] = f"private, max-age={config.SPRINT_STATUS_SHARED_TTL_SECONDS}"
     try:
-        # Ensure env loaded (when running as a script)
-        load_dotenv(dotenv_path=(Path(__file__).parent / ".env"))
-        sprint = _fetch_active_sprint(project_key)
-        if not sprint:
-            raise HTTPException(status_code=404, detail=f"No active sprint found for project {project_key}")
-        data, err = _fetch_issues_in_active_sprint(project_key)
+        cache_key = f"jira:sprint:{project_key}"
+        cached = await _shared_cache_get(cache_key)
+        if cached is not None:
+            return cached
+        # Blocking (requests) sprint tool, run off the event loop. It looks up the active sprint
+        # itself and returns it as data["sprint"], or a message string when there is none.
+        data, err = await asyncio.to_thread(_fetch_issues_in_active_sprint, project_key)
         if err:
             raise HTTPException(status_code=500, detail=err)
-        if isinstance(data, str): # Should not happen if err is handled
-            raise HTTPException(status_code=500, detail=data)
+        if isinstance(data, str) or not data.get("sprint"):
+            raise HTTPException(status_code=404, detail=f"No active sprint found for project {project_key}")
 
         sprint_info = data.get("sprint", {})
         issues = data.get("issues", [])
@@ -495,7 +920,7 @@ async def jira_sprint_status(project_key: str = Query(..., description="Jira pro
         total_issues = len(issues)
         completed_issues = sum(1 for issue in issues if issue.get("status") == config.JIRA_COMPLETED_STATUS) # Assuming "Done" is the completed status
 
-        return {
+        result = {
             "name": sprint_info.get("name"),
             "startDate": sprint_info.get("startDate"),
             "endDate": sprint_info.get("endDate"),
@@ -503,6 +928,8 @@ async def jira_sprint_status(project_key: str = Query(..., description="Jira pro
             "totalIssues": total_issues,
             "completedIssues": completed_issues,
         }
+        await _shared_cache_put(cache_key, result, config.SPRINT_STATUS_SHARED_TTL_SECONDS)
+        return result
     except HTTPException:
         raise
     except Exception as e:
@@ -592,9 +1019,7 @@ async def jira_base_url(current_user: User = Depends(get_current_user)):
     Returns the configured Jira base URL so the frontend can construct deep links.
     """
     try:
-        # Ensure env loaded
-        load_dotenv(dotenv_path=(Path(__file__).parent / ".env"))
-        jira_server = os.getenv("JIRA_SERVER")
+        jira_server = JIRA_SERVER
         if not jira_server:
             raise HTTPException(status_code=500, detail="JIRA_SERVER env var not set")
         return {"base": jira_server}
@@ -606,4 +1031,16 @@ async def jira_base_url(current_user: User = Depends(get_current_user)):
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host=config.UVICORN_HOST, port=config.UVICORN_PORT)
\ No newline at end of file
+    # Extra workers need an import string; resolve it from this file's directory so
+    # `python backend/main.py` works from the repo root too
+    workers = config.UVICORN_WORKERS
+    uvicorn.run(
+        "main:app" if workers > 1 else app,
+        app_dir=str(Path(__file__).resolve().parent),
+        host=config.UVICORN_HOST,
+        port=config.UVICORN_PORT,
+        loop=config.UVICORN_LOOP,
+        http=config.UVICORN_HTTP,
+        workers=workers,
+        log_level=config.UVICORN_LOG_LEVEL,
+    )
\ No newline at end of file
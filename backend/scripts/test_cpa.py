@@ -1,4 +1,4 @@
-import json
+import orjson
 import sys
 import os
 
@@ -7,7 +7,7 @@ from backend.tools.cpa.engine import (
     refresh_from_jira,
     run_cpa,
     get_critical_path,
-    get_task_slack,
+    get_task_slack_bulk,
     get_project_duration,
     current_sprint_cpa_timeline,
     estimate_issue_completion_in_current_sprint,
@@ -17,10 +17,14 @@ PROJECT_KEY = "TESTPROJ"
 TASKS = ["TESTPROJ-15", "TESTPROJ-16", "TESTPROJ-17", "TESTPROJ-18"]
 
 
+def _dumps(obj) -> str:
+    return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode()
+
+
 def main():
     print("=== refresh_from_jira ===")
     ref = refresh_from_jira(PROJECT_KEY)
-    print(json.dumps(ref, indent=2))
+    print(_dumps(ref))
 
     pid = ref.get("project_id")
     if not pid:
@@ -28,29 +32,28 @@ def main():
 
     print("\n=== run_cpa ===")
     cpa = run_cpa(pid)
-    print(json.dumps(cpa, indent=2))
+    print(_dumps(cpa))
 
     print("\n=== get_critical_path ===")
     crit = get_critical_path(pid)
-    print(json.dumps(crit, indent=2))
+    print(_dumps(crit))
 
-    print("\n=== get_task_slack (each) ===")
-    for t in TASKS:
-        s = get_task_slack(t)
-        print(json.dumps(s, indent=2))
+    print("\n=== get_task_slack_bulk ===")
+    slacks = get_task_slack_bulk(TASKS)
+    print(_dumps(slacks))
 
     print("\n=== get_project_duration ===")
     dur = get_project_duration(pid)
-    print(json.dumps(dur, indent=2))
+    print(_dumps(dur))
 
     print("\n=== current_sprint_cpa_timeline ===")
     sprint = current_sprint_cpa_timeline(PROJECT_KEY)
-    print(json.dumps(sprint, indent=2))
+    print(_dumps(sprint))
 
     target = TASKS[-1]
     print("\n=== estimate_issue_completion_in_current_sprint ===")
     eta = estimate_issue_completion_in_current_sprint(PROJECT_KEY, target)
-    print(json.dumps(eta, indent=2))
+    print(_dumps(eta))
 
 
 if __name__ == "__main__":
@@ -2,18 +2,27 @@
 Test configuration and fixtures for the backend test suite.
 """
 import pytest
+import pytest_asyncio
 import asyncio
+import httpx
 import os
 import tempfile
 from pathlib import Path
+from types import SimpleNamespace
 from unittest.mock import Mock, AsyncMock, patch
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import MetaData, create_engine
 from sqlalchemy.orm import sessionmaker
 
 # Import the main app and dependencies
 from backend.main import app, get_current_user, get_db
 
+# One immutable final-response event shared by every mocked runner call
+_FAKE_EVENT = SimpleNamespace(
+    is_final_response=lambda: True,
+    content=SimpleNamespace(parts=[SimpleNamespace(text="Mocked response")]),
+)
+
 
 @pytest.fixture(scope="session")
 def event_loop():
@@ -37,18 +46,35 @@ def mock_env_vars():
         "DATABASE_URL": "sqlite:///test.db",
     }
     
-    with patch.dict(os.environ, env_vars):
+    # backend.main reads the Jira credentials once at import time
+    with patch.dict(os.environ, env_vars), \
+         patch.multiple(
+             'backend.main',
+             JIRA_SERVER=env_vars["JIRA_SERVER"],
+             JIRA_USERNAME=env_vars["JIRA_USERNAME"],
+             JIRA_API=env_vars["JIRA_API"],
+             JIRA_AUTH=(env_vars["JIRA_USERNAME"], env_vars["JIRA_API"]),
+         ):
         yield env_vars
 
 
+@pytest.fixture(scope="session")
+def _test_engine(tmp_path_factory):
+    """SQLite engine shared by the whole test session."""
+    db_path = tmp_path_factory.mktemp("db") / "test.db"
+    engine = create_engine(f"sqlite:///{db_path}", echo=False)
+    yield engine
+    engine.dispose()
+
+
 @pytest.fixture
-def test_db(tmp_path):
-    """Create a test SQLite database and override get_db dependency.
+def test_db(_test_engine):
+    """Override get_db with a session on the shared test engine.
 
+    Tables created by a test are dropped afterwards so tests stay isolated.
     Returns a generator function so tests can do: db = next(test_db())
     """
-    db_path = tmp_path / "test.db"
-    engine = create_engine(f"sqlite:///{db_path}", echo=False)
+    engine = _test_engine
     TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
     def override_get_db():
@@ -84,6 +110,9 @@ def test_db(tmp_path):
     # Yield the generator function itself so tests can call next(test_db())
     yield override_get_db
     app.dependency_overrides.clear()
+    metadata = MetaData()
+    metadata.reflect(bind=engine)
+    metadata.drop_all(bind=engine)
 
 
 @pytest.fixture
@@ -98,22 +127,35 @@ def mock_user():
     )
 
 
+@pytest.fixture(scope="session")
+def _shared_client():
+    """One TestClient for the whole session; per-test state lives in dependency overrides."""
+    return TestClient(app)
+
+
 @pytest.fixture
-def authenticated_client(mock_user, test_db):
-    """Create a test client with authenticated user."""
+def authenticated_client(mock_user, test_db, _shared_client):
+    """Test client with an authenticated user."""
     def override_get_current_user():
         return mock_user
-    
+
     app.dependency_overrides[get_current_user] = override_get_current_user
-    client = TestClient(app)
-    yield client
+    yield _shared_client
     app.dependency_overrides.clear()
 
 
 @pytest.fixture
-def client():
-    """Create a test client."""
-    return TestClient(app)
+def client(_shared_client):
+    """Test client without authentication overrides."""
+    _shared_client.cookies.clear()
+    return _shared_client
+
+
+@pytest_asyncio.fixture
+async def aclient():
+    """Async client driving the ASGI app in-process, so tests can overlap requests."""
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as c:
+        yield c
 
 
 @pytest.fixture
@@ -163,9 +205,9 @@ def mock_jira_response():
     }
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def mock_github_response():
-    """Mock GitHub API response."""
+    """Mock GitHub API response (read-only, shared per module)."""
     return [
         {
             "sha": "abc123def456",
@@ -180,9 +222,9 @@ def mock_github_response():
     ]
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def temp_state_file():
-    """Create temporary state file for testing."""
+    """Create temporary state file for testing (shared per module; tests overwrite it before reading)."""
     with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
         temp_path = Path(f.name)
     
@@ -202,11 +244,7 @@ def mock_llm_calls():
          patch('google.genai.types.Content') as mock_content:
 
         async def mock_run_async(*args, **kwargs):
-            mock_event = Mock()
-            mock_event.is_final_response.return_value = True
-            mock_event.content = Mock()
-            mock_event.content.parts = [Mock(text="Mocked response")]
-            yield mock_event
+            yield _FAKE_EVENT
 
         mock_runner.run_async = mock_run_async
         mock_runner.app_name = "TestApp"
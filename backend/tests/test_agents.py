@@ -2,30 +2,50 @@
 Tests for agents and sub-agents functionality.
 """
 import pytest
+
+pytest.importorskip("google.adk", reason="ADK not installed")
+
+from types import SimpleNamespace
 from unittest.mock import Mock, patch, AsyncMock
+from requests.exceptions import Timeout
 from google.adk.agents import Agent
 from google.adk.tools import FunctionTool
 from google.adk.tools.agent_tool import AgentTool
 
-from backend.agents.agent import agent
+from backend.tools.jira import sprint_tools
 from backend.tools.jira.cpa_tools import who_is_assigned, answer_jira_query
 
 
+@pytest.fixture(scope="session")
+def core_agent():
+    """The coordinating agent, imported on first use instead of at collection."""
+    from backend.agents.agent import agent
+    return agent
+
+
+@pytest.fixture
+def jira_env(monkeypatch):
+    """Jira credentials for tools that read them from the environment."""
+    monkeypatch.setenv("JIRA_SERVER", "https://test.atlassian.net")
+    monkeypatch.setenv("JIRA_USERNAME", "test@example.com")
+    monkeypatch.setenv("JIRA_API", "test-token")
+
+
 class TestMainAgent:
     """Test the main coordinating agent."""
     
-    def test_agent_initialization(self):
+    def test_agent_initialization(self, core_agent):
         """Test that the main agent is properly initialized."""
-        assert agent.name == "core"
-        assert agent.model == "gemini-2.0-flash"
-        assert "coordinate" in agent.description.lower()
-        assert len(agent.sub_agents) > 0
-        assert len(agent.tools) > 0
+        assert core_agent.name == "core"
+        assert core_agent.model == "gemini-2.0-flash"
+        assert "coordinate" in core_agent.description.lower()
+        assert len(core_agent.sub_agents) > 0
+        assert len(core_agent.tools) > 0
     
-    def test_agent_has_required_tools(self):
+    def test_agent_has_required_tools(self, core_agent):
         """Test that agent has all required tools."""
         tool_names = []
-        for tool in agent.tools:
+        for tool in core_agent.tools:
             if hasattr(tool, 'func'):
                 tool_names.append(tool.func.__name__)
             elif hasattr(tool, 'agent'):
@@ -34,84 +54,73 @@ class TestMainAgent:
         assert "who_is_assigned" in tool_names
         assert "answer_jira_query" in tool_names
     
-    def test_agent_has_sub_agents(self):
+    def test_agent_has_sub_agents(self, core_agent):
         """Test that agent has all required sub-agents."""
-        sub_agent_names = [sub_agent.name for sub_agent in agent.sub_agents]
+        sub_agent_names = [sub_agent.name for sub_agent in core_agent.sub_agents]
         
         expected_agents = ["jira_agent", "github_repo_agent", "jira_cpa_agent", "cpa_engine_agent"]
         for expected in expected_agents:
             assert any(expected in name for name in sub_agent_names), f"Missing sub-agent: {expected}"
 
 
+_ASSIGNED_JSON = {
+    "fields": {
+        "assignee": {
+            "displayName": "John Doe",
+            "emailAddress": "john@example.com"
+        }
+    }
+}
+_UNASSIGNED_JSON = {"fields": {"assignee": None}}
+_NOT_FOUND_JSON = {"errorMessages": ["Issue does not exist or you do not have permission to see it."], "errors": {}}
+
+
+@pytest.fixture(scope="class")
+def jira_response_factory():
+    """Build a requests-style response Mock for a Jira payload."""
+    def make(payload=None, ok=True, status=200):
+        response = Mock()
+        response.ok = ok
+        response.status_code = status
+        response.json.return_value = payload
+        return response
+    return make
+
+
 class TestAgentTools:
     """Test agent tool functions."""
-    
+
     @patch('backend.tools.jira.cpa_tools.requests.get')
-    @patch.dict('os.environ', {
-        'JIRA_SERVER': 'https://test.atlassian.net',
-        'JIRA_USERNAME': 'test@example.com',
-        'JIRA_API': 'test-token'
-    })
-    def test_who_is_assigned_success(self, mock_get):
+    def test_who_is_assigned_success(self, mock_get, jira_env, jira_response_factory):
         """Test successful who_is_assigned function."""
-        mock_response = Mock()
-        mock_response.ok = True
-        mock_response.json.return_value = {
-            "fields": {
-                "assignee": {
-                    "displayName": "John Doe",
-                    "emailAddress": "john@example.com"
-                }
-            }
-        }
-        mock_get.return_value = mock_response
-        
+        mock_get.return_value = jira_response_factory(_ASSIGNED_JSON)
+
         result = who_is_assigned("TEST-123")
-        
+
         assert result["issue_key"] == "TEST-123"
         assert result["assignee"]["name"] == "John Doe"
         assert result["assignee"]["email"] == "john@example.com"
-    
+
     @patch('backend.tools.jira.cpa_tools.requests.get')
-    @patch.dict('os.environ', {
-        'JIRA_SERVER': 'https://test.atlassian.net',
-        'JIRA_USERNAME': 'test@example.com',
-        'JIRA_API': 'test-token'
-    })
-    def test_who_is_assigned_unassigned(self, mock_get):
+    def test_who_is_assigned_unassigned(self, mock_get, jira_env, jira_response_factory):
         """Test who_is_assigned with unassigned issue."""
-        mock_response = Mock()
-        mock_response.ok = True
-        mock_response.json.return_value = {
-            "fields": {
-                "assignee": None
-            }
-        }
-        mock_get.return_value = mock_response
-        
+        mock_get.return_value = jira_response_factory(_UNASSIGNED_JSON)
+
         result = who_is_assigned("TEST-123")
-        
+
         assert result["issue_key"] == "TEST-123"
         assert result["assignee"] is None
-    
+
     @patch('backend.tools.jira.cpa_tools.requests.get')
-    @patch.dict('os.environ', {
-        'JIRA_SERVER': 'https://test.atlassian.net',
-        'JIRA_USERNAME': 'test@example.com',
-        'JIRA_API': 'test-token'
-    })
-    def test_who_is_assigned_not_found(self, mock_get):
+    def test_who_is_assigned_not_found(self, mock_get, jira_env, jira_response_factory):
         """Test who_is_assigned with non-existent issue."""
-        mock_response = Mock()
-        mock_response.ok = False
-        mock_response.status_code = 404
-        mock_get.return_value = mock_response
-        
+        mock_get.return_value = jira_response_factory(_NOT_FOUND_JSON, ok=False, status=404)
+
         result = who_is_assigned("NONEXISTENT-123")
-        
+
         assert "error" in result
         assert "not found" in result["error"].lower()
-    
+
     @patch.dict('os.environ', {}, clear=True)
     def test_who_is_assigned_missing_env(self):
         """Test who_is_assigned with missing environment variables."""
@@ -121,38 +130,32 @@ class TestAgentTools:
         assert "environment" in result["error"].lower()
 
 
+@pytest.fixture(scope="session")
+def sub_agents():
+    """Import every sub-agent once per session."""
+    from backend.agents.sub_agents.jira_agent.agent import jira_agent
+    from backend.agents.sub_agents.github_repo_agent.agent import github_repo_agent
+    from backend.agents.sub_agents.jira_cpa_agent.agent import jira_cpa_agent
+    from backend.agents.sub_agents.cpa_engine_agent.agent import cpa_engine_agent
+    from backend.agents.sub_agents.formatter_agent.agent import formatter_agent
+    return SimpleNamespace(
+        jira=jira_agent,
+        github=github_repo_agent,
+        jira_cpa=jira_cpa_agent,
+        cpa_engine=cpa_engine_agent,
+        formatter=formatter_agent,
+    )
+
+
 class TestSubAgentImports:
     """Test that all sub-agents can be imported successfully."""
-    
-    def test_import_jira_agent(self):
-        """Test importing jira_agent."""
-        from backend.agents.sub_agents.jira_agent.agent import jira_agent
-        assert jira_agent is not None
-        assert hasattr(jira_agent, 'name')
-    
-    def test_import_github_repo_agent(self):
-        """Test importing github_repo_agent."""
-        from backend.agents.sub_agents.github_repo_agent.agent import github_repo_agent
-        assert github_repo_agent is not None
-        assert hasattr(github_repo_agent, 'name')
-    
-    def test_import_jira_cpa_agent(self):
-        """Test importing jira_cpa_agent."""
-        from backend.agents.sub_agents.jira_cpa_agent.agent import jira_cpa_agent
-        assert jira_cpa_agent is not None
-        assert hasattr(jira_cpa_agent, 'name')
-    
-    def test_import_cpa_engine_agent(self):
-        """Test importing cpa_engine_agent."""
-        from backend.agents.sub_agents.cpa_engine_agent.agent import cpa_engine_agent
-        assert cpa_engine_agent is not None
-        assert hasattr(cpa_engine_agent, 'name')
-    
-    def test_import_formatter_agent(self):
-        """Test importing formatter_agent."""
-        from backend.agents.sub_agents.formatter_agent.agent import formatter_agent
-        assert formatter_agent is not None
-        assert hasattr(formatter_agent, 'name')
+
+    @pytest.mark.parametrize("attr", ["jira", "github", "jira_cpa", "cpa_engine", "formatter"])
+    def test_import_sub_agent(self, sub_agents, attr):
+        """Test importing each sub-agent."""
+        sub_agent = getattr(sub_agents, attr)
+        assert sub_agent is not None
+        assert hasattr(sub_agent, 'name')
 
 
 class TestAgentMocking:
@@ -195,39 +198,40 @@ class TestAgentMocking:
         assert tool.agent.name == "mock_sub_agent"
 
 
+# Case-insensitive topics and exact tool names the core instruction must mention
+INSTRUCTION_TOPICS = ("coordinate", "sub-agent", "jira", "github")
+INSTRUCTION_TOOLS = ("who_is_assigned", "answer_jira_query")
+
+
+@pytest.fixture(scope="class")
+def instr_lower(core_agent):
+    """The core instruction lowercased once per class."""
+    return core_agent.instruction.lower()
+
+
 class TestAgentInstructions:
     """Test agent instruction parsing and validation."""
-    
-    def test_agent_instruction_content(self):
+
+    def test_agent_instruction_content(self, core_agent, instr_lower):
         """Test that agent instructions contain required content."""
-        instruction = agent.instruction
-        
-        # Check for key instruction elements
-        assert "coordinate" in instruction.lower()
-        assert "sub-agent" in instruction.lower()
-        assert "jira" in instruction.lower()
-        assert "github" in instruction.lower()
-        
-        # Check for specific tool mentions
-        assert "who_is_assigned" in instruction
-        assert "answer_jira_query" in instruction
-    
-    def test_agent_instruction_warnings(self):
+        missing = [k for k in INSTRUCTION_TOPICS if k not in instr_lower]
+        missing += [k for k in INSTRUCTION_TOOLS if k not in core_agent.instruction]
+        assert not missing, f"Missing from instruction: {missing}"
+
+    def test_agent_instruction_warnings(self, core_agent, instr_lower):
         """Test that agent instructions contain important warnings."""
-        instruction = agent.instruction
-        
         # Check for important warnings about direct tool usage
-        assert "do not call" in instruction.lower() or "don't call" in instruction.lower()
-        assert "transfer_to_agent" in instruction
-    
-    def test_agent_instruction_routing_rules(self):
+        assert "do not call" in instr_lower or "don't call" in instr_lower
+        assert "transfer_to_agent" in core_agent.instruction
+
+    def test_agent_instruction_routing_rules(self, core_agent, instr_lower):
         """Test that agent instructions contain routing rules."""
-        instruction = agent.instruction
-        
+        instruction = core_agent.instruction
+
         # Check for routing instructions
         assert "project_key" in instruction
         assert "issue_key" in instruction
-        assert "repo_full_name" in instruction or "repository" in instruction.lower()
+        assert "repo_full_name" in instruction or "repository" in instr_lower
 
 
 class TestAgentErrorHandling:
@@ -244,26 +248,52 @@ class TestAgentErrorHandling:
         assert isinstance(result["error"], str)
     
     @patch('backend.tools.jira.cpa_tools.requests.get')
-    def test_tool_timeout_handling(self, mock_get):
+    def test_tool_timeout_handling(self, mock_get, jira_env):
         """Test tool behavior with timeout errors."""
-        import requests
-        mock_get.side_effect = requests.exceptions.Timeout("Request timeout")
+        mock_get.side_effect = Timeout("Request timeout")
         
         result = who_is_assigned("TEST-123")
         
         assert "error" in result
         assert "timeout" in result["error"].lower()
     
-    def test_tool_invalid_input_handling(self):
-        """Test tool behavior with invalid inputs."""
-        # Test with None input
-        result = who_is_assigned(None)
-        assert "error" in result
-        
-        # Test with empty string
-        result = who_is_assigned("")
-        assert "error" in result
-        
-        # Test with invalid format
-        result = who_is_assigned("invalid-format")
-        # Should still attempt the call but may return error from API
+    @pytest.mark.parametrize("bad", [None, "", "invalid-format", "PROJ-", "PROJ-12a"])
+    @patch('backend.tools.jira.cpa_tools.requests.get')
+    def test_tool_invalid_input_handling(self, mock_get, bad):
+        """Test that malformed issue keys are rejected without calling Jira."""
+        result = who_is_assigned(bad)
+
+        assert result == {"error": "Invalid issue key"}
+        mock_get.assert_not_called()
+
+
+class TestJiraSprintSession:
+    """Pooled requests session behind the sprint tools."""
+
+    @pytest.fixture(autouse=True)
+    def fresh_session(self):
+        with patch.object(sprint_tools, "_SESSION", None):
+            yield
+
+    def test_session_is_reused_for_the_same_credentials(self, jira_env):
+        """Test that tool calls share one session."""
+        _, first = sprint_tools._jira_client()
+        _, second = sprint_tools._jira_client()
+        assert first is second
+
+    def test_close_closes_the_pooled_session_after_credentials_change(self, jira_env, monkeypatch):
+        """Test that shutdown closes the session actually in use, not one rebuilt from the current env."""
+        _, pooled = sprint_tools._jira_client()
+        monkeypatch.setenv("JIRA_API", "rotated-token")
+
+        with patch.object(pooled, "close") as close, patch.object(sprint_tools.requests, "Session") as new_session:
+            sprint_tools.close_jira_session()
+
+        close.assert_called_once()
+        new_session.assert_not_called()
+        assert sprint_tools._SESSION is None
+
+    def test_close_without_a_session_is_a_no_op(self):
+        """Test that shutdown before any tool call does nothing."""
+        sprint_tools.close_jira_session()
+        assert sprint_tools._SESSION is None
@@ -3,6 +3,7 @@ Tests for app/commands.py CLI command handling functionality.
 """
 import pytest
 import json
+import requests
 import tempfile
 from datetime import datetime, timezone
 from pathlib import Path
@@ -11,43 +12,43 @@ from unittest.mock import Mock, patch, MagicMock
 from backend.app.commands import (
     _extract_jira_key, _has_flag, _parse_repo_branch, _state_file_path,
     _save_workday_start, _load_workday_start, _github_commits_since,
-    _jira_auth_headers, _jira_count, _jira_summary_since, handle_cli_commands
+    _jira_auth_headers, _jira_count, _jira_bulk_count, _jira_summary_since, _format_end_day_response,
+    handle_cli_commands
+)
+
+
+EXTRACT_VALID_CASES = (
+    ("ABC-123", "ABC-123"),
+    ("what is the status of issue PROJ-456", "PROJ-456"),
+    ("Check TESTKEY-789 please", "TESTKEY-789"),
+    ("abc-123", "ABC-123"),  # Case insensitive
+    ("Issue: MYPROJ-999 needs attention", "MYPROJ-999"),
+)
+
+EXTRACT_INVALID_CASES = (
+    "",
+    "No jira key here",
+    "123-ABC",  # Numbers first
+    "A-",  # No number
+    "-123",  # No project
+    "ABC-",  # No number
+    "A_BC-123",  # Underscore in project
 )
 
 
 class TestExtractJiraKey:
     """Test Jira key extraction function."""
-    
-    def test_extract_valid_jira_key(self):
+
+    @pytest.mark.parametrize("text,expected", EXTRACT_VALID_CASES)
+    def test_extract_valid_jira_key(self, text, expected):
         """Test extraction of valid Jira keys."""
-        test_cases = [
-            ("ABC-123", "ABC-123"),
-            ("what is the status of issue PROJ-456", "PROJ-456"),
-            ("Check TESTKEY-789 please", "TESTKEY-789"),
-            ("abc-123", "ABC-123"),  # Case insensitive
-            ("Issue: MYPROJ-999 needs attention", "MYPROJ-999"),
-        ]
-        
-        for text, expected in test_cases:
-            result = _extract_jira_key(text)
-            assert result == expected, f"Failed for input: {text}"
-    
-    def test_extract_invalid_jira_key(self):
+        assert _extract_jira_key(text) == expected
+
+    @pytest.mark.parametrize("text", EXTRACT_INVALID_CASES)
+    def test_extract_invalid_jira_key(self, text):
         """Test extraction with invalid Jira key patterns."""
-        test_cases = [
-            "",
-            "No jira key here",
-            "123-ABC",  # Numbers first
-            "A-",  # No number
-            "-123",  # No project
-            "ABC-",  # No number
-            "A_BC-123",  # Underscore in project
-        ]
-        
-        for text in test_cases:
-            result = _extract_jira_key(text)
-            assert result is None, f"Should be None for input: {text}"
-    
+        assert _extract_jira_key(text) is None
+
     def test_extract_multiple_keys_returns_first(self):
         """Test that first valid key is returned when multiple exist."""
         text = "Check ABC-123 and DEF-456"
@@ -57,81 +58,63 @@ class TestExtractJiraKey:
 
 class TestHasFlag:
     """Test flag detection function."""
-    
-    def test_has_flag_positive(self):
+
+    @pytest.mark.parametrize("text,variants", [
+        ("--start day", ["--start day"]),
+        ("Please --start day now", ["--start day"]),
+        ("  --start-day  ", ["--start-day"]),
+        ("Multiple  spaces   --end day", ["--end day"]),
+    ])
+    def test_has_flag_positive(self, text, variants):
         """Test positive flag detection."""
-        test_cases = [
-            ("--start day", ["--start day"]),
-            ("Please --start day now", ["--start day"]),
-            ("  --start-day  ", ["--start-day"]),
-            ("Multiple  spaces   --end day", ["--end day"]),
-        ]
-        
-        for text, variants in test_cases:
-            result = _has_flag(text, variants)
-            assert result is True, f"Failed for: {text}"
-    
-    def test_has_flag_negative(self):
+        assert _has_flag(text, variants) is True
+
+    @pytest.mark.parametrize("text,variants", [
+        ("", ["--start day"]),
+        ("start day", ["--start day"]),
+        ("--start", ["--start day"]),
+        ("day", ["--start day"]),
+        (None, ["--start day"]),
+    ])
+    def test_has_flag_negative(self, text, variants):
         """Test negative flag detection."""
-        test_cases = [
-            ("", ["--start day"]),
-            ("start day", ["--start day"]),
-            ("--start", ["--start day"]),
-            ("day", ["--start day"]),
-            (None, ["--start day"]),
-        ]
-        
-        for text, variants in test_cases:
-            result = _has_flag(text, variants)
-            assert result is False, f"Should be False for: {text}"
+        assert _has_flag(text, variants) is False
 
 
 class TestParseRepoBranch:
     """Test repository and branch parsing function."""
-    
-    def test_parse_repo_branch_with_equals(self):
+
+    @pytest.mark.parametrize("text,expected", [
+        ("repo=owner/name", ("owner/name", None)),
+        ("repository=org/project", ("org/project", None)),
+        ("branch=main", (None, "main")),
+        ("repo=owner/name branch=develop", ("owner/name", "develop")),
+    ])
+    def test_parse_repo_branch_with_equals(self, text, expected):
         """Test parsing with equals syntax."""
-        test_cases = [
-            ("repo=owner/name", ("owner/name", None)),
-            ("repository=org/project", ("org/project", None)),
-            ("branch=main", (None, "main")),
-            ("repo=owner/name branch=develop", ("owner/name", "develop")),
-        ]
-        
-        for text, expected in test_cases:
-            result = _parse_repo_branch(text)
-            assert result == expected, f"Failed for: {text}"
-    
-    def test_parse_repo_branch_with_flags(self):
+        assert _parse_repo_branch(text) == expected
+
+    @pytest.mark.parametrize("text,expected", [
+        ("--repo owner/name", ("owner/name", None)),
+        ("--branch main", (None, "main")),
+        ("--repo owner/name --branch develop", ("owner/name", "develop")),
+    ])
+    def test_parse_repo_branch_with_flags(self, text, expected):
         """Test parsing with flag syntax."""
-        test_cases = [
-            ("--repo owner/name", ("owner/name", None)),
-            ("--branch main", (None, "main")),
-            ("--repo owner/name --branch develop", ("owner/name", "develop")),
-        ]
-        
-        for text, expected in test_cases:
-            result = _parse_repo_branch(text)
-            assert result == expected, f"Failed for: {text}"
-    
-    def test_parse_repo_branch_fallback(self):
+        assert _parse_repo_branch(text) == expected
+
+    @pytest.mark.parametrize("text,expected", [
+        ("check owner/repo status", ("owner/repo", None)),
+        ("multiple owner/repo1 owner/repo2", ("owner/repo1", None)),  # First match
+    ])
+    def test_parse_repo_branch_fallback(self, text, expected):
         """Test fallback parsing for owner/repo pattern."""
-        test_cases = [
-            ("check owner/repo status", ("owner/repo", None)),
-            ("multiple owner/repo1 owner/repo2", ("owner/repo1", None)),  # First match
-        ]
-        
-        for text, expected in test_cases:
-            result = _parse_repo_branch(text)
-            assert result == expected, f"Failed for: {text}"
-    
-    def test_parse_repo_branch_empty(self):
+        assert _parse_repo_branch(text) == expected
+
+    @pytest.mark.parametrize("text", ["", None, "no repo here", "invalid/"])
+    def test_parse_repo_branch_empty(self, text):
         """Test parsing with empty or invalid input."""
-        test_cases = ["", None, "no repo here", "invalid/"]
-        
-        for text in test_cases:
-            result = _parse_repo_branch(text)
-            assert result == (None, None), f"Should return (None, None) for: {text}"
+        assert _parse_repo_branch(text) == (None, None)
 
 
 class TestStateFileOperations:
@@ -179,44 +162,47 @@ class TestStateFileOperations:
         
         assert result is None
     
-    def test_load_workday_start_invalid_json(self, temp_state_file):
+    def test_load_workday_start_invalid_json(self, tmp_path):
         """Test loading from corrupted state file."""
-        temp_state_file.write_text("invalid json content")
-        
-        with patch('backend.app.commands._state_file_path', return_value=temp_state_file):
+        state_file = tmp_path / ".workday_state.json"
+        state_file.write_text("invalid json content")
+
+        with patch('backend.app.commands._state_file_path', return_value=state_file):
             result = _load_workday_start()
         
         assert result is None
 
 
+GITHUB_COMMITS_URL = "https://api.github.com/repos/owner/repo/commits"
+
+
+@pytest.fixture(autouse=True)
+def rmock(requests_mock):
+    """Transport-level fake for requests: unregistered URLs fail instead of reaching the network."""
+    return requests_mock
+
+
 class TestGithubCommitsSince:
     """Test GitHub commits retrieval function."""
     
-    @patch('backend.app.commands.requests.get')
     @patch.dict('os.environ', {'GITHUB_TOKEN': 'test-token'})
-    def test_github_commits_since_success(self, mock_get, mock_github_response):
+    def test_github_commits_since_success(self, rmock, mock_github_response):
         """Test successful GitHub commits retrieval."""
-        mock_response = Mock()
-        mock_response.raise_for_status.return_value = None
-        mock_response.json.return_value = mock_github_response
-        mock_get.return_value = mock_response
-        
+        rmock.get(GITHUB_COMMITS_URL, json=mock_github_response)
+
         start_dt = datetime(2024, 1, 1, 9, 0, 0, tzinfo=timezone.utc)
         result = _github_commits_since("owner/repo", start_dt)
         
         assert "Commits for owner/repo" in result
         assert "Test commit message" in result
         assert "Test Author" in result
+        assert rmock.last_request.headers["Authorization"] == "token test-token"
     
-    @patch('backend.app.commands.requests.get')
     @patch.dict('os.environ', {'GITHUB_TOKEN': 'test-token'})
-    def test_github_commits_since_no_commits(self, mock_get):
+    def test_github_commits_since_no_commits(self, rmock):
         """Test GitHub commits retrieval with no commits."""
-        mock_response = Mock()
-        mock_response.raise_for_status.return_value = None
-        mock_response.json.return_value = []
-        mock_get.return_value = mock_response
-        
+        rmock.get(GITHUB_COMMITS_URL, json=[])
+
         start_dt = datetime(2024, 1, 1, 9, 0, 0, tzinfo=timezone.utc)
         result = _github_commits_since("owner/repo", start_dt)
         
@@ -231,12 +217,11 @@ class TestGithubCommitsSince:
         assert "GitHub environment variable" in result
         assert "not set" in result
     
-    @patch('backend.app.commands.requests.get')
     @patch.dict('os.environ', {'GITHUB_TOKEN': 'test-token'})
-    def test_github_commits_since_api_error(self, mock_get):
+    def test_github_commits_since_api_error(self, rmock):
         """Test GitHub commits retrieval with API error."""
-        mock_get.side_effect = Exception("API Error")
-        
+        rmock.get(GITHUB_COMMITS_URL, exc=requests.exceptions.ConnectionError("API Error"))
+
         start_dt = datetime(2024, 1, 1, 9, 0, 0, tzinfo=timezone.utc)
         result = _github_commits_since("owner/repo", start_dt)
         
@@ -267,18 +252,16 @@ class TestJiraFunctions:
         assert result == (None, None)
     
     @patch('backend.app.commands._jira_auth_headers')
-    @patch('backend.app.commands.requests.get')
-    def test_jira_count_success(self, mock_get, mock_auth):
+    def test_jira_count_success(self, mock_auth, rmock):
         """Test successful Jira count query."""
-        mock_auth.return_value = ('https://test.atlassian.net', Mock())
-        mock_response = Mock()
-        mock_response.ok = True
-        mock_response.json.return_value = {"total": 5}
-        mock_get.return_value = mock_response
-        
+        mock_auth.return_value = ('https://test.atlassian.net', ('user', 'token'))
+        rmock.get("https://test.atlassian.net/rest/api/2/search", json={"total": 5})
+
         result = _jira_count("assignee = currentUser()")
-        
+
         assert result == 5
+        assert rmock.last_request.qs["maxresults"] == ["0"]
+        assert rmock.last_request.headers["Authorization"].startswith("Basic ")
     
     @patch('backend.app.commands._jira_auth_headers')
     def test_jira_count_no_auth(self, mock_auth):
@@ -290,21 +273,29 @@ class TestJiraFunctions:
         assert result is None
     
     @patch('backend.app.commands._jira_count')
-    def test_jira_summary_since(self, mock_count):
+    def test_jira_bulk_count_preserves_order(self, mock_count):
+        """Test that concurrent counts come back in query order."""
+        mock_count.side_effect = lambda jql: {"a": 3, "b": None, "c": 5}[jql]
+
+        assert _jira_bulk_count(["a", "b", "c"]) == [3, None, 5]
+        assert _jira_bulk_count([]) == []
+
+    @patch('backend.app.commands._jira_bulk_count')
+    def test_jira_summary_since(self, mock_bulk):
         """Test Jira summary generation."""
-        mock_count.side_effect = [3, 1, 5]  # completed, raised, working
-        
+        mock_bulk.return_value = [3, 1, 5]  # completed, raised, working
+
         start_dt = datetime(2024, 1, 1, 9, 0, 0, tzinfo=timezone.utc)
         result = _jira_summary_since(start_dt)
-        
-        assert result["completed"] == 3
-        assert result["raised"] == 1
-        assert result["working"] == 5
-    
-    @patch('backend.app.commands._jira_count')
-    def test_jira_summary_since_api_failure(self, mock_count):
+
+        assert result == {"completed": 3, "raised": 1, "working": 5}
+        mock_bulk.assert_called_once()
+        assert len(mock_bulk.call_args.args[0]) == 3
+
+    @patch('backend.app.commands._jira_bulk_count')
+    def test_jira_summary_since_api_failure(self, mock_bulk):
         """Test Jira summary with API failures."""
-        mock_count.return_value = None
+        mock_bulk.return_value = [None, None, None]
         
         start_dt = datetime(2024, 1, 1, 9, 0, 0, tzinfo=timezone.utc)
         result = _jira_summary_since(start_dt)
@@ -314,21 +305,80 @@ class TestJiraFunctions:
         assert result["working"] == "n/a"
 
 
+class TestFormatEndDayResponse:
+    """Test the --end day summary formatter."""
+
+    START = datetime(2024, 1, 1, 9, 0, 0, tzinfo=timezone.utc)
+
+    def test_format_with_repo(self):
+        """Test the full summary layout when a repository is tracked."""
+        result = _format_end_day_response(
+            self.START, "owner/repo", "Mock commit summary", {"completed": 2, "raised": 1, "working": 3}
+        )
+
+        assert result == "\n".join([
+            "Workday summary since 2024-01-01 09:00 UTC:",
+            "",
+            "Jira:",
+            "- Completed issues: 2",
+            "- Raised issues: 1",
+            "- Working on: 3",
+            "",
+            "GitHub commits:",
+            "Repository: owner/repo",
+            "Mock commit summary",
+        ])
+
+    def test_format_without_repo(self):
+        """Test that the repository line is omitted when no repo is configured."""
+        result = _format_end_day_response(
+            self.START, None, "No repo configured.", {"completed": "n/a", "raised": "n/a", "working": "n/a"}
+        )
+
+        assert "Repository:" not in result
+        assert result.endswith("GitHub commits:\nNo repo configured.")
+        assert "- Completed issues: n/a" in result
+
+
+@pytest.fixture
+def frozen_now(monkeypatch):
+    """Pin datetime.now() inside app.commands to a fixed instant."""
+    fixed = datetime(2024, 1, 1, 9, 0, 0, tzinfo=timezone.utc)
+
+    class FrozenDateTime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return fixed if tz is None else fixed.astimezone(tz)
+
+    monkeypatch.setattr("backend.app.commands.datetime", FrozenDateTime)
+    return fixed
+
+
 class TestHandleCliCommands:
     """Test CLI command handling."""
     
+    @patch('backend.app.commands._jira_search', return_value=[])
     @patch('backend.app.commands._save_workday_start')
     @patch.dict('os.environ', {'GITHUB_DEFAULT_REPO': 'default/repo'})
-    def test_handle_start_day_command(self, mock_save):
+    def test_handle_start_day_command(self, mock_save, mock_search, frozen_now):
         """Test --start day command handling."""
         result = handle_cli_commands("--start day")
-        
-        assert result is not None
-        assert "response" in result
-        assert "Workday started" in result["response"]
-        assert "default/repo" in result["response"]
-        mock_save.assert_called_once()
-    
+
+        start_local = frozen_now.astimezone()
+        assert result == {"response": "\n".join([
+            f"Workday started at {start_local.strftime('%Y-%m-%d %H:%M %Z')}.",
+            "Tracking GitHub default/repo (default branch).",
+            "",
+            "Today's focus suggestions (Jira):",
+            "- Due today:",
+            "  • None",
+            "- In progress / next up:",
+            "  • None",
+            "",
+            "Use --end day to get Jira and commit summary since start.",
+        ])}
+        mock_save.assert_called_once_with(start_local.isoformat(), "default/repo", None)
+
     @patch('backend.app.commands._save_workday_start')
     def test_handle_start_day_with_repo(self, mock_save):
         """Test --start day command with specific repo."""
@@ -352,27 +402,30 @@ class TestHandleCliCommands:
         mock_jira.return_value = {"completed": 2, "raised": 1, "working": 3}
         
         result = handle_cli_commands("--end day")
-        
-        assert result is not None
-        assert "response" in result
-        assert "Workday summary" in result["response"]
-        assert "Completed issues: 2" in result["response"]
-        assert "Mock commit summary" in result["response"]
+
+        start_local = datetime(2024, 1, 1, 9, 0, 0, tzinfo=timezone.utc).astimezone()
+        assert result == {"response": _format_end_day_response(
+            start_local, "owner/repo", "Mock commit summary", {"completed": 2, "raised": 1, "working": 3}
+        )}
+        mock_github.assert_called_once_with("owner/repo", start_local, "main")
     
     @patch('backend.app.commands._load_workday_start')
     @patch('backend.app.commands._github_commits_since')
     @patch('backend.app.commands._jira_summary_since')
     @patch.dict('os.environ', {'GITHUB_DEFAULT_REPO': 'default/repo'})
-    def test_handle_end_day_no_saved_state(self, mock_jira, mock_github, mock_load):
+    def test_handle_end_day_no_saved_state(self, mock_jira, mock_github, mock_load, frozen_now):
         """Test --end day command without saved state."""
         mock_load.return_value = None
         mock_github.return_value = "Mock commit summary"
         mock_jira.return_value = {"completed": 0, "raised": 0, "working": 1}
-        
+
         result = handle_cli_commands("--end day")
-        
-        assert result is not None
-        assert "default/repo" in result["response"]
+
+        # Without saved state the window starts at local midnight of "now"
+        start_local = frozen_now.astimezone().replace(hour=0, minute=0, second=0, microsecond=0)
+        assert "Repository: default/repo" in result["response"]
+        mock_github.assert_called_once_with("default/repo", start_local, None)
+        mock_jira.assert_called_once_with(start_local)
     
     def test_handle_non_cli_command(self):
         """Test handling of non-CLI commands."""
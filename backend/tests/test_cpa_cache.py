@@ -0,0 +1,260 @@
+"""
+Tests for the CPA engine's per-project result cache and the slack lookups built on it.
+
+No database is needed: SessionLocal, load_project_from_db and _run_cpa are patched per test.
+"""
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from backend.app.db.models import ProjectModel, TaskModel
+from backend.tools.cpa.engine import cpa
+
+
+def _result(project_id, *task_ids):
+    """A minimal CPA result for project_id whose tasks have slack 1.0, 2.0, ..."""
+    return {
+        "project_id": project_id,
+        "tasks": [{"id": t, "slack": float(n)} for n, t in enumerate(task_ids, 1)],
+    }
+
+
+@pytest.fixture
+def empty_cache():
+    """Start with no cached CPA results and no reverse index."""
+    with patch.dict(cpa._CPA_RESULT_CACHE, clear=True), patch.dict(cpa._TASK_TO_PROJECT, clear=True):
+        yield
+
+
+@pytest.fixture
+def tasks_table():
+    """Patch SessionLocal; the yielded dict maps task id -> project id for the tasks query."""
+    table = {}
+    session = MagicMock()
+
+    def execute(sql, params):
+        wanted = params["ids"] if "ids" in params else [params["id"]]
+        rows = [SimpleNamespace(id=t, project_id=table[t]) for t in wanted if t in table]
+        return MagicMock(fetchall=MagicMock(return_value=rows),
+                         fetchone=MagicMock(return_value=rows[0] if rows else None))
+
+    session.execute.side_effect = execute
+    with patch.object(cpa, "SessionLocal", return_value=session) as factory:
+        yield SimpleNamespace(table=table, session=session, factory=factory)
+
+
+@pytest.fixture
+def clock():
+    """Replace cpa's monotonic clock; advance it by adding to clock.now."""
+    state = SimpleNamespace(now=1000.0)
+    with patch.object(cpa, "time", SimpleNamespace(monotonic=lambda: state.now)):
+        yield state
+
+
+@pytest.fixture
+def loader():
+    """Patch the DB: every project id loads as a two-task project "<id>-1" -> "<id>-2"."""
+    def load(db, project_id):
+        return ProjectModel(id=project_id, name=f"p{project_id}", tasks=[
+            TaskModel(id=f"{project_id}-1", name="first", estimate_days=2, assignee="ann", dependencies=[]),
+            TaskModel(id=f"{project_id}-2", name="second", estimate_days=1, assignee="ann",
+                      dependencies=[f"{project_id}-1"]),
+        ])
+
+    with patch.object(cpa, "SessionLocal", MagicMock()), \
+         patch.object(cpa, "load_project_from_db", side_effect=load) as load_mock:
+        yield load_mock
+
+
+class TestCpaResultCache:
+    """TTL, plain-field upgrade, size bound and invalidation of _CPA_RESULT_CACHE."""
+
+    def test_hit_reuses_the_result(self, empty_cache, clock, loader):
+        """Test that a second call inside the TTL returns the same result without loading."""
+        first = cpa._run_cpa(1)
+        clock.now += cpa._CPA_TTL_SECONDS - 1
+        assert cpa._run_cpa(1) is first
+        assert loader.call_count == 1
+        assert cpa._TASK_TO_PROJECT == {"1-1": 1, "1-2": 1}
+
+    def test_expired_entry_is_recomputed(self, empty_cache, clock, loader):
+        """Test that an entry at the TTL is dropped, along with its reverse-index entries."""
+        first = cpa._run_cpa(1)
+        clock.now += cpa._CPA_TTL_SECONDS
+        assert cpa._cached_cpa(1) is None
+        assert 1 not in cpa._CPA_RESULT_CACHE
+        assert cpa._TASK_TO_PROJECT == {}
+
+        second = cpa._run_cpa(1)
+        assert second is not first
+        assert loader.call_count == 2
+
+    def test_plain_fields_trigger_one_recompute(self, empty_cache, clock, loader):
+        """Test that a plain-PERT caller recomputes a lean entry once, which then serves every caller."""
+        lean = cpa._run_cpa(1)
+        assert "ES_plain" not in lean["tasks"][0]
+
+        full = cpa.run_cpa(1)
+        assert "ES_plain" in full["tasks"][0]
+        assert loader.call_count == 2
+
+        assert cpa._run_cpa(1) is full
+        assert cpa.run_cpa(1) is full
+        assert loader.call_count == 2
+
+    def test_oldest_project_is_evicted(self, empty_cache, clock, loader):
+        """Test that the cache stays at _CPA_CACHE_MAX_ENTRIES and evicts in insertion order."""
+        with patch.object(cpa, "_CPA_CACHE_MAX_ENTRIES", 2):
+            for pid in (1, 2, 3):
+                cpa._run_cpa(pid)
+
+        assert list(cpa._CPA_RESULT_CACHE) == [2, 3]
+        assert set(cpa._TASK_TO_PROJECT.values()) == {2, 3}
+
+    def test_invalidate_one_project(self, empty_cache, clock, loader):
+        """Test that invalidating a project drops its entry and index, leaving other projects cached."""
+        cpa._run_cpa(1)
+        cpa._run_cpa(2)
+
+        cpa.invalidate_cpa_cache(1)
+
+        assert list(cpa._CPA_RESULT_CACHE) == [2]
+        assert cpa._TASK_TO_PROJECT == {"2-1": 2, "2-2": 2}
+        cpa._run_cpa(1)
+        assert loader.call_count == 3
+
+    def test_invalidate_everything(self, empty_cache, clock, loader):
+        """Test that invalidate_cpa_cache() with no project clears the cache and the index."""
+        cpa._run_cpa(1)
+        cpa._run_cpa(2)
+
+        cpa.invalidate_cpa_cache()
+
+        assert cpa._CPA_RESULT_CACHE == {}
+        assert cpa._TASK_TO_PROJECT == {}
+
+
+class TestGetTaskSlackBulk:
+    """get_task_slack_bulk groups tasks by project and runs CPA once per project."""
+
+    RESULTS = {1: _result(1, "A-1", "A-2"), 2: _result(2, "B-1")}
+
+    @pytest.fixture
+    def run_cpa(self):
+        with patch.object(cpa, "_run_cpa", side_effect=lambda pid, db=None: self.RESULTS[pid]) as run:
+            yield run
+
+    def test_tasks_from_several_projects(self, empty_cache, tasks_table, run_cpa):
+        """Test that every task gets its own project's slack and CPA runs once per project."""
+        tasks_table.table.update({"A-1": 1, "A-2": 1, "B-1": 2})
+
+        out = cpa.get_task_slack_bulk(["A-2", "B-1", "A-1"])
+
+        assert out == {
+            "A-2": {"task_id": "A-2", "project_id": 1, "slack": 2.0},
+            "B-1": {"task_id": "B-1", "project_id": 2, "slack": 1.0},
+            "A-1": {"task_id": "A-1", "project_id": 1, "slack": 1.0},
+        }
+        assert sorted(c.args[0] for c in run_cpa.call_args_list) == [1, 2]
+        assert tasks_table.session.execute.call_count == 1
+        tasks_table.session.close.assert_called_once()
+
+    def test_unknown_id_and_task_missing_from_result(self, empty_cache, tasks_table, run_cpa):
+        """Test the two error shapes: no tasks row, and a row whose project result lacks the task."""
+        tasks_table.table.update({"A-1": 1, "A-9": 1})
+
+        out = cpa.get_task_slack_bulk(["NOPE-1", "A-9", "A-1"])
+
+        assert out["NOPE-1"] == {"task_id": "NOPE-1", "error": "task not found"}
+        assert out["A-9"] == {"task_id": "A-9", "project_id": 1, "error": "task not in project"}
+        assert out["A-1"]["slack"] == 1.0
+        run_cpa.assert_called_once()
+
+    def test_duplicate_ids_are_queried_once(self, empty_cache, tasks_table, run_cpa):
+        """Test that repeated ids share one query parameter and one answer."""
+        tasks_table.table.update({"A-1": 1})
+
+        out = cpa.get_task_slack_bulk(["A-1", "A-1", "A-1"])
+
+        assert out == {"A-1": {"task_id": "A-1", "project_id": 1, "slack": 1.0}}
+        sql, params = tasks_table.session.execute.call_args.args
+        assert params == {"ids": ["A-1"]}
+        run_cpa.assert_called_once()
+
+    def test_cached_projects_skip_the_query(self, empty_cache, tasks_table, run_cpa):
+        """Test that tasks indexed under a fresh cached result never open a session."""
+        cpa._CPA_RESULT_CACHE[1] = (time.monotonic(), self.RESULTS[1], False)
+        cpa._TASK_TO_PROJECT.update({"A-1": 1, "A-2": 1})
+
+        out = cpa.get_task_slack_bulk(["A-1", "A-2"])
+
+        assert out["A-1"]["slack"] == 1.0 and out["A-2"]["slack"] == 2.0
+        tasks_table.factory.assert_not_called()
+        run_cpa.assert_not_called()
+
+    def test_only_uncached_tasks_are_queried(self, empty_cache, tasks_table, run_cpa):
+        """Test that a mix of cached and uncached tasks queries and computes only the uncached project."""
+        cpa._CPA_RESULT_CACHE[1] = (time.monotonic(), self.RESULTS[1], False)
+        cpa._TASK_TO_PROJECT.update({"A-1": 1, "A-2": 1})
+        tasks_table.table.update({"B-1": 2})
+
+        out = cpa.get_task_slack_bulk(["A-1", "B-1"])
+
+        assert out["B-1"] == {"task_id": "B-1", "project_id": 2, "slack": 1.0}
+        assert tasks_table.session.execute.call_args.args[1] == {"ids": ["B-1"]}
+        assert [c.args[0] for c in run_cpa.call_args_list] == [2]
+
+
+class TestGetTaskSlack:
+    """get_task_slack's _TASK_TO_PROJECT fast path."""
+
+    def test_cache_hit_skips_the_session(self, empty_cache, clock, loader):
+        """Test that a task indexed under a fresh cached result never opens a session."""
+        cpa._run_cpa(1)
+        loader.reset_mock()
+
+        with patch.object(cpa, "SessionLocal") as factory:
+            out = cpa.get_task_slack("1-1")
+
+        assert out == {"task_id": "1-1", "project_id": 1, "slack": 0.0}
+        factory.assert_not_called()
+        loader.assert_not_called()
+
+    def test_miss_queries_the_project_and_fills_the_index(self, empty_cache, clock, loader, tasks_table):
+        """Test the slow path: look up the project, run CPA on the same session, then index its tasks."""
+        tasks_table.table.update({"1-2": 1})
+
+        out = cpa.get_task_slack("1-2")
+
+        assert out == {"task_id": "1-2", "project_id": 1, "slack": 0.0}
+        assert tasks_table.session.execute.call_args.args[1] == {"id": "1-2"}
+        assert loader.call_args.args[0] is tasks_table.session
+        assert cpa._TASK_TO_PROJECT == {"1-1": 1, "1-2": 1}
+
+    def test_expired_entry_falls_back_to_the_query(self, empty_cache, clock, loader, tasks_table):
+        """Test that a stale reverse-index entry is not trusted once its result has expired."""
+        cpa._run_cpa(1)
+        tasks_table.factory.reset_mock()
+        clock.now += cpa._CPA_TTL_SECONDS
+        tasks_table.table.update({"1-1": 1})
+
+        assert cpa.get_task_slack("1-1")["project_id"] == 1
+        tasks_table.factory.assert_called_once()
+
+    def test_unknown_task(self, empty_cache, tasks_table):
+        """Test that a task with no tasks row reports task not found."""
+        assert cpa.get_task_slack("NOPE-1") == {"task_id": "NOPE-1", "error": "task not found"}
+
+    def test_drop_cached_cpa_removes_only_its_index_entries(self, empty_cache, clock, loader):
+        """Test that dropping a project removes its tasks from the index, leaving ids re-owned by another project."""
+        cpa._run_cpa(1)
+        cpa._run_cpa(2)
+        # A task moved to project 2 after project 1 was cached
+        cpa._TASK_TO_PROJECT["1-2"] = 2
+
+        cpa._drop_cached_cpa(1)
+
+        assert cpa._TASK_TO_PROJECT == {"1-2": 2, "2-1": 2, "2-2": 2}
+        assert 1 not in cpa._CPA_RESULT_CACHE
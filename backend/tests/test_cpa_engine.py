@@ -0,0 +1,181 @@
+"""
+Tests for the CPA engine's graph algorithms (pure functions, no Jira or DB access).
+"""
+import sys
+from unittest.mock import patch
+
+import pytest
+
+from backend.app.db.models import ProjectModel, TaskModel
+from backend.tools.cpa.engine import cpa
+from backend.tools.cpa.engine import jira as engine_jira
+from backend.tools.cpa.engine import sprint_dependency
+from backend.tools.cpa.engine.sprint_eta import _detect_cycles
+
+
+def _graph(edges, extra=()):
+    """Build a nodes mapping from (task, dependency) pairs."""
+    nodes = {k: {"dependencies": []} for pair in edges for k in pair}
+    nodes.update({k: {"dependencies": []} for k in extra})
+    for task, dep in edges:
+        nodes[task]["dependencies"].append(dep)
+    return nodes
+
+
+def _assert_closed_loop(nodes, cycle):
+    assert cycle[0] == cycle[-1]
+    for a, b in zip(cycle, cycle[1:]):
+        assert b in nodes[a]["dependencies"]
+
+
+class TestDetectCycles:
+    """_detect_cycles returns one closed loop per strongly connected component with a cycle."""
+
+    def test_acyclic_graph_has_no_cycles(self):
+        nodes = _graph([("B", "A"), ("C", "B"), ("C", "A")], extra=["D"])
+        assert _detect_cycles(nodes) == []
+
+    def test_self_loop(self):
+        nodes = _graph([("A", "A"), ("B", "A")])
+        assert _detect_cycles(nodes) == [["A", "A"]]
+
+    def test_two_disjoint_cycles(self):
+        nodes = _graph([("A", "B"), ("B", "A"), ("C", "D"), ("D", "E"), ("E", "C"), ("F", "A")])
+        cycles = _detect_cycles(nodes)
+        assert len(cycles) == 2
+        assert sorted(sorted(set(c)) for c in cycles) == [["A", "B"], ["C", "D", "E"]]
+        for cycle in cycles:
+            _assert_closed_loop(nodes, cycle)
+
+    def test_cycle_reachable_from_acyclic_prefix(self):
+        """Test that only the loop is reported, not the chain leading into it."""
+        nodes = _graph([("P1", "P2"), ("P2", "P3"), ("P3", "L1"), ("L1", "L2"), ("L2", "L3"), ("L3", "L1")])
+        cycles = _detect_cycles(nodes)
+        assert len(cycles) == 1
+        assert set(cycles[0]) == {"L1", "L2", "L3"}
+        _assert_closed_loop(nodes, cycles[0])
+
+    def test_unknown_dependencies_are_ignored(self):
+        nodes = {"A": {"dependencies": ["OUTSIDE-1"]}, "B": {}}
+        assert _detect_cycles(nodes) == []
+
+    def test_deep_chain_past_recursion_limit(self):
+        """Test a ring far longer than the recursion limit; the old recursive DFS overflowed here."""
+        n = sys.getrecursionlimit() * 3
+        nodes = {f"T-{i}": {"dependencies": [f"T-{(i + 1) % n}"]} for i in range(n)}
+        cycles = _detect_cycles(nodes)
+        assert len(cycles) == 1
+        assert len(cycles[0]) == n + 1
+        _assert_closed_loop(nodes, cycles[0])
+
+
+def _task(key, days, assignee, deps=()):
+    return TaskModel(id=key, name=key, estimate_days=days, assignee=assignee, dependencies=list(deps))
+
+
+@pytest.fixture(params=["compiled", "python"])
+def cpa_kernels(request):
+    """Run the CPA kernels as compiled by numba (when installed) and as their plain-Python source."""
+    if request.param == "compiled":
+        yield
+        return
+    kernels = {name: obj.py_func for name, obj in vars(cpa).items() if hasattr(obj, "py_func")}
+    with patch.multiple(cpa, **kernels):
+        yield
+
+
+class TestRcpspSchedule:
+    """Pinned PERT + RCPSP results for a small project where two assignees' tasks contend."""
+
+    # ann owns T-1, T-2 and T-5; bob owns T-3 (after T-1) and T-4 (after T-2)
+    PROJECT = ProjectModel(id=1, name="pinned", tasks=[
+        _task("T-1", 3, "ann"),
+        _task("T-2", 2, "ann"),
+        _task("T-3", 4, "bob", ["T-1"]),
+        _task("T-4", 1, "bob", ["T-2"]),
+        _task("T-5", 2, "ann", ["T-3", "T-4"]),
+    ])
+
+    # id: (ES, EF, LS, LF, slack, isCritical, ES_plain, EF_plain, LS_plain, LF_plain, slack_plain)
+    EXPECTED = {
+        "T-1": (0.0, 3.0, 1.0, 4.0, 1.0, False, 0.0, 3.0, 0.0, 3.0, 0.0),
+        "T-2": (3.0, 5.0, 5.0, 7.0, 2.0, False, 0.0, 2.0, 4.0, 6.0, 4.0),
+        "T-3": (3.0, 7.0, 3.0, 7.0, 0.0, True, 3.0, 7.0, 3.0, 7.0, 0.0),
+        "T-4": (7.0, 8.0, 7.0, 8.0, 0.0, True, 2.0, 3.0, 6.0, 7.0, 4.0),
+        "T-5": (8.0, 10.0, 8.0, 10.0, 0.0, True, 7.0, 9.0, 7.0, 9.0, 0.0),
+    }
+    FIELDS = ("ES", "EF", "LS", "LF", "slack", "isCritical",
+              "ES_plain", "EF_plain", "LS_plain", "LF_plain", "slack_plain")
+
+    def test_schedule_is_pinned(self, cpa_kernels):
+        result = cpa._run_pert_rcpsp_calc(self.PROJECT)
+
+        assert result["project_duration"] == 10.0
+        assert result["critical_path"] == ["T-3", "T-4", "T-5"]
+        assert [t["id"] for t in result["tasks"]] == ["T-1", "T-2", "T-3", "T-4", "T-5"]
+        for t in result["tasks"]:
+            assert tuple(t[f] for f in self.FIELDS) == self.EXPECTED[t["id"]], t["id"]
+
+    def test_summary_matches_full_result(self, cpa_kernels):
+        summary = cpa._run_pert_rcpsp_summary(self.PROJECT, sample_size=2)
+
+        assert summary["tasks_count"] == 5
+        assert summary["critical_count"] == 3
+        assert summary["project_duration"] == 10.0
+        assert summary["critical_path"] == ["T-3", "T-4", "T-5"]
+        assert [t["id"] for t in summary["sample"]] == ["T-1", "T-2"]
+
+    def test_dependency_cycle_does_not_hang(self, cpa_kernels):
+        """Test that tasks on a cycle are never released and keep zero times instead of looping."""
+        project = ProjectModel(id=2, name="cyclic", tasks=[
+            _task("C-1", 1, "ann", ["C-2"]),
+            _task("C-2", 1, "ann", ["C-1"]),
+            _task("C-3", 2, "bob"),
+        ])
+        result = cpa._run_pert_rcpsp_calc(project)
+
+        tasks = {t["id"]: t for t in result["tasks"]}
+        assert result["project_duration"] == 2.0
+        assert (tasks["C-3"]["ES"], tasks["C-3"]["EF"]) == (0.0, 2.0)
+        assert (tasks["C-1"]["ES"], tasks["C-1"]["EF"]) == (0.0, 0.0)
+
+
+def _sprint_issue(key, days, assignee, deps=()):
+    """A current-sprint Jira issue with a time estimate of `days` eight-hour days."""
+    return {"key": key, "fields": {
+        "assignee": {"displayName": assignee},
+        "aggregatetimeoriginalestimate": days * 8 * 3600,
+        "issuelinks": [{"type": {"name": "Blocks"}, "inwardIssue": {"key": d}} for d in deps],
+        "sprint": {"startDate": "2025-03-03T09:00:00.000Z", "endDate": "2025-03-14T17:00:00.000Z"},
+    }}
+
+
+class TestSprintSchedule:
+    """Pinned schedule_current_sprint_with_dependencies output when completions coincide."""
+
+    # P-1 (carol) and P-2 (bob) both finish on 2025-03-04; each unblocks one of ann's tasks.
+    # P-1 completes first in heap order, but ann picks up P-4 first because every same-day
+    # completion is released before work starts and ready tasks start in key order.
+    ISSUES = [
+        _sprint_issue("P-1", 2, "carol"),
+        _sprint_issue("P-2", 2, "bob"),
+        _sprint_issue("P-5", 1, "ann", ["P-1"]),
+        _sprint_issue("P-4", 3, "ann", ["P-2"]),
+    ]
+
+    def test_same_day_completions_release_successors_in_key_order(self):
+        with patch.object(sprint_dependency, "_cached_current_sprint_issues", return_value=self.ISSUES), \
+             patch.object(sprint_dependency, "_sp_field_key", return_value=None), \
+             patch.object(engine_jira, "_sp_field_key", return_value=None):
+            result = sprint_dependency.schedule_current_sprint_with_dependencies("P")
+
+        schedule = {k: (v["start"], v["end"]) for k, v in result["per_issue_schedule"].items()}
+        assert schedule == {
+            "P-1": ("2025-03-03", "2025-03-04"),
+            "P-2": ("2025-03-03", "2025-03-04"),
+            "P-4": ("2025-03-04", "2025-03-06"),
+            "P-5": ("2025-03-07", "2025-03-07"),
+        }
+        assert result["start_used"] == "2025-03-03"
+        assert result["sprint_end"] == "2025-03-14"
+        assert result["overall_completion_date"] == "2025-03-07"
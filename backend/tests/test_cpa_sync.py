@@ -0,0 +1,190 @@
+"""
+Tests for the CPA engine's Jira -> DB sync (batched writes through a raw DBAPI cursor).
+
+No Postgres is needed: execute_values is patched to record its SQL and rows, and the
+cursor is a mock whose execute() calls are inspected.
+"""
+from datetime import date
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from backend.app.db import db_loader
+from backend.tools.cpa.engine import db as engine_db
+from backend.tools.cpa.engine import jira as engine_jira
+
+
+@pytest.fixture
+def cursor():
+    """A mock Session whose raw DBAPI cursor is returned for inspection."""
+    session = MagicMock()
+    cur = session.connection.return_value.connection.cursor.return_value
+    return session, cur
+
+
+@pytest.fixture
+def task_columns():
+    """Pretend the tasks table has an integer assignee column (schema.sql)."""
+    cols = {"id": "character varying", "project_id": "integer", "name": "text",
+            "estimate_days": "double precision", "end_date": "date", "assignee": "integer"}
+    with patch.dict(db_loader._TASKS_COLMAP, cols, clear=True):
+        yield
+
+
+def _task(key, name=None, est=2.0, assignee=None, end_date=None):
+    return {"id": key, "name": name, "est_duration": est, "assignee": assignee, "end_date": end_date}
+
+
+class TestBulkUpsertTasks:
+    """Row construction and inserted/updated counts for _bulk_upsert_tasks."""
+
+    def test_rows_and_counts_from_xmax(self, cursor, task_columns):
+        """Test that each row maps to a VALUES tuple and counts come from the RETURNING flags."""
+        session, cur = cursor
+        rows = [
+            _task("P-1", "First", 3.0, "Ann", "2024-05-01T10:00:00.000+0000"),
+            _task("P-2", None, 0, None, None),
+        ]
+        with patch.object(engine_db, "execute_values", return_value=[(True,), (False,)]) as ev:
+            inserted, updated = engine_db._bulk_upsert_tasks(session, 7, rows, {"Ann": 11})
+
+        assert (inserted, updated) == (1, 1)
+        sql, values = ev.call_args[0][1], ev.call_args[0][2]
+        assert "INSERT INTO tasks (id, project_id, name, estimate_days, end_date, assignee)" in sql
+        assert "ON CONFLICT (id) DO UPDATE SET" in sql
+        assert "RETURNING (xmax = 0) AS inserted" in sql
+        assert ev.call_args[1]["fetch"] is True
+        assert values == [
+            ("P-1", 7, "First", 3.0, date(2024, 5, 1), 11),
+            # Missing name falls back to the key; a zero estimate falls back to one day
+            ("P-2", 7, "P-2", 1.0, None, None),
+        ]
+        cur.close.assert_called_once()
+
+    def test_last_occurrence_of_an_id_wins(self, cursor, task_columns):
+        """Test that duplicate ids collapse to their last row so one statement never hits a row twice."""
+        session, _ = cursor
+        rows = [_task("P-1", "old"), _task("P-2", "other"), _task("P-1", "new")]
+        with patch.object(engine_db, "execute_values", return_value=[(True,), (True,)]) as ev:
+            assert engine_db._bulk_upsert_tasks(session, 1, rows, {}) == (2, 0)
+
+        values = ev.call_args[0][2]
+        assert [(v[0], v[2]) for v in values] == [("P-1", "new"), ("P-2", "other")]
+
+    def test_empty_rows_skip_the_database(self, cursor, task_columns):
+        """Test that nothing is sent when there is nothing to write."""
+        session, _ = cursor
+        with patch.object(engine_db, "execute_values") as ev:
+            assert engine_db._bulk_upsert_tasks(session, 1, [], {}) == (0, 0)
+        ev.assert_not_called()
+
+
+class TestBulkReplaceDependencies:
+    """Pair construction and placeholder handling for _bulk_replace_dependencies."""
+
+    def test_pairs_placeholders_and_statement_order(self, cursor):
+        """Test dedupe/self-link filtering, placeholders only for unknown targets, and DELETE before INSERT."""
+        session, cur = cursor
+        engine_db._bulk_replace_dependencies(session, 3, {
+            "P-2": ["P-1", "X-9", "P-1", "P-2", ""],
+            "P-1": [],
+        })
+
+        calls = [(" ".join(c[0][0].split()), c[0][1]) for c in cur.execute.call_args_list]
+        assert len(calls) == 3
+        placeholder_sql, placeholder_args = calls[0]
+        # Placeholders must never overwrite a task that already exists
+        assert placeholder_sql.startswith("INSERT INTO tasks (id, project_id, name, estimate_days)")
+        assert placeholder_sql.endswith("ON CONFLICT (id) DO NOTHING")
+        assert placeholder_args == (3, ["X-9"])
+        assert calls[1] == ("DELETE FROM dependencies WHERE task_id = ANY(%s)", (["P-2", "P-1"],))
+        assert "UNNEST(%s::text[], %s::text[])" in calls[2][0]
+        assert calls[2][1] == (["P-2", "P-2"], ["P-1", "X-9"])
+
+    def test_no_placeholders_or_pairs_only_clears_links(self, cursor):
+        """Test that tasks without links still get their old links removed."""
+        session, cur = cursor
+        engine_db._bulk_replace_dependencies(session, 3, {"P-1": [], "P-2": ["P-2"]})
+
+        assert [c[0][0] for c in cur.execute.call_args_list] == [
+            "DELETE FROM dependencies WHERE task_id = ANY(%s)"
+        ]
+
+
+class TestBulkUpsertUsers:
+    """Batched assignee upsert and its savepoint fallback."""
+
+    def test_returns_id_map(self, cursor):
+        """Test one INSERT for the distinct names and one SELECT to read every id back."""
+        session, cur = cursor
+        cur.fetchall.return_value = [(1, "Ann"), (2, "Bob")]
+        with patch.object(engine_db, "execute_values") as ev:
+            assert engine_db._bulk_upsert_users(session, {"Bob", "Ann", None}) == {"Ann": 1, "Bob": 2}
+
+        assert "ON CONFLICT (username) DO NOTHING" in ev.call_args[0][1]
+        assert ev.call_args[0][2] == [("Ann", "", "{}"), ("Bob", "", "{}")]
+        statements = [c[0][0] for c in cur.execute.call_args_list]
+        assert statements[0] == "SAVEPOINT bulk_upsert_users"
+        assert statements[-1] == "RELEASE SAVEPOINT bulk_upsert_users"
+
+    def test_failure_rolls_back_to_savepoint(self, cursor):
+        """Test that a failing insert is undone locally and the refresh continues without assignee ids."""
+        session, cur = cursor
+        with patch.object(engine_db, "execute_values", side_effect=Exception("constraint")):
+            assert engine_db._bulk_upsert_users(session, {"Ann"}) == {}
+
+        statements = [c[0][0] for c in cur.execute.call_args_list]
+        assert statements == ["SAVEPOINT bulk_upsert_users", "ROLLBACK TO SAVEPOINT bulk_upsert_users"]
+        session.rollback.assert_not_called()
+
+    def test_no_names_skip_the_database(self, cursor):
+        """Test that unassigned issues do not cost a round trip."""
+        session, cur = cursor
+        assert engine_db._bulk_upsert_users(session, {None, ""}) == {}
+        cur.execute.assert_not_called()
+
+
+class TestSyncIssues:
+    """Page-by-page sync in one transaction."""
+
+    @pytest.fixture
+    def session_local(self):
+        engine = create_engine("sqlite://")
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE projects (id INTEGER PRIMARY KEY, name TEXT)"))
+        with patch.object(engine_jira, "SessionLocal", sessionmaker(bind=engine)), \
+             patch.dict(engine_db._PROJECT_ID_CACHE, clear=True):
+            yield
+
+    def test_links_written_once_after_every_page(self, session_local):
+        """Test that a link to an issue on a later page is replaced only after that issue is written."""
+        events = []
+
+        def upsert_tasks(db, project_id, rows, user_ids):
+            events.append(("tasks", [r["id"] for r in rows]))
+            return len(rows) - 1, 1
+
+        def replace_dependencies(db, project_id, deps_by_task):
+            events.append(("deps", deps_by_task))
+
+        link = {"type": {"name": "Blocks"}, "inwardIssue": {"key": "P-3"}}
+        pages = iter([
+            [{"key": "P-1", "fields": {}}, {"key": "P-2", "fields": {"issuelinks": [link]}}],
+            [{"key": "P-3", "fields": {"assignee": {"displayName": "Ann"}}}],
+        ])
+        with patch.object(engine_jira, "_bulk_upsert_users", return_value={}) as users, \
+             patch.object(engine_jira, "_bulk_upsert_tasks", side_effect=upsert_tasks), \
+             patch.object(engine_jira, "_bulk_replace_dependencies", side_effect=replace_dependencies), \
+             patch("backend.tools.cpa.engine.cpa.invalidate_cpa_cache") as invalidate:
+            result = engine_jira._sync_issues("P", pages)
+
+        assert events == [
+            ("tasks", ["P-1", "P-2"]),
+            ("tasks", ["P-3"]),
+            ("deps", {"P-1": [], "P-2": ["P-3"], "P-3": []}),
+        ]
+        assert result == {"project_id": 1, "project_key": "P", "issue_count": 3, "inserted": 1, "updated": 2}
+        assert users.call_args_list[1][0][1] == {"Ann"}
+        invalidate.assert_called_once_with(1)
@@ -0,0 +1,175 @@
+"""
+Tests for the CPA engine's current-sprint issue cache (local TTL tier and the shared Redis tier).
+"""
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import orjson
+import pytest
+
+from backend.tools.cpa.engine import jira as engine_jira
+
+KEY = ("current_sprint", "P", 100)
+
+
+@pytest.fixture
+def redis_client():
+    """A mock Redis client installed as the shared tier."""
+    client = MagicMock()
+    with patch.object(engine_jira, "_shared_cache", return_value=client):
+        yield client
+
+
+class TestSharedCacheGet:
+    """Reads from the shared tier never raise; anything unusable is a miss."""
+
+    def test_hit_returns_age_and_issues(self, redis_client):
+        """Test that a stored entry comes back with its age."""
+        redis_client.get.return_value = orjson.dumps({"fetched_at": time.time() - 5, "issues": [{"key": "P-1"}]})
+        age, issues = engine_jira._shared_cache_get(KEY)
+        assert 4.0 <= age <= 6.0
+        assert issues == [{"key": "P-1"}]
+        redis_client.get.assert_called_once_with("jira:current_sprint:P:100")
+
+    @pytest.mark.parametrize("raw", [
+        None,
+        b"",
+        b"{not json",
+        orjson.dumps({"issues": []}),
+        orjson.dumps({"fetched_at": time.time()}),
+        orjson.dumps({"fetched_at": "yesterday", "issues": []}),
+        orjson.dumps([1, 2, 3]),
+    ])
+    def test_missing_or_corrupt_value_is_a_miss(self, redis_client, raw):
+        """Test that a missing, undecodable or malformed value falls through to Jira."""
+        redis_client.get.return_value = raw
+        assert engine_jira._shared_cache_get(KEY) is None
+
+    def test_unreachable_redis_is_a_miss(self, redis_client):
+        """Test that a connection error falls through to Jira."""
+        redis_client.get.side_effect = ConnectionError("down")
+        assert engine_jira._shared_cache_get(KEY) is None
+
+
+@pytest.fixture
+def local_cache():
+    """Empty local tier and no shared tier; background refreshes are queued on the mock's submit calls."""
+    bg = MagicMock()
+    with patch.dict(engine_jira._JIRA_CACHE, clear=True), \
+         patch.dict(engine_jira._JIRA_FETCH_LOCKS, clear=True), \
+         patch.object(engine_jira, "_JIRA_REFRESHING", set()), \
+         patch.object(engine_jira, "_BG_EXEC", bg), \
+         patch.object(engine_jira, "_shared_cache", return_value=None):
+        yield bg
+
+
+def _run_refreshes(bg):
+    """Run the refreshes submitted so far, as the executor thread would."""
+    for call in bg.submit.call_args_list:
+        fn, *args = call.args
+        fn(*args)
+
+
+def _age(seconds):
+    """Backdate the cached entry for KEY by the given number of seconds."""
+    stamp, issues = engine_jira._JIRA_CACHE[KEY]
+    engine_jira._JIRA_CACHE[KEY] = (stamp - seconds, issues)
+
+
+class TestCachedCurrentSprintIssues:
+    """Stale-while-revalidate and per-key fetch locks."""
+
+    def test_fresh_entry_is_served_without_refresh(self, local_cache):
+        """Test that a hit younger than half the TTL touches neither Jira nor the refresher."""
+        with patch.object(engine_jira, "_jira_search_current_sprint_issues", return_value=[{"key": "P-1"}]) as fetch:
+            assert engine_jira._cached_current_sprint_issues("P", ttl_seconds=60) == [{"key": "P-1"}]
+            _age(10)
+            assert engine_jira._cached_current_sprint_issues("P", ttl_seconds=60) == [{"key": "P-1"}]
+
+        assert fetch.call_count == 1
+        local_cache.submit.assert_not_called()
+
+    def test_stale_entry_is_served_while_refreshing(self, local_cache):
+        """Test that a hit past half the TTL returns the old issues and refreshes once in the background."""
+        with patch.object(engine_jira, "_jira_search_current_sprint_issues",
+                          side_effect=[[{"key": "old"}], [{"key": "new"}]]) as fetch:
+            engine_jira._cached_current_sprint_issues("P", ttl_seconds=60)
+            _age(40)
+            assert engine_jira._cached_current_sprint_issues("P", ttl_seconds=60) == [{"key": "old"}]
+            # A second stale hit while the refresh is pending does not queue another one
+            assert engine_jira._cached_current_sprint_issues("P", ttl_seconds=60) == [{"key": "old"}]
+            _run_refreshes(local_cache)
+            assert engine_jira._cached_current_sprint_issues("P", ttl_seconds=60) == [{"key": "new"}]
+
+        assert fetch.call_count == 2
+        local_cache.submit.assert_called_once()
+        assert engine_jira._JIRA_REFRESHING == set()
+
+    def test_failed_refresh_keeps_the_stale_entry(self, local_cache):
+        """Test that a background refresh error leaves the entry in place and allows a later retry."""
+        with patch.object(engine_jira, "_jira_search_current_sprint_issues",
+                          side_effect=[[{"key": "old"}], RuntimeError("jira down")]):
+            engine_jira._cached_current_sprint_issues("P", ttl_seconds=60)
+            _age(40)
+            assert engine_jira._cached_current_sprint_issues("P", ttl_seconds=60) == [{"key": "old"}]
+            _run_refreshes(local_cache)
+
+        assert engine_jira._JIRA_CACHE[KEY][1] == [{"key": "old"}]
+        assert engine_jira._JIRA_REFRESHING == set()
+
+    def test_expired_entry_is_refetched_synchronously(self, local_cache):
+        """Test that an entry past the TTL is never served."""
+        with patch.object(engine_jira, "_jira_search_current_sprint_issues",
+                          side_effect=[[{"key": "old"}], [{"key": "new"}]]):
+            engine_jira._cached_current_sprint_issues("P", ttl_seconds=60)
+            _age(61)
+            assert engine_jira._cached_current_sprint_issues("P", ttl_seconds=60) == [{"key": "new"}]
+
+        local_cache.submit.assert_not_called()
+
+    def test_concurrent_misses_share_one_fetch(self, local_cache):
+        """Test that callers missing on the same key wait for a single Jira call."""
+        started, release = threading.Event(), threading.Event()
+        calls = []
+
+        def slow_fetch(project_key, max_results):
+            calls.append(project_key)
+            started.set()
+            release.wait(5)
+            return [{"key": "P-1"}]
+
+        results = []
+        with patch.object(engine_jira, "_jira_search_current_sprint_issues", side_effect=slow_fetch):
+            first = threading.Thread(target=lambda: results.append(engine_jira._cached_current_sprint_issues("P")))
+            first.start()
+            assert started.wait(5)
+            others = [threading.Thread(target=lambda: results.append(engine_jira._cached_current_sprint_issues("P")))
+                      for _ in range(3)]
+            for t in others:
+                t.start()
+            release.set()
+            for t in [first, *others]:
+                t.join(5)
+
+        assert calls == ["P"]
+        assert results == [[{"key": "P-1"}]] * 4
+
+    def test_evicted_key_drops_its_fetch_lock(self, local_cache):
+        """Test that the lock table never outgrows the cache."""
+        with patch.object(engine_jira, "_JIRA_CACHE_MAX_ENTRIES", 2), \
+             patch.object(engine_jira, "_jira_search_current_sprint_issues", return_value=[]):
+            for project in ("A", "B", "C", "D"):
+                engine_jira._cached_current_sprint_issues(project)
+
+        assert list(engine_jira._JIRA_CACHE) == [("current_sprint", "C", 100), ("current_sprint", "D", 100)]
+        assert set(engine_jira._JIRA_FETCH_LOCKS) <= set(engine_jira._JIRA_CACHE)
+
+    def test_failed_fetch_drops_its_fetch_lock(self, local_cache):
+        """Test that keys whose fetch fails do not accumulate locks."""
+        with patch.object(engine_jira, "_jira_search_current_sprint_issues", side_effect=RuntimeError("jira down")):
+            with pytest.raises(RuntimeError):
+                engine_jira._cached_current_sprint_issues("P")
+
+        assert engine_jira._JIRA_FETCH_LOCKS == {}
+        assert engine_jira._JIRA_CACHE == {}
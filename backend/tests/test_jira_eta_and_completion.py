@@ -4,11 +4,13 @@ We monkeypatch the CPA engine modules imported at runtime to avoid real logic an
 """
 import types
 import sys
+from functools import lru_cache
+
 import pytest
-from unittest.mock import Mock
 
-from fastapi.testclient import TestClient
-from backend.main import app
+# Invariant parts of the fake CPA results; only the issue-specific fields are built per call
+_ETA_BASE = {"optimistic_days": 3, "pessimistic_days": 7, "pessimistic_blockers": []}
+_COMPLETION_BASE = {"before": "2024-01-15", "after": "2024-01-12", "delta_days": 3}
 
 
 @pytest.fixture
@@ -17,24 +19,23 @@ def client_authenticated(authenticated_client):
     return authenticated_client
 
 
-@pytest.fixture(autouse=True)
-def inject_fake_cpa_modules(monkeypatch):
-    """Inject fake CPA engine modules so that runtime imports in endpoints resolve to mocks."""
+@pytest.fixture(scope="module", autouse=True)
+def inject_fake_cpa_modules():
+    """Inject fake CPA engine modules so that runtime imports in endpoints resolve to mocks.
+
+    The fakes are stateless, so they are installed once for this module and the
+    previous sys.modules entries are restored afterwards.
+    """
     # Fake sprint_eta module
     sprint_eta = types.ModuleType("sprint_eta")
 
     def fake_compute_eta_range_for_issue_current_sprint(project_key: str, issue_key: str):
+        schedule = [{"day": 1, "tasks": [issue_key]}]
         return {
-            "optimistic_days": 3,
-            "pessimistic_days": 7,
-            "optimistic_schedule": [
-                {"day": 1, "tasks": [issue_key]}
-            ],
-            "pessimistic_schedule": [
-                {"day": 1, "tasks": [issue_key]}
-            ],
+            **_ETA_BASE,
+            "optimistic_schedule": schedule,
+            "pessimistic_schedule": schedule,
             "optimistic_critical_path": [issue_key],
-            "pessimistic_blockers": [],
             "summary": f"ETA for {issue_key} in project {project_key}"
         }
 
@@ -43,6 +44,8 @@ def inject_fake_cpa_modules(monkeypatch):
     # Fake sprint_dependency module
     sprint_dependency = types.ModuleType("sprint_dependency")
 
+    # The endpoint only reads the graph, so one dict per project can be reused
+    @lru_cache(maxsize=8)
     def fake_current_sprint_dependency_graph(project_key: str):
         return {
             "nodes": {
@@ -53,26 +56,24 @@ def inject_fake_cpa_modules(monkeypatch):
 
     sprint_dependency.current_sprint_dependency_graph = fake_current_sprint_dependency_graph
 
-    # Provide both import paths used in main.py try/except
-    sys.modules['tools.cpa.engine.sprint_eta'] = sprint_eta
-    sys.modules['tools.cpa.engine.sprint_dependency'] = sprint_dependency
-    sys.modules['backend.tools.cpa.engine.sprint_eta'] = sprint_eta
-    sys.modules['backend.tools.cpa.engine.sprint_dependency'] = sprint_dependency
-
     # Fake sprint_timeline for sprint-completion-if-removed
     sprint_timeline = types.ModuleType("sprint_timeline")
 
     def fake_sprint_completion_if_issue_removed(project_key: str, removed_issue_key: str):
-        return {
-            "before": "2024-01-15",
-            "after": "2024-01-12",
-            "delta_days": 3,
-            "removed": removed_issue_key,
-        }
+        return {**_COMPLETION_BASE, "removed": removed_issue_key}
 
     sprint_timeline.sprint_completion_if_issue_removed = fake_sprint_completion_if_issue_removed
-    sys.modules['tools.cpa.engine.sprint_timeline'] = sprint_timeline
-    sys.modules['backend.tools.cpa.engine.sprint_timeline'] = sprint_timeline
+
+    # Provide both import paths used in main.py try/except
+    fakes = {}
+    for prefix in ("tools.cpa.engine", "backend.tools.cpa.engine"):
+        fakes[f"{prefix}.sprint_eta"] = sprint_eta
+        fakes[f"{prefix}.sprint_dependency"] = sprint_dependency
+        fakes[f"{prefix}.sprint_timeline"] = sprint_timeline
+    with pytest.MonkeyPatch.context() as mp:
+        for name, module in fakes.items():
+            mp.setitem(sys.modules, name, module)
+        yield
 
 
 class TestJiraEtaGraphEndpoint:
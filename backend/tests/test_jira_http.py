@@ -0,0 +1,122 @@
+"""
+Tests for the CPA engine's rate-limited Jira session (429 retries and header-driven pacing).
+"""
+import time
+from email.utils import formatdate
+from unittest.mock import Mock, patch
+
+import pytest
+import requests_mock
+
+from backend.tools.cpa.engine import _jira_http
+from backend.tools.cpa.engine._jira_http import RateLimitedSession, _retry_after_seconds
+
+URL = "https://test-jira.atlassian.net/rest/api/3/search/jql"
+
+
+@pytest.fixture
+def sleeps():
+    """Record sleeps instead of waiting."""
+    with patch.object(_jira_http.time, "sleep") as sleep:
+        yield sleep
+
+
+def _resp(headers):
+    return Mock(headers=headers)
+
+
+class TestRetryAfter:
+    """Delay parsing for 429 responses."""
+
+    def test_seconds(self):
+        """Test a delta-seconds Retry-After."""
+        assert _retry_after_seconds(_resp({"Retry-After": "7"}), attempt=0) == 7.0
+
+    def test_http_date(self):
+        """Test an HTTP-date Retry-After becomes the time left until that date."""
+        delay = _retry_after_seconds(_resp({"Retry-After": formatdate(time.time() + 30, usegmt=True)}), attempt=0)
+        assert 28.0 <= delay <= 30.0
+
+    def test_http_date_in_the_past_is_zero(self):
+        """Test that a date already passed never yields a negative sleep."""
+        assert _retry_after_seconds(_resp({"Retry-After": formatdate(time.time() - 60, usegmt=True)}), attempt=0) == 0.0
+
+    @pytest.mark.parametrize("headers", [{}, {"Retry-After": "soon"}])
+    def test_missing_or_unparseable_falls_back_to_exponential(self, headers):
+        """Test the 2**attempt fallback."""
+        assert _retry_after_seconds(_resp(headers), attempt=3) == 8.0
+
+
+class TestRateLimitedSession:
+    """429 retry loop, rate tuning and construction checks."""
+
+    def test_retries_429_after_retry_after(self, sleeps):
+        """Test that 429s are retried after the server's Retry-After until a success."""
+        session = RateLimitedSession(rate_per_second=100, burst=10, max_retries=3)
+        with requests_mock.Mocker() as m:
+            m.get(URL, [
+                {"status_code": 429, "headers": {"Retry-After": "2"}},
+                {"status_code": 429, "headers": {"Retry-After": "1"}},
+                {"status_code": 200, "json": {"issues": []}},
+            ])
+            resp = session.get(URL)
+
+        assert resp.status_code == 200
+        assert m.call_count == 3
+        assert [c.args[0] for c in sleeps.call_args_list] == [2.0, 1.0]
+
+    def test_gives_up_after_max_retries(self, sleeps):
+        """Test that the last 429 is returned once the retries are spent."""
+        session = RateLimitedSession(rate_per_second=100, burst=10, max_retries=2)
+        with requests_mock.Mocker() as m:
+            m.get(URL, status_code=429, headers={"Retry-After": "0"})
+            resp = session.get(URL)
+
+        assert resp.status_code == 429
+        assert m.call_count == 3
+
+    def test_tunes_rate_from_ratelimit_headers(self, sleeps):
+        """Test that the refill rate follows x-ratelimit-fillrate / x-ratelimit-interval-seconds."""
+        session = RateLimitedSession(rate_per_second=5, burst=10, max_retries=0)
+        with requests_mock.Mocker() as m:
+            m.get(URL, status_code=200, headers={"x-ratelimit-fillrate": "10", "x-ratelimit-interval-seconds": "2"})
+            session.get(URL)
+        assert session._rate == 5.0
+
+        with requests_mock.Mocker() as m:
+            m.get(URL, status_code=200, headers={"x-ratelimit-fillrate": "30", "x-ratelimit-interval-seconds": "1"})
+            session.get(URL)
+        assert session._rate == 30.0
+
+    @pytest.mark.parametrize("headers", [
+        {"x-ratelimit-fillrate": "0", "x-ratelimit-interval-seconds": "1"},
+        {"x-ratelimit-fillrate": "10", "x-ratelimit-interval-seconds": "0"},
+        {"x-ratelimit-fillrate": "fast", "x-ratelimit-interval-seconds": "1"},
+        {"x-ratelimit-fillrate": "10"},
+    ])
+    def test_ignores_unusable_ratelimit_headers(self, sleeps, headers):
+        """Test that zero, malformed or partial headers leave the rate alone."""
+        session = RateLimitedSession(rate_per_second=5, burst=10, max_retries=0)
+        with requests_mock.Mocker() as m:
+            m.get(URL, status_code=200, headers=headers)
+            session.get(URL)
+        assert session._rate == 5
+
+    def test_waits_for_a_token_when_the_bucket_is_empty(self, sleeps):
+        """Test that an empty bucket sleeps for roughly one refill interval."""
+        session = RateLimitedSession(rate_per_second=4, burst=1, max_retries=0)
+        with requests_mock.Mocker() as m:
+            m.get(URL, status_code=200)
+            session.get(URL)
+            # Sleeping is mocked, so the bucket refills only by real elapsed time; stop after one wait
+            sleeps.side_effect = lambda s: setattr(session, "_tokens", 1.0)
+            session.get(URL)
+
+        assert sleeps.call_count == 1
+        assert 0 < sleeps.call_args.args[0] <= 0.25
+
+    @pytest.mark.parametrize("rate, burst", [(0, 10), (-1, 10), (5, 0)])
+    def test_rejects_non_positive_limits(self, rate, burst):
+        """Test that limits that would divide by zero or never refill are refused up front."""
+        with pytest.raises(ValueError):
+            RateLimitedSession(rate_per_second=rate, burst=burst, max_retries=3)
@@ -5,6 +5,8 @@ import pytest
 import asyncio
 import json
 import time
+import httpx
+import respx
 from unittest.mock import Mock, patch, AsyncMock
 from fastapi.testclient import TestClient
 from datetime import datetime, timezone, timedelta
@@ -12,7 +14,8 @@ from datetime import datetime, timezone, timedelta
 from backend.main import (
     app, create_access_token, _jwt_encode_hs256, _jwt_decode_hs256,
     _b64url_encode, _b64url_decode, _cache_get_issue_status, _cache_put_issue_status,
-    _ISSUE_STATUS_CACHE, SECRET_KEY
+    _ISSUE_STATUS_CACHE, SECRET_KEY, _normalize_comment, _COMMENT_TEXT_CACHE, _prefilter_ui,
+    _VERIFIED_TOKENS
 )
 
 
@@ -25,6 +28,14 @@ class TestJWTFunctions:
         encoded = _b64url_encode(test_data)
         decoded = _b64url_decode(encoded)
         assert decoded == test_data
+
+    @pytest.mark.parametrize("size", [0, 1, 2, 3, 4])
+    def test_b64url_roundtrip_all_padding_lengths(self, size):
+        """Unpadded input of every length mod 4 decodes back exactly."""
+        data = bytes(range(250, 250 + size))
+        encoded = _b64url_encode(data)
+        assert "=" not in encoded
+        assert _b64url_decode(encoded) == data
     
     def test_jwt_encode_decode_valid(self):
         """Test JWT encoding and decoding with valid token."""
@@ -65,6 +76,17 @@ class TestJWTFunctions:
         assert decoded["sub"] == "testuser"
         assert "exp" in decoded
 
+    def test_jwt_decode_cached_token_still_expires(self):
+        """A verified token is served from cache but its exp is re-checked."""
+        token = create_access_token({"sub": "cacheduser"})
+        assert _jwt_decode_hs256(token, SECRET_KEY) is _jwt_decode_hs256(token, SECRET_KEY)
+        _VERIFIED_TOKENS[token]["exp"] = int(time.time()) - 1
+
+        with pytest.raises(Exception) as exc_info:
+            _jwt_decode_hs256(token, SECRET_KEY)
+        assert "expired" in str(exc_info.value).lower()
+        assert token not in _VERIFIED_TOKENS
+
 
 class TestCacheFunctions:
     """Test caching functions."""
@@ -94,6 +116,47 @@ class TestCacheFunctions:
         
         result = _cache_get_issue_status("TEST-123")
         assert result is None
+        assert "TEST-123" not in _ISSUE_STATUS_CACHE
+
+    def test_cache_evicts_oldest_when_full(self):
+        """Test that the cache stays bounded by evicting the oldest entry."""
+        with patch('backend.main._ISSUE_STATUS_MAX_ENTRIES', 2):
+            _cache_put_issue_status("TEST-1", {"key": "TEST-1"})
+            _cache_put_issue_status("TEST-2", {"key": "TEST-2"})
+            _cache_put_issue_status("TEST-3", {"key": "TEST-3"})
+
+        assert len(_ISSUE_STATUS_CACHE) == 2
+        assert _cache_get_issue_status("TEST-1") is None
+        assert _cache_get_issue_status("TEST-3") == {"key": "TEST-3"}
+
+    def test_cache_evicts_least_recently_used(self):
+        """Test that a recent hit protects an entry from eviction."""
+        with patch('backend.main._ISSUE_STATUS_MAX_ENTRIES', 2):
+            _cache_put_issue_status("TEST-1", {"key": "TEST-1"})
+            _cache_put_issue_status("TEST-2", {"key": "TEST-2"})
+            assert _cache_get_issue_status("TEST-1") == {"key": "TEST-1"}
+            _cache_put_issue_status("TEST-3", {"key": "TEST-3"})
+
+        assert _cache_get_issue_status("TEST-2") is None
+        assert _cache_get_issue_status("TEST-1") == {"key": "TEST-1"}
+
+    def test_comment_text_cached_per_revision(self):
+        """Test that a comment is only flattened again when it is edited."""
+        _COMMENT_TEXT_CACHE.clear()
+        comment = {
+            "id": "10001",
+            "updated": "2024-01-01T10:00:00.000+0000",
+            "author": {"displayName": "Ann"},
+            "body": {"type": "doc", "content": [{"type": "text", "text": "hello"}]},
+        }
+        assert _normalize_comment(comment) == "Ann: hello"
+
+        with patch('backend.main._flatten_adf', side_effect=AssertionError("re-parsed")):
+            assert _normalize_comment(comment) == "Ann: hello"
+
+        edited = dict(comment, updated="2024-01-02T10:00:00.000+0000",
+                      body={"type": "doc", "content": [{"type": "text", "text": "bye"}]})
+        assert _normalize_comment(edited) == "Ann: bye"
 
 
 class TestBasicEndpoints:
@@ -244,7 +307,30 @@ class TestCodinatorAgent:
         assert response.status_code == 200
         # Should return formatted response from formatter agent
         assert isinstance(response.json(), str)
-    
+
+    @pytest.mark.asyncio
+    async def test_run_agent_json_skips_formatter(self, authenticated_client, mock_llm_calls):
+        """Test that an already-structured agent response bypasses the formatter."""
+        async def json_run_async(*args, **kwargs):
+            mock_event = Mock()
+            mock_event.is_final_response.return_value = True
+            mock_event.content = Mock()
+            mock_event.content.parts = [Mock(text=' {"ui": "jira_status", "key": "ABC-1"} ')]
+            yield mock_event
+
+        def formatter_run_async(*args, **kwargs):
+            raise AssertionError("formatter should not run")
+
+        mock_llm_calls['runner'].run_async = json_run_async
+        mock_llm_calls['formatter_runner'].run_async = formatter_run_async
+
+        response = authenticated_client.post("/codinator/run-agent", json={
+            "prompt": "Test prompt"
+        })
+
+        assert response.status_code == 200
+        assert response.json() == '{"ui": "jira_status", "key": "ABC-1"}'
+
     @pytest.mark.asyncio
     async def test_run_agent_empty_prompt(self, authenticated_client):
         """Test agent run with empty prompt."""
@@ -279,6 +365,49 @@ class TestCodinatorAgent:
         assert data["ui"] == "eta_estimate"
         assert data["issue_key"] == "ABC-123"
     
+    @pytest.mark.parametrize("prompt", [
+        "when was ABC-123 created",
+        "what is the status of the sprint",
+        "summarize ABC-123",
+        "what's the eta on the utf-8 migration?",
+        "when will the python-3 upgrade be done",
+        "status of covid-19 rollout",
+        "when ABC-1 is done, what should I pick up next?",
+    ])
+    def test_prefilter_ignores_other_prompts(self, prompt):
+        """Only single-issue status/ETA questions bypass the agents."""
+        assert _prefilter_ui(prompt) is None
+
+    @pytest.mark.parametrize("prompt, expected", [
+        ("what's the ETA for ABC-12?", {"ui": "eta_estimate", "issue_key": "ABC-12"}),
+        ("When will ABC-7 be finished?", {"ui": "eta_estimate", "issue_key": "ABC-7"}),
+        ("hey, when can I expect PROJ-3 to be done", {"ui": "eta_estimate", "issue_key": "PROJ-3"}),
+        ("Status of ABC-9", {"ui": "jira_status", "key": "ABC-9"}),
+    ])
+    def test_prefilter_matches_issue_questions(self, prompt, expected):
+        """Status and ETA questions about an uppercase issue key go straight to the UI card."""
+        assert _prefilter_ui(prompt) == expected
+
+    def test_run_agent_stream(self, authenticated_client):
+        """Test that the streaming endpoint returns the agent's text directly."""
+        response = authenticated_client.post("/codinator/run-agent/stream", json={
+            "prompt": "Test prompt"
+        })
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert response.text == "Mocked response"
+
+    def test_run_agent_stream_is_not_gzipped(self, authenticated_client):
+        """Test that the agent stream bypasses GZipMiddleware so each chunk is flushed as it arrives."""
+        response = authenticated_client.post("/codinator/run-agent/stream", json={
+            "prompt": "Test prompt"
+        }, headers={"Accept-Encoding": "gzip"})
+
+        assert response.status_code == 200
+        assert response.headers.get("content-encoding") != "gzip"
+        assert response.text == "Mocked response"
+
     def test_run_agent_unauthorized(self, client):
         """Test agent run without authentication."""
         response = client.post("/codinator/run-agent", json={
@@ -290,41 +419,215 @@ class TestCodinatorAgent:
 
 class TestJiraEndpoints:
     """Test Jira-related endpoints."""
-    
-    @patch('backend.main.requests.get')
-    def test_jira_issue_status_success(self, mock_get, authenticated_client, mock_jira_response, mock_env_vars):
+
+    JIRA = "https://test-jira.atlassian.net"
+
+    def setup_method(self):
+        """Start each test with a cold issue-status cache."""
+        _ISSUE_STATUS_CACHE.clear()
+
+    @respx.mock
+    def test_jira_issue_status_success(self, authenticated_client, mock_jira_response, mock_env_vars):
         """Test successful Jira issue status retrieval."""
-        mock_response = Mock()
-        mock_response.ok = True
-        mock_response.status_code = 200
-        mock_response.json.return_value = mock_jira_response
-        mock_get.return_value = mock_response
-        
+        respx.get(f"{self.JIRA}/rest/api/3/issue/TEST-123").mock(
+            return_value=httpx.Response(200, json=mock_jira_response)
+        )
+        comments = respx.get(f"{self.JIRA}/rest/api/3/issue/TEST-123/comment").mock(
+            return_value=httpx.Response(200, json=mock_jira_response["fields"]["comment"])
+        )
+
         response = authenticated_client.get("/jira/issue-status?key=TEST-123")
-        
+
         assert response.status_code == 200
         data = response.json()
         assert data["key"] == "TEST-123"
         assert data["name"] == "Test Issue"
         assert data["status"] == "In Progress"
-    
-    @patch('backend.main.requests.get')
-    def test_jira_issue_status_not_found(self, mock_get, authenticated_client, mock_env_vars):
+        assert data["comments"] == ["Test User: Test comment"]
+        assert comments.calls.last.request.url.params["orderBy"] == "-created"
+
+    @respx.mock
+    def test_jira_issue_status_flattens_nested_adf(self, authenticated_client, mock_env_vars):
+        """Test that rich-text comment bodies are flattened at any nesting depth."""
+        adf_body = {
+            "type": "doc",
+            "content": [
+                {"type": "paragraph", "content": [{"type": "text", "text": "Blocked on "}]},
+                {"type": "bulletList", "content": [
+                    {"type": "listItem", "content": [
+                        {"type": "paragraph", "content": [{"type": "text", "text": "API review"}]}
+                    ]}
+                ]},
+            ],
+        }
+        respx.get(f"{self.JIRA}/rest/api/3/issue/ADF-1").mock(return_value=httpx.Response(200, json={
+            "fields": {"summary": "ADF Issue", "status": {"name": "To Do"}}
+        }))
+        respx.get(f"{self.JIRA}/rest/api/3/issue/ADF-1/comment").mock(return_value=httpx.Response(200, json={
+            "comments": [{"author": {"displayName": "Ann"}, "body": adf_body}]
+        }))
+
+        response = authenticated_client.get("/jira/issue-status?key=ADF-1")
+
+        assert response.status_code == 200
+        assert response.json()["comments"] == ["Ann: Blocked on API review"]
+
+    @respx.mock(assert_all_called=False)
+    def test_jira_issue_status_served_from_shared_cache(self, authenticated_client, mock_env_vars):
+        """Test that a shared-cache hit skips Jira and refills the process cache."""
+        jira_route = respx.get(f"{self.JIRA}/rest/api/3/issue/SHARED-1")
+        shared = AsyncMock()
+        shared.get.return_value = json.dumps({"key": "SHARED-1", "status": "Done"}).encode()
+
+        with patch.object(app.state, 'redis', shared, create=True):
+            response = authenticated_client.get("/jira/issue-status?key=SHARED-1")
+
+        assert response.status_code == 200
+        assert response.json()["status"] == "Done"
+        shared.get.assert_awaited_once_with("jira:issue:SHARED-1")
+        assert not jira_route.called
+        assert _cache_get_issue_status("SHARED-1") == {"key": "SHARED-1", "status": "Done"}
+
+    @respx.mock
+    def test_jira_issue_status_not_found(self, authenticated_client, mock_env_vars):
         """Test Jira issue status with non-existent issue."""
-        mock_response = Mock()
-        mock_response.ok = False
-        mock_response.status_code = 404
-        mock_get.return_value = mock_response
-        
+        respx.get(f"{self.JIRA}/rest/api/3/issue/NONEXISTENT-123").mock(return_value=httpx.Response(404))
+        respx.get(f"{self.JIRA}/rest/api/3/issue/NONEXISTENT-123/comment").mock(return_value=httpx.Response(404))
+
         response = authenticated_client.get("/jira/issue-status?key=NONEXISTENT-123")
-        
+
         assert response.status_code == 404
-    
-    @patch('backend.main._fetch_active_sprint')
+
+    @respx.mock
+    def test_jira_issue_status_batch_uses_cache_and_single_search(self, authenticated_client, mock_env_vars):
+        """Test batch issue status: cached keys are reused, the rest share one JQL search."""
+        _cache_put_issue_status("BATCH-1", {"key": "BATCH-1", "status": "Done"})
+        search = respx.post(f"{self.JIRA}/rest/api/3/search/jql").mock(return_value=httpx.Response(200, json={
+            "issues": [{"key": "BATCH-2", "fields": {"summary": "Second", "status": {"name": "To Do"}}}]
+        }))
+        comments = respx.get(f"{self.JIRA}/rest/api/3/issue/BATCH-2/comment").mock(return_value=httpx.Response(200, json={
+            "comments": [{"author": {"displayName": "Ann"}, "body": "On it"}]
+        }))
+
+        response = authenticated_client.get("/jira/issue-status/batch?keys=BATCH-1,batch-2&keys=BATCH-2")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert [i["key"] for i in data["issues"]] == ["BATCH-1", "BATCH-2"]
+        assert data["notFound"] == []
+        assert search.call_count == 1
+        sent = json.loads(search.calls.last.request.content)
+        assert sent["jql"] == "issuekey in (BATCH-2)"
+        assert "comment" not in sent["fields"]
+        assert "validateQuery" not in sent
+        assert comments.call_count == 1
+        assert data["issues"][1]["comments"] == ["Ann: On it"]
+
+    @respx.mock
+    def test_jira_issue_status_batch_drops_keys_jira_rejects(self, authenticated_client, mock_env_vars):
+        """Test that a 400 naming an unknown key retries the search without it and reports it in notFound."""
+        search = respx.post(f"{self.JIRA}/rest/api/3/search/jql").mock(side_effect=[
+            httpx.Response(400, json={
+                "errorMessages": ["An issue with key 'GONE-9' does not exist for field 'issuekey'."],
+                "warningMessages": [],
+            }),
+            httpx.Response(200, json={"issues": [
+                {"key": "REAL-1", "fields": {"summary": "One", "status": {"name": "Done"}}},
+                {"key": "REAL-2", "fields": {"summary": "Two", "status": {"name": "To Do"}}},
+            ]}),
+        ])
+        respx.get(url__regex=rf"{self.JIRA}/rest/api/3/issue/REAL-\d/comment").mock(
+            return_value=httpx.Response(200, json={"comments": []})
+        )
+
+        response = authenticated_client.get("/jira/issue-status/batch?keys=REAL-1,GONE-9,REAL-2")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert [i["key"] for i in data["issues"]] == ["REAL-1", "REAL-2"]
+        assert data["notFound"] == ["GONE-9"]
+        assert search.call_count == 2
+        assert json.loads(search.calls[0].request.content)["jql"] == "issuekey in (REAL-1,GONE-9,REAL-2)"
+        assert json.loads(search.calls[1].request.content)["jql"] == "issuekey in (REAL-1,REAL-2)"
+
+    @respx.mock
+    def test_jira_issue_status_batch_falls_back_to_single_gets(self, authenticated_client, mock_env_vars):
+        """Test that a 400 naming no key falls back to one GET per issue, with 404s in notFound."""
+        search = respx.post(f"{self.JIRA}/rest/api/3/search/jql").mock(return_value=httpx.Response(400, json={
+            "errorMessages": ["Error in the JQL Query: unexpected token."],
+        }))
+        respx.get(f"{self.JIRA}/rest/api/3/issue/ONE-1").mock(return_value=httpx.Response(200, json={
+            "key": "ONE-1", "fields": {"summary": "One", "status": {"name": "Done"}},
+        }))
+        respx.get(f"{self.JIRA}/rest/api/3/issue/ONE-2").mock(return_value=httpx.Response(404))
+        respx.get(f"{self.JIRA}/rest/api/3/issue/ONE-1/comment").mock(return_value=httpx.Response(200, json={"comments": []}))
+
+        response = authenticated_client.get("/jira/issue-status/batch?keys=ONE-1,ONE-2")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert [i["key"] for i in data["issues"]] == ["ONE-1"]
+        assert data["issues"][0]["status"] == "Done"
+        assert data["notFound"] == ["ONE-2"]
+        assert search.call_count == 1
+
+    @respx.mock
+    def test_jira_issue_status_batch_tolerates_comment_failure(self, authenticated_client, mock_env_vars):
+        """Test that one issue's failed comment page leaves it comment-less and uncached, not a failed batch."""
+        respx.post(f"{self.JIRA}/rest/api/3/search/jql").mock(return_value=httpx.Response(200, json={
+            "issues": [
+                {"key": "OK-1", "fields": {"summary": "Fine", "status": {"name": "Done"}}},
+                {"key": "BAD-1", "fields": {"summary": "Broken", "status": {"name": "To Do"}}},
+            ]
+        }))
+        respx.get(f"{self.JIRA}/rest/api/3/issue/OK-1/comment").mock(return_value=httpx.Response(200, json={
+            "comments": [{"author": {"displayName": "Ann"}, "body": "Shipped"}]
+        }))
+        respx.get(f"{self.JIRA}/rest/api/3/issue/BAD-1/comment").mock(return_value=httpx.Response(500))
+
+        response = authenticated_client.get("/jira/issue-status/batch?keys=OK-1,BAD-1")
+
+        assert response.status_code == 200
+        issues = {i["key"]: i for i in response.json()["issues"]}
+        assert issues["OK-1"]["comments"] == ["Ann: Shipped"]
+        assert issues["BAD-1"]["status"] == "To Do"
+        assert issues["BAD-1"]["comments"] == []
+        assert _cache_get_issue_status("OK-1") is not None
+        assert _cache_get_issue_status("BAD-1") is None
+
+    @respx.mock
+    def test_jira_issue_status_batch_caps_comment_fan_out(self, authenticated_client, mock_env_vars):
+        """Test that comment pages are fetched at most JIRA_COMMENT_FETCH_CONCURRENCY at a time."""
+        keys = [f"FAN-{n}" for n in range(1, 7)]
+        respx.post(f"{self.JIRA}/rest/api/3/search/jql").mock(return_value=httpx.Response(200, json={
+            "issues": [{"key": k, "fields": {"summary": k}} for k in keys]
+        }))
+        in_flight = peak = 0
+
+        async def slow_comments(client, jira_server, key):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return []
+
+        with patch('backend.main.config.JIRA_COMMENT_FETCH_CONCURRENCY', 2), \
+             patch('backend.main._fetch_latest_comments', slow_comments):
+            response = authenticated_client.get(f"/jira/issue-status/batch?keys={','.join(keys)}")
+
+        assert response.status_code == 200
+        assert len(response.json()["issues"]) == 6
+        assert peak == 2
+
+    def test_jira_issue_status_batch_rejects_invalid_key(self, authenticated_client, mock_env_vars):
+        """Test that keys which are not plain issue keys never reach JQL."""
+        response = authenticated_client.get("/jira/issue-status/batch?keys=ABC-1) OR (project=X")
+        assert response.status_code == 422
+
     @patch('backend.main._fetch_issues_in_active_sprint')
-    def test_jira_sprint_status_success(self, mock_fetch_issues, mock_fetch_sprint, authenticated_client, mock_env_vars):
-        """Test successful Jira sprint status retrieval."""
-        mock_fetch_sprint.return_value = {"name": "Test Sprint"}
+    def test_jira_sprint_status_success(self, mock_fetch_issues, authenticated_client, mock_env_vars):
+        """Test successful Jira sprint status retrieval from a single sprint-issues fetch."""
         mock_fetch_issues.return_value = (
             {
                 "sprint": {
@@ -348,7 +651,33 @@ class TestJiraEndpoints:
         assert data["name"] == "Test Sprint"
         assert data["totalIssues"] == 3
         assert data["completedIssues"] == 2
-    
+        assert response.headers["cache-control"] == "private, max-age=30"
+        mock_fetch_issues.assert_called_once_with("TEST")
+
+    @patch('backend.main._fetch_issues_in_active_sprint')
+    def test_jira_sprint_status_no_active_sprint(self, mock_fetch_issues, authenticated_client, mock_env_vars):
+        """Test that a project without an active sprint is a 404."""
+        mock_fetch_issues.return_value = ("No active sprint found for project TEST", None)
+
+        response = authenticated_client.get("/jira/sprint-status?project_key=TEST")
+
+        assert response.status_code == 404
+        assert "No active sprint" in response.json()["detail"]
+
+    @patch('backend.main._fetch_issues_in_active_sprint')
+    def test_jira_sprint_status_served_from_shared_cache(self, mock_fetch_issues, authenticated_client, mock_env_vars):
+        """Test that a cached sprint status skips Jira."""
+        shared = AsyncMock()
+        shared.get.return_value = json.dumps({"name": "Cached Sprint", "totalIssues": 4}).encode()
+
+        with patch.object(app.state, 'redis', shared, create=True):
+            response = authenticated_client.get("/jira/sprint-status?project_key=TEST")
+
+        assert response.status_code == 200
+        assert response.json()["name"] == "Cached Sprint"
+        shared.get.assert_awaited_once_with("jira:sprint:TEST")
+        mock_fetch_issues.assert_not_called()
+
     def test_jira_base_url_success(self, authenticated_client, mock_env_vars):
         """Test Jira base URL endpoint."""
         response = authenticated_client.get("/jira/base-url")
@@ -357,16 +686,17 @@ class TestJiraEndpoints:
         data = response.json()
         assert data["base"] == "https://test-jira.atlassian.net"
     
-    def test_jira_endpoints_unauthorized(self, client):
+    @pytest.mark.asyncio
+    async def test_jira_endpoints_unauthorized(self, aclient):
         """Test Jira endpoints without authentication."""
         endpoints = [
             "/jira/issue-status?key=TEST-123",
             "/jira/sprint-status?project_key=TEST",
             "/jira/base-url"
         ]
-        
-        for endpoint in endpoints:
-            response = client.get(endpoint)
+
+        responses = await asyncio.gather(*(aclient.get(endpoint) for endpoint in endpoints))
+        for response in responses:
             assert response.status_code == 401
 
 
@@ -1,7 +1,9 @@
 from .cpa import (
     run_cpa,
+    invalidate_cpa_cache,
     get_critical_path,
     get_task_slack,
+    get_task_slack_bulk,
     get_project_duration,
     get_issue_finish_bounds,
     summarize_current_sprint_cpa,
@@ -30,8 +32,10 @@ __all__ = [
     "refresh_from_jira",
     "refresh_sprint_from_jira",
     "run_cpa",
+    "invalidate_cpa_cache",
     "get_critical_path",
     "get_task_slack",
+    "get_task_slack_bulk",
     "get_project_duration",
     "get_issue_finish_bounds",
     "summarize_current_sprint_cpa",
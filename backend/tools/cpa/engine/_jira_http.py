@@ -0,0 +1,101 @@
+"""Shared, rate-limited HTTP session for the CPA engine's Jira calls."""
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    from backend import config
+except ModuleNotFoundError:
+    import config
+
+
+def _retry_after_seconds(resp: requests.Response, attempt: int) -> float:
+    """Seconds to wait before retrying a 429: Retry-After (seconds or HTTP date), else exponential."""
+    value = resp.headers.get("Retry-After")
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+    return float(2 ** attempt)
+
+
+class RateLimitedSession(requests.Session):
+    """requests.Session that paces requests with a token bucket shared by all threads and
+    retries 429 responses after Retry-After. The refill rate follows Jira's
+    x-ratelimit-fillrate / x-ratelimit-interval-seconds headers when they are present.
+    """
+
+    def __init__(self, rate_per_second: float, burst: int, max_retries: int):
+        # A zero rate would divide by zero in _acquire, and a bucket smaller than one token never fills
+        if rate_per_second <= 0:
+            raise ValueError(f"JIRA_RATE_LIMIT_PER_SECOND must be positive, got {rate_per_second}")
+        if burst < 1:
+            raise ValueError(f"JIRA_RATE_LIMIT_BURST must be at least 1, got {burst}")
+        super().__init__()
+        self._lock = threading.Lock()
+        self._rate = rate_per_second
+        self._capacity = float(burst)
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._max_retries = max_retries
+
+    def _acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+                self._updated = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                wait = (1.0 - self._tokens) / self._rate
+            time.sleep(wait)
+
+    def _tune(self, resp: requests.Response) -> None:
+        fill = resp.headers.get("x-ratelimit-fillrate")
+        interval = resp.headers.get("x-ratelimit-interval-seconds")
+        if not (fill and interval):
+            return
+        try:
+            rate = float(fill) / float(interval)
+        except (ValueError, ZeroDivisionError):
+            return
+        if rate > 0:
+            with self._lock:
+                self._rate = rate
+
+    def send(self, request, **kwargs):
+        attempt = 0
+        while True:
+            self._acquire()
+            resp = super().send(request, **kwargs)
+            self._tune(resp)
+            if resp.status_code != 429 or attempt >= self._max_retries:
+                return resp
+            delay = _retry_after_seconds(resp, attempt)
+            resp.close()
+            time.sleep(delay)
+            attempt += 1
+
+
+def _new_session() -> RateLimitedSession:
+    session = RateLimitedSession(
+        config.JIRA_RATE_LIMIT_PER_SECOND,
+        config.JIRA_RATE_LIMIT_BURST,
+        config.JIRA_RATE_LIMIT_MAX_RETRIES,
+    )
+    # Enough pooled connections for the concurrent page fetches
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+SESSION = _new_session()
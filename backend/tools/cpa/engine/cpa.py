@@ -1,7 +1,19 @@
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, List, NamedTuple, Tuple, Optional
+from collections import deque
+from itertools import chain
 import heapq
 import math
+import time
+import numpy as np
 from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+try:
+    from numba import njit as _numba_njit
+    _njit = _numba_njit(cache=True)
+except ImportError:  # optional: the kernels below also run as plain Python
+    def _njit(fn):
+        return fn
 
 try:
     # When running inside backend/ (e.g., uvicorn main:app)
@@ -14,206 +26,431 @@ except ModuleNotFoundError:
     from backend.app.db.db_loader import load_project_from_db
     from backend.app.db.models import ProjectModel
 
-from .jira import refresh_from_jira
+from .jira import _issue_key_number, refresh_from_jira, refresh_sprint_from_jira
 
 # ------------------------------
 # CPA computation
 # ------------------------------
 
-def _topo_sort(nodes: List[str], edges: Dict[str, List[str]]) -> List[str]:
-    from collections import deque, defaultdict
-    indeg = {u: 0 for u in nodes}
-    for u in nodes:
-        for v in edges.get(u, []):
-            if v in indeg:
-                indeg[v] += 1
-    q = deque([u for u, d in indeg.items() if d == 0])
-    order: List[str] = []
+class _TaskGraph(NamedTuple):
+    """Integer-indexed (structure-of-arrays) view of a project's task graph.
+    Tasks are numbered 0..N-1 in project order; edges are stored CSR-style.
+    """
+    idx2id: List[str]
+    dur: np.ndarray            # float64, non-negative duration in days
+    assignee_idx: np.ndarray   # int32 index into users
+    users: List[Optional[str]]
+    succ_indptr: np.ndarray    # successors of i: succ_indices[succ_indptr[i]:succ_indptr[i + 1]]
+    succ_indices: np.ndarray
+    preds_indptr: np.ndarray
+    preds_indices: np.ndarray
+
+
+def _to_csr(adj: List[List[int]]) -> Tuple[np.ndarray, np.ndarray]:
+    indptr = np.zeros(len(adj) + 1, dtype=np.int64)
+    np.cumsum(np.fromiter((len(a) for a in adj), dtype=np.int64, count=len(adj)), out=indptr[1:])
+    indices = np.fromiter(chain.from_iterable(adj), dtype=np.int32, count=int(indptr[-1]))
+    return indptr, indices
+
+
+def _index_tasks(project: ProjectModel) -> _TaskGraph:
+    """Build the integer-indexed task graph (durations, assignees, successors, predecessors)."""
+    tasks = project.tasks
+    idx2id = [t.id for t in tasks]
+    id2idx = {tid: i for i, tid in enumerate(idx2id)}
+    n = len(idx2id)
+    dur = np.fromiter((max(0.0, float(t.estimate_days or 0.0)) for t in tasks), dtype=np.float64, count=n)
+    users: List[Optional[str]] = []
+    user_idx: Dict[Optional[str], int] = {}
+    assignee_idx = np.empty(n, dtype=np.int32)
+    succ: List[List[int]] = [[] for _ in range(n)]
+    preds: List[List[int]] = [[] for _ in range(n)]
+    for i, t in enumerate(tasks):
+        user = getattr(t, "assignee", None)
+        k = user_idx.get(user)
+        if k is None:
+            k = user_idx[user] = len(users)
+            users.append(user)
+        assignee_idx[i] = k
+        for d in (t.dependencies or []):
+            j = id2idx.get(d)
+            if j is not None:
+                succ[j].append(i)
+                preds[i].append(j)
+    succ_indptr, succ_indices = _to_csr(succ)
+    preds_indptr, preds_indices = _to_csr(preds)
+    return _TaskGraph(idx2id, dur, assignee_idx, users, succ_indptr, succ_indices, preds_indptr, preds_indices)
+
+
+def _topo_sort(n: int, succ_indptr: np.ndarray, succ_indices: np.ndarray) -> List[int]:
+    """Kahn's algorithm over CSR successors; falls back to index order on a cycle."""
+    indeg = np.bincount(succ_indices, minlength=n).tolist()
+    indptr = succ_indptr.tolist()
+    indices = succ_indices.tolist()
+    q = deque(i for i in range(n) if indeg[i] == 0)
+    order: List[int] = []
     while q:
         u = q.popleft()
         order.append(u)
-        for v in edges.get(u, []):
-            if v in indeg:
-                indeg[v] -= 1
-                if indeg[v] == 0:
-                    q.append(v)
-    if len(order) != len(nodes):
+        for v in indices[indptr[u]:indptr[u + 1]]:
+            indeg[v] -= 1
+            if indeg[v] == 0:
+                q.append(v)
+    if len(order) != n:
         # Cycle detected; fall back to input order
-        return nodes[:]
+        return list(range(n))
     return order
 
-def _build_graph_with_assignees(project: ProjectModel) -> Tuple[
-    List[str], Dict[str, List[str]], Dict[str, float], Dict[str, List[str]], Dict[str, Optional[str]]
-]:
-    """Build DAG from DB project with durations (days), successors, predecessors and assignee per node."""
-    nodes = [t.id for t in project.tasks]
-    succ: Dict[str, List[str]] = {t.id: [] for t in project.tasks}
-    preds: Dict[str, List[str]] = {t.id: [] for t in project.tasks}
-    dur: Dict[str, float] = {t.id: max(0.0, float(t.estimate_days or 0.0)) for t in project.tasks}
-    assignee: Dict[str, Optional[str]] = {t.id: getattr(t, "assignee", None) for t in project.tasks}
-    for t in project.tasks:
-        for d in (t.dependencies or []):
-            if d in succ:
-                succ.setdefault(d, []).append(t.id)
-                preds[t.id].append(d)
-    return nodes, succ, dur, preds, assignee
-
 
-def _run_pert_rcpsp_calc(project: ProjectModel) -> dict:
-    """Run PERT and extend with RCPSP (single capacity per assignee).
-    Returns per-task metrics including both plain PERT and resource-constrained times.
+@_njit
+def _plain_pert(dur, succ_indptr, succ_indices, preds_indptr, preds_indices, order):
+    """Plain PERT forward/backward passes over CSR slices. Returns (ES, EF, LS, LF)."""
+    n = dur.shape[0]
+    ES = np.zeros(n)
+    EF = dur.copy()
+    for j in range(n):
+        u = order[j]
+        lo, hi = preds_indptr[u], preds_indptr[u + 1]
+        if hi > lo:
+            ES[u] = EF[preds_indices[lo:hi]].max()
+        EF[u] = ES[u] + dur[u]
+    makespan = EF.max() if n > 0 else 0.0
+
+    LF = np.full(n, makespan)
+    LS = makespan - dur
+    for j in range(n - 1, -1, -1):
+        u = order[j]
+        lo, hi = succ_indptr[u], succ_indptr[u + 1]
+        if hi > lo:
+            LF[u] = LS[succ_indices[lo:hi]].min()
+            LS[u] = LF[u] - dur[u]
+    return ES, EF, LS, LF
+
+
+@_njit
+def _push_finish_event(times, slot_of, buckets, ft, r):
+    """Record that the task ranked r finishes at ft. Each distinct finish time is one heap entry;
+    tasks finishing together share a bucket (a min-heap of ranks).
     """
-    nodes, succ, dur, preds, assignee = _build_graph_with_assignees(project)
-    order = _topo_sort(nodes, succ)
-
-    # 1) Plain PERT (dependencies only)
-    ES0: Dict[str, float] = {u: 0.0 for u in nodes}
-    EF0: Dict[str, float] = {u: max(0.0, dur[u]) for u in nodes}
-    for u in order:
-        if preds[u]:
-            ES0[u] = max(EF0[p] for p in preds[u])
-        EF0[u] = ES0[u] + max(0.0, dur[u])
-    makespan0 = max((EF0[u] for u in nodes), default=0.0)
-
-    LF0: Dict[str, float] = {u: makespan0 for u in nodes}
-    LS0: Dict[str, float] = {u: makespan0 - max(0.0, dur[u]) for u in nodes}
-    for u in reversed(order):
-        if succ.get(u):
-            LF0[u] = min(LS0[v] for v in succ[u])
-            LS0[u] = LF0[u] - max(0.0, dur[u])
-    slack0: Dict[str, float] = {u: max(0.0, LS0[u] - ES0[u]) for u in nodes}
-
-    # 2) RCPSP forward pass (dependencies + single-unit capacity per assignee)
-    indeg: Dict[str, int] = {k: 0 for k in nodes}
-    for v in nodes:
-        for p in preds[v]:
-            if p in indeg:
-                indeg[v] += 1
-    ready: List[str] = [k for k, d in indeg.items() if d == 0]
-    # deterministic by numeric suffix then id
-    def _issue_key_number(k: Optional[str]) -> int:
-        try:
-            if not k or '-' not in k:
-                return 0
-            return int(k.rsplit('-', 1)[1])
-        except Exception:
-            return 0
-    ready.sort(key=lambda x: (_issue_key_number(x), x))
-
-    ES: Dict[str, float] = {u: 0.0 for u in nodes}
-    EF: Dict[str, float] = {u: 0.0 for u in nodes}
-    next_free: Dict[Optional[str], float] = {}
-    deps_finish: Dict[str, float] = {u: 0.0 for u in nodes}
-
-    # Min-heap of (finish_time, node)
-    heap: List[Tuple[float, str]] = []
-
-    def try_schedule(u: str, current_time: float):
-        user = assignee.get(u)
-        start_u = max(current_time, next_free.get(user, 0.0), deps_finish.get(u, 0.0))
+    slot = slot_of.get(ft, -1)
+    if slot >= 0:
+        heapq.heappush(buckets[slot], r)
+    else:
+        slot_of[ft] = len(buckets)
+        buckets.append([r])
+        heapq.heappush(times, ft)
+
+
+@_njit
+def _forward_rcpsp(dur, user_of, n_users, succ_indptr, succ_indices, indeg, ready, rank, by_rank):
+    """RCPSP forward pass: list scheduling by dependency release with one task at a time per assignee.
+    Finish events are swept in (time, rank) order. Returns (ES, EF); tasks never released (cycles) keep 0.0.
+    """
+    n = dur.shape[0]
+    ES = np.zeros(n)
+    EF = np.zeros(n)
+    next_free = np.zeros(n_users)
+    deps_finish = np.zeros(n)
+    indeg = indeg.copy()
+    # Seeded and drained so their element types are known
+    times = [0.0]
+    times.pop()
+    slot_of = {0.0: 0}
+    slot_of.pop(0.0)
+    buckets = [[0]]
+    buckets.pop()
+    for i in range(ready.shape[0]):
+        u = ready[i]
+        user = user_of[u]
+        start_u = max(next_free[user], deps_finish[u])
         ES[u] = start_u
-        d = max(0.0, float(dur[u]))
-        EF[u] = start_u + d
+        EF[u] = start_u + dur[u]
         next_free[user] = EF[u]
-        heapq.heappush(heap, (EF[u], u))
-
-    # Initially schedule all indegree-0 tasks
-    current_time = 0.0
-    for u in ready:
-        try_schedule(u, current_time)
-
-    scheduled = set(ready)
-    while heap:
-        ft, done = heapq.heappop(heap)
-        current_time = ft
-        for v in succ.get(done, []):
-            deps_finish[v] = max(deps_finish.get(v, 0.0), ft)
+        _push_finish_event(times, slot_of, buckets, EF[u], rank[u])
+    while len(times) > 0:
+        ft = times[0]
+        bucket = buckets[slot_of[ft]]
+        done = by_rank[heapq.heappop(bucket)]
+        if len(bucket) == 0:
+            heapq.heappop(times)
+            slot_of.pop(ft)
+        for k in range(succ_indptr[done], succ_indptr[done + 1]):
+            v = succ_indices[k]
+            if ft > deps_finish[v]:
+                deps_finish[v] = ft
             indeg[v] -= 1
             if indeg[v] == 0:
-                try_schedule(v, current_time)
-                scheduled.add(v)
-
-    makespan = max((EF[u] for u in nodes), default=0.0)
-
-    # 3) RCPSP backward pass (approximate). Respect precedence and resource capacity backwards.
-    LF: Dict[str, float] = {u: makespan for u in nodes}
-    LS: Dict[str, float] = {u: makespan - max(0.0, dur[u]) for u in nodes}
-
+                user = user_of[v]
+                start_v = max(ft, next_free[user], deps_finish[v])
+                ES[v] = start_v
+                EF[v] = start_v + dur[v]
+                next_free[user] = EF[v]
+                _push_finish_event(times, slot_of, buckets, EF[v], rank[v])
+    return ES, EF
+
+
+@_njit
+def _backward_rcpsp(dur, user_of, n_users, succ_indptr, succ_indices, order, EF, makespan, passes):
+    """RCPSP backward pass (approximate): precedence-based latest times, then a few passes
+    pushing each assignee's tasks earlier so they do not overlap. Returns (LF, LS).
+    """
+    n = dur.shape[0]
+    LF = np.full(n, makespan)
+    LS = makespan - dur
     # Precedence-based initialization
-    for u in reversed(order):
-        if succ.get(u):
-            LF[u] = min(LS[v] for v in succ[u])
-            LS[u] = LF[u] - max(0.0, dur[u])
-
-    # Resource feasibility adjustment: iterate per assignee from latest to earliest
-    for _ in range(3):  # a few passes to converge
-        by_user: Dict[Optional[str], List[str]] = {}
-        for u in nodes:
-            by_user.setdefault(assignee.get(u), []).append(u)
-        for user, tasks in by_user.items():
-            # Sort tasks by current LF descending (latest finishing first)
-            tasks_sorted = sorted(tasks, key=lambda k: (LF.get(k, 0.0), EF.get(k, 0.0)), reverse=True)
+    for j in range(n - 1, -1, -1):
+        u = order[j]
+        lo, hi = succ_indptr[u], succ_indptr[u + 1]
+        if hi > lo:
+            lf = LS[succ_indices[lo]]
+            for k in range(lo + 1, hi):
+                lf = min(lf, LS[succ_indices[k]])
+            LF[u] = lf
+            LS[u] = lf - dur[u]
+
+    # Tasks grouped per assignee, each group in index order
+    by_user = np.argsort(user_of, kind="mergesort")
+    starts = np.searchsorted(user_of[by_user], np.arange(n_users + 1))
+    for _ in range(passes):  # a few passes to converge
+        changed = False
+        for user in range(n_users):
+            tasks = by_user[starts[user]:starts[user + 1]]
+            # Latest finishing first: stable sort by EF then by LF, both descending
+            tasks = tasks[np.argsort(-EF[tasks], kind="mergesort")]
+            tasks = tasks[np.argsort(-LF[tasks], kind="mergesort")]
             latest_free = makespan
-            for u in tasks_sorted:
-                # Resource-imposed latest finish
-                lf_res = latest_free
-                # Precedence-imposed latest finish
-                lf_pred = LF.get(u, makespan)
-                new_lf = min(lf_res, lf_pred)
-                new_ls = new_lf - max(0.0, dur[u])
+            for u in tasks:
+                # Resource-imposed latest finish vs precedence-imposed latest finish
+                new_lf = min(latest_free, LF[u])
+                new_ls = new_lf - dur[u]
                 if new_lf < LF[u] or new_ls < LS[u]:
                     LF[u] = new_lf
                     LS[u] = new_ls
+                    changed = True
                 latest_free = LS[u]
+        if not changed:
+            # A pass with no updates would repeat identically
+            break
+    return LF, LS
+
+
+class _Schedule(NamedTuple):
+    """Per-task CPA arrays (indexed like _TaskGraph); plain PERT arrays are None when skipped."""
+    graph: _TaskGraph
+    order: List[int]
+    makespan: float
+    ES: np.ndarray
+    EF: np.ndarray
+    LS: np.ndarray
+    LF: np.ndarray
+    slack: np.ndarray
+    crit: np.ndarray
+    ES0: Optional[np.ndarray]
+    EF0: Optional[np.ndarray]
+    LS0: Optional[np.ndarray]
+    LF0: Optional[np.ndarray]
+    slack0: Optional[np.ndarray]
+
+
+def _schedule(project: ProjectModel, compute_plain: bool = True) -> _Schedule:
+    """Run PERT and extend with RCPSP (single capacity per assignee), returning the raw arrays."""
+    g = _index_tasks(project)
+    ids = g.idx2id
+    n = len(ids)
+    order = _topo_sort(n, g.succ_indptr, g.succ_indices)
+    order_a = np.array(order, dtype=np.int64)
+
+    # 1) Plain PERT (dependencies only); reference values, skipped when not requested
+    ES0 = EF0 = LS0 = LF0 = slack0 = None
+    if compute_plain:
+        ES0, EF0, LS0, LF0 = _plain_pert(
+            g.dur, g.succ_indptr, g.succ_indices, g.preds_indptr, g.preds_indices, order_a
+        )
+        slack0 = np.maximum(0.0, LS0 - ES0)
 
-    slack: Dict[str, float] = {u: max(0.0, LS[u] - ES[u]) for u in nodes}
+    # 2) RCPSP forward pass (dependencies + single-unit capacity per assignee)
+    indeg = np.diff(g.preds_indptr)
+    # deterministic by numeric suffix then id
+    ready = np.array(
+        sorted(np.flatnonzero(indeg == 0).tolist(), key=lambda u: (_issue_key_number(ids[u]), ids[u])),
+        dtype=np.int64,
+    )
+    # Heap entries break finish-time ties by task id; rank[u] orders like ids[u]
+    by_rank = np.array(sorted(range(n), key=ids.__getitem__), dtype=np.int64)
+    rank = np.empty(n, dtype=np.int64)
+    rank[by_rank] = np.arange(n, dtype=np.int64)
+    ES, EF = _forward_rcpsp(
+        g.dur, g.assignee_idx, len(g.users), g.succ_indptr, g.succ_indices, indeg, ready, rank, by_rank
+    )
+    makespan = float(EF.max()) if n else 0.0
 
-    crit_set = {u for u in nodes if abs(slack[u]) < 1e-9}
-    # Order tasks for output: use original topological order
-    tasks_out = []
-    for u in order:
-        tasks_out.append({
-            "id": u,
-            "assignee": assignee.get(u),
-            "duration": dur[u],
+    # 3) RCPSP backward pass (approximate). Respect precedence and resource capacity backwards.
+    LF, LS = _backward_rcpsp(
+        g.dur, g.assignee_idx, len(g.users), g.succ_indptr, g.succ_indices,
+        order_a, EF, makespan, 3,
+    )
+
+    slack = np.maximum(0.0, LS - ES)
+    crit = np.abs(slack) < 1e-9
+    return _Schedule(g, order, makespan, ES, EF, LS, LF, slack, crit, ES0, EF0, LS0, LF0, slack0)
+
+
+def _task_rows(sched: _Schedule, nodes: List[int]) -> List[dict]:
+    """Build output task dicts for the given node indices, in that order."""
+    g = sched.graph
+    # Convert just the selected entries: NumPy scalar access is slower than list access
+    sel = np.array(nodes, dtype=np.int64)
+    dur = g.dur[sel].tolist()
+    users = [g.users[k] for k in g.assignee_idx[sel].tolist()]
+    ES, EF, LS, LF = sched.ES[sel].tolist(), sched.EF[sel].tolist(), sched.LS[sel].tolist(), sched.LF[sel].tolist()
+    slack = sched.slack[sel].tolist()
+    crit = sched.crit[sel].tolist()
+    compute_plain = sched.ES0 is not None
+    if compute_plain:
+        ES0, EF0 = sched.ES0[sel].tolist(), sched.EF0[sel].tolist()
+        LS0, LF0 = sched.LS0[sel].tolist(), sched.LF0[sel].tolist()
+        slack0 = sched.slack0[sel].tolist()
+
+    rows = []
+    for i, u in enumerate(nodes):
+        t = {
+            "id": g.idx2id[u],
+            "assignee": users[i],
+            "duration": dur[i],
             # resource-constrained
-            "ES": ES[u],
-            "EF": EF[u],
-            "LS": LS[u],
-            "LF": LF[u],
-            "slack": slack[u],
+            "ES": ES[i],
+            "EF": EF[i],
+            "LS": LS[i],
+            "LF": LF[i],
+            "slack": slack[i],
+        }
+        if compute_plain:
             # plain PERT for reference
-            "ES_plain": ES0[u],
-            "EF_plain": EF0[u],
-            "LS_plain": LS0[u],
-            "LF_plain": LF0[u],
-            "slack_plain": slack0[u],
-            "isCritical": u in crit_set,
-        })
+            t["ES_plain"] = ES0[i]
+            t["EF_plain"] = EF0[i]
+            t["LS_plain"] = LS0[i]
+            t["LF_plain"] = LF0[i]
+            t["slack_plain"] = slack0[i]
+        t["isCritical"] = crit[i]
+        rows.append(t)
+    return rows
+
+
+def _critical_path_ids(sched: _Schedule) -> List[str]:
+    ids = sched.graph.idx2id
+    crit = sched.crit.tolist()
+    return [ids[u] for u in sched.order if crit[u]]
+
+
+def _run_pert_rcpsp_calc(project: ProjectModel, compute_plain: bool = True) -> dict:
+    """Run PERT and extend with RCPSP (single capacity per assignee).
+    Returns per-task metrics: resource-constrained times, plus plain PERT times (*_plain)
+    when compute_plain is set.
+    """
+    sched = _schedule(project, compute_plain)
+    return {
+        "project_duration": sched.makespan,
+        # Order tasks for output: use original topological order
+        "tasks": _task_rows(sched, sched.order),
+        "critical_path": _critical_path_ids(sched),
+    }
+
 
+def _run_pert_rcpsp_summary(project: ProjectModel, sample_size: int = 5) -> dict:
+    """Like _run_pert_rcpsp_calc but only builds task dicts for the first sample_size tasks."""
+    sched = _schedule(project)
     return {
-        "project_duration": makespan,
-        "tasks": tasks_out,
-        "critical_path": [u for u in order if u in crit_set],
+        "tasks_count": len(sched.order),
+        "critical_count": int(sched.crit.sum()),
+        "project_duration": sched.makespan,
+        "critical_path": _critical_path_ids(sched),
+        "sample": _task_rows(sched, sched.order[:sample_size]),
     }
 
 
+# ------------------------------
+# Per-project result cache (TTL): chat turns often ask several CPA questions in a row
+# ------------------------------
+# project_id -> (timestamp, result, result includes *_plain fields)
+_CPA_RESULT_CACHE: Dict[int, Tuple[float, dict, bool]] = {}
+_CPA_TTL_SECONDS = 30.0
+_CPA_CACHE_MAX_ENTRIES = 128
+# Reverse index over cached results so single-task lookups can skip the project_id query
+_TASK_TO_PROJECT: Dict[str, int] = {}
+
+
+def _drop_cached_cpa(project_id: int) -> None:
+    entry = _CPA_RESULT_CACHE.pop(project_id, None)
+    if entry is None:
+        return
+    for t in entry[1].get("tasks", []):
+        if _TASK_TO_PROJECT.get(t["id"]) == project_id:
+            del _TASK_TO_PROJECT[t["id"]]
+
+
+def _cached_cpa(project_id: int, compute_plain: bool = False) -> Optional[dict]:
+    """Return the cached CPA result for a project if still fresh (and carrying the plain PERT
+    fields when compute_plain is set), else None.
+    """
+    entry = _CPA_RESULT_CACHE.get(project_id)
+    if entry is None:
+        return None
+    ts, cached, has_plain = entry
+    if time.monotonic() - ts >= _CPA_TTL_SECONDS:
+        _drop_cached_cpa(project_id)
+        return None
+    if compute_plain and not has_plain:
+        return None
+    return cached
+
+
+def invalidate_cpa_cache(project_id: Optional[int] = None) -> None:
+    """Drop the cached CPA result for a project (or all projects), e.g. after a Jira sync."""
+    if project_id is None:
+        _CPA_RESULT_CACHE.clear()
+        _TASK_TO_PROJECT.clear()
+    else:
+        _drop_cached_cpa(project_id)
+
+
 def run_cpa(project_id: int) -> dict:
     """Run PERT + RCPSP for a project id using DB data.
     Returns JSON with per-task metrics (resource-constrained ES/EF/LS/LF/Slack) and project duration.
     Also includes plain PERT fields (*_plain) for reference.
+    Results are reused for _CPA_TTL_SECONDS; treat the returned dict as read-only.
     """
-    db = SessionLocal()
+    return _run_cpa(project_id, compute_plain=True)
+
+
+def _run_cpa(project_id: int, compute_plain: bool = False, db: Optional[Session] = None) -> dict:
+    """run_cpa for internal callers; the plain PERT pass runs only when compute_plain is set.
+    Pass db to reuse the caller's session instead of opening one.
+    """
+    cached = _cached_cpa(project_id, compute_plain)
+    if cached is not None:
+        return cached
+
+    own_session = db is None
+    if own_session:
+        db = SessionLocal()
     try:
         project = load_project_from_db(db, project_id)
-        result = _run_pert_rcpsp_calc(project)
-        return {
-            "project_id": project_id,
-            "project_name": project.name,
-            **result,
-        }
     finally:
-        db.close()
+        if own_session:
+            db.close()
+    result = _run_pert_rcpsp_calc(project, compute_plain)
+    out = {
+        "project_id": project_id,
+        "project_name": project.name,
+        **result,
+    }
+    _drop_cached_cpa(project_id)
+    while len(_CPA_RESULT_CACHE) >= _CPA_CACHE_MAX_ENTRIES:
+        _drop_cached_cpa(next(iter(_CPA_RESULT_CACHE)))
+    _CPA_RESULT_CACHE[project_id] = (time.monotonic(), out, compute_plain)
+    for t in out["tasks"]:
+        _TASK_TO_PROJECT[t["id"]] = project_id
+    return out
 
 
 essential_keys = ["id", "ES", "EF", "LS", "LF", "slack", "duration", "isCritical"] # Essential keys for CPA
@@ -221,7 +458,7 @@ essential_keys = ["id", "ES", "EF", "LS", "LF", "slack", "duration", "isCritical
 
 def get_critical_path(project_id: int) -> dict:
     """Return ordered list of tasks on the critical path."""
-    result = run_cpa(project_id)
+    result = _run_cpa(project_id)
     return {
         "project_id": project_id,
         "critical_path": result.get("critical_path", []),
@@ -229,27 +466,80 @@ def get_critical_path(project_id: int) -> dict:
 
 
 def get_task_slack(task_id: str) -> dict:
-    """Return slack for a specific task. Determines project via task lookup."""
-    db = SessionLocal()
-    try:
-        row = db.execute(text("""
-            SELECT project_id FROM tasks WHERE id = :id
-        """), {"id": task_id}).fetchone()
-        if not row:
-            return {"task_id": task_id, "error": "task not found"}
-        project_id = int(row.project_id)
-        result = run_cpa(project_id)
-        task_map = {t["id"]: t for t in result.get("tasks", [])}
-        t = task_map.get(task_id)
-        if not t:
-            return {"task_id": task_id, "project_id": project_id, "error": "task not in project"}
-        return {"task_id": task_id, "project_id": project_id, "slack": t.get("slack", 0.0)}
-    finally:
-        db.close()
+    """Return slack for a specific task. Determines project via task lookup
+    (skipped when the task's project has a fresh cached CPA result).
+    """
+    project_id = _TASK_TO_PROJECT.get(task_id)
+    result = _cached_cpa(project_id) if project_id is not None else None
+    if result is None:
+        db = SessionLocal()
+        try:
+            row = db.execute(text("""
+                SELECT project_id FROM tasks WHERE id = :id
+            """), {"id": task_id}).fetchone()
+            if not row:
+                return {"task_id": task_id, "error": "task not found"}
+            project_id = int(row.project_id)
+            result = _run_cpa(project_id, db=db)
+        finally:
+            db.close()
+    t = next((t for t in result.get("tasks", []) if t["id"] == task_id), None)
+    if not t:
+        return {"task_id": task_id, "project_id": project_id, "error": "task not in project"}
+    return {"task_id": task_id, "project_id": project_id, "slack": t.get("slack", 0.0)}
+
+
+def get_task_slack_bulk(task_ids: List[str]) -> dict:
+    """Return slack for several tasks, running CPA once per project instead of once per task.
+    Tasks whose project has a fresh cached CPA result skip the project_id query, as in get_task_slack.
+    Output: { task_id: <same dict get_task_slack returns> }.
+    """
+    project_of: Dict[str, int] = {}
+    results: Dict[int, dict] = {}
+    unresolved = []
+    for task_id in dict.fromkeys(task_ids):
+        pid = _TASK_TO_PROJECT.get(task_id)
+        cached = results.get(pid) if pid is not None else None
+        if cached is None and pid is not None:
+            cached = _cached_cpa(pid)
+        if cached is None:
+            unresolved.append(task_id)
+        else:
+            project_of[task_id] = pid
+            results[pid] = cached
+
+    if unresolved:
+        db = SessionLocal()
+        try:
+            rows = db.execute(text("""
+                SELECT id, project_id FROM tasks WHERE id = ANY(:ids)
+            """), {"ids": unresolved}).fetchall()
+            for r in rows:
+                project_of[r.id] = int(r.project_id)
+            for pid in dict.fromkeys(int(r.project_id) for r in rows):
+                if pid not in results:
+                    results[pid] = _run_cpa(pid, db=db)
+        finally:
+            db.close()
+
+    slack_by_project = {
+        pid: {t["id"]: t.get("slack", 0.0) for t in result.get("tasks", [])}
+        for pid, result in results.items()
+    }
+    out: dict = {}
+    for task_id in task_ids:
+        pid = project_of.get(task_id)
+        if pid is None:
+            out[task_id] = {"task_id": task_id, "error": "task not found"}
+        elif task_id not in slack_by_project[pid]:
+            out[task_id] = {"task_id": task_id, "project_id": pid, "error": "task not in project"}
+        else:
+            out[task_id] = {"task_id": task_id, "project_id": pid, "slack": slack_by_project[pid][task_id]}
+    return out
 
 
 def get_project_duration(project_id: int) -> dict:
-    result = run_cpa(project_id)
+    result = _run_cpa(project_id)
     return {"project_id": project_id, "duration": result.get("project_duration", 0.0)}
 
 
@@ -257,7 +547,7 @@ def get_issue_finish_bounds(project_id: int, issue_id: str) -> dict:
     """Return resource-constrained earliest finish (EF) and latest finish (LF) for a specific issue.
     Falls back to plain PERT values if constrained ones are missing.
     """
-    res = run_cpa(project_id)
+    res = _run_cpa(project_id)
     task_map = {t.get("id"): t for t in res.get("tasks", [])}
     t = task_map.get(issue_id)
     if not t:
@@ -282,16 +572,14 @@ def summarize_current_sprint_cpa(project_key: str) -> dict:
     project_id = ref.get("project_id")
     if not project_id:
         return {"project_key": project_key, "error": "project sync failed"}
-    res = run_cpa(project_id)
-    tasks = res.get("tasks", [])
-    critical_path = res.get("critical_path", [])
-    crit_count = sum(1 for t in tasks if t.get("isCritical"))
+    # The refresh just invalidated this project's cached CPA, so compute the summary directly
+    db = SessionLocal()
+    try:
+        project = load_project_from_db(db, project_id)
+    finally:
+        db.close()
     return {
         "project_key": project_key,
         "project_id": project_id,
-        "tasks_count": len(tasks),
-        "critical_count": crit_count,
-        "project_duration": res.get("project_duration", 0.0),
-        "critical_path": critical_path,
-        "sample": tasks[:5],
+        **_run_pert_rcpsp_summary(project),
     }
@@ -1,163 +1,158 @@
-import json
-from datetime import datetime
-from typing import Optional, List
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Tuple
 
+import orjson
+from psycopg2.extras import execute_values
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
+try:
+    # When running inside backend/ (e.g., uvicorn main:app)
+    from app.db.db_loader import _tasks_colmap
+except ModuleNotFoundError:
+    # When importing as backend.* from project root
+    from backend.app.db.db_loader import _tasks_colmap
+
+# Rows per VALUES list in the batched statements
+_BULK_PAGE_SIZE = 500
+
 
 # ------------------------------
 # DB upsert helpers
 # ------------------------------
 
+# Project ids never change once committed; cached on lookup
+_PROJECT_ID_CACHE: Dict[str, int] = {}
+
+
 def _ensure_project(db: Session, name: str) -> int:
+    cached = _PROJECT_ID_CACHE.get(name)
+    if cached is not None:
+        return cached
     row = db.execute(text("""
         SELECT id FROM projects WHERE name = :name
     """), {"name": name}).fetchone()
     if row:
+        _PROJECT_ID_CACHE[name] = int(row.id)
         return int(row.id)
+    # Not cached yet: the insert may still be rolled back with the caller's transaction
     new_row = db.execute(text("""
         INSERT INTO projects (name) VALUES (:name)
         RETURNING id
     """), {"name": name}).fetchone()
-    db.commit()
     return int(new_row.id)
 
 
-def _upsert_user(db: Session, username: str) -> Optional[int]:
-    """Ensure user exists; return user id if available, else None."""
-    if not username:
+def _bulk_upsert_users(db: Session, usernames: Iterable[str]) -> Dict[str, int]:
+    """Ensure every username exists with one batched INSERT; return {username: id}.
+    Best-effort: on failure the statement is rolled back to a savepoint and the
+    affected tasks are written without an assignee.
+    """
+    names = sorted({u for u in usernames if u})
+    if not names:
+        return {}
+    cur = db.connection().connection.cursor()
+    try:
+        cur.execute("SAVEPOINT bulk_upsert_users")
+        try:
+            # Empty password and empty skills JSONB for users first seen in Jira
+            execute_values(cur, """
+                INSERT INTO users (username, hashed_password, skills)
+                VALUES %s
+                ON CONFLICT (username) DO NOTHING
+            """, [(u, "", orjson.dumps({}).decode()) for u in names], page_size=_BULK_PAGE_SIZE)
+            cur.execute("SELECT id, username FROM users WHERE username = ANY(%s)", (names,))
+            rows = cur.fetchall()
+        except Exception:
+            # Do not fail the refresh if the users table has extra constraints
+            cur.execute("ROLLBACK TO SAVEPOINT bulk_upsert_users")
+            return {}
+        cur.execute("RELEASE SAVEPOINT bulk_upsert_users")
+    finally:
+        cur.close()
+    return {username: int(user_id) for user_id, username in rows}
+
+
+def _end_date_value(end_date: Optional[str]) -> Optional[date]:
+    # Normalize Jira's ISO timestamp/date to a date if present
+    if not end_date:
         return None
     try:
-        row = db.execute(text("""
-            SELECT id FROM users WHERE username = :u
-        """), {"u": username}).fetchone()
-        if row:
-            return int(row.id)
-        # Insert with empty password and empty skills JSONB
-        new_row = db.execute(text("""
-            INSERT INTO users (username, hashed_password, skills)
-            VALUES (:u, :hp, :skills)
-            RETURNING id
-        """), {"u": username, "hp": "", "skills": json.dumps({})}).fetchone()
-        db.commit()
-        return int(new_row.id) if new_row else None
+        return datetime.fromisoformat(end_date.replace("Z", "+00:00")).date()
     except Exception:
-        # Best-effort; do not fail refresh if users table has constraints
-        db.rollback()
         return None
 
 
-def _task_table_columns(db: Session) -> dict:
-    """Return mapping of column_name -> data_type for 'tasks' table."""
-    rows = db.execute(text("""
-        SELECT column_name, data_type
-        FROM information_schema.columns
-        WHERE table_name = 'tasks'
-    """)).fetchall()
-    return {r.column_name: r.data_type for r in rows}
-
-
-def _upsert_task(db: Session, project_id: int, task_id: str, name: str, est_duration: float,
-                 assignee: Optional[str], end_date: Optional[str]):
-    # Normalize date to date string if present
-    end_dt_sql = None
-    if end_date:
-        try:
-            end_dt_sql = datetime.fromisoformat(end_date.replace("Z", "+00:00")).date().isoformat()
-        except Exception:
-            end_dt_sql = None
-    cols = _task_table_columns(db)
+def _bulk_upsert_tasks(db: Session, project_id: int, rows: List[dict], user_ids: Dict[str, int]) -> Tuple[int, int]:
+    """Upsert many tasks with one batched INSERT ... ON CONFLICT.
+    rows: dicts with id, name, est_duration, assignee (display name) and end_date.
+    user_ids: {display name: users.id}, from _bulk_upsert_users.
+    Returns (inserted, updated), read from xmax on the returned rows.
+    """
+    # One statement cannot touch the same row twice; the last occurrence of an id wins
+    rows = list({r["id"]: r for r in rows}.values())
+    if not rows:
+        return 0, 0
+    cols = _tasks_colmap(db)
     has_assignee_id = 'assignee_id' in cols
     has_assignee = 'assignee' in cols
     assignee_is_int = (cols.get('assignee') == 'integer') if has_assignee else False
 
-    user_id: Optional[int] = None
-    if assignee and (has_assignee_id or assignee_is_int):
-        user_id = _upsert_user(db, assignee)
-
+    columns = ["id", "project_id", "name", "estimate_days", "end_date"]
     if has_assignee_id:
-        db.execute(text("""
-            INSERT INTO tasks (id, project_id, name, estimate_days, end_date, assignee_id)
-            VALUES (:id, :pid, :name, :est_duration, :end_date, :assignee_id)
-            ON CONFLICT (id) DO UPDATE SET
-              project_id = EXCLUDED.project_id,
-              name = EXCLUDED.name,
-              estimate_days = EXCLUDED.estimate_days,
-              end_date = EXCLUDED.end_date,
-              assignee_id = EXCLUDED.assignee_id
-        """), {
-            "id": task_id,
-            "pid": project_id,
-            "name": name or task_id,
-            "est_duration": float(est_duration or 1.0),
-            "end_date": end_dt_sql,
-            "assignee_id": user_id,
-        })
-    elif has_assignee and assignee_is_int:
-        db.execute(text("""
-            INSERT INTO tasks (id, project_id, name, estimate_days, end_date, assignee)
-            VALUES (:id, :pid, :name, :est_duration, :end_date, :assignee)
-            ON CONFLICT (id) DO UPDATE SET
-              project_id = EXCLUDED.project_id,
-              name = EXCLUDED.name,
-              estimate_days = EXCLUDED.estimate_days,
-              end_date = EXCLUDED.end_date,
-              assignee = EXCLUDED.assignee
-        """), {
-            "id": task_id,
-            "pid": project_id,
-            "name": name or task_id,
-            "est_duration": float(est_duration or 1.0),
-            "end_date": end_dt_sql,
-            "assignee": user_id,
-        })
+        columns.append("assignee_id")
     elif has_assignee:
-        db.execute(text("""
-            INSERT INTO tasks (id, project_id, name, estimate_days, end_date, assignee)
-            VALUES (:id, :pid, :name, :est_duration, :end_date, :assignee)
-            ON CONFLICT (id) DO UPDATE SET
-              project_id = EXCLUDED.project_id,
-              name = EXCLUDED.name,
-              estimate_days = EXCLUDED.estimate_days,
-              end_date = EXCLUDED.end_date,
-              assignee = EXCLUDED.assignee
-        """), {
-            "id": task_id,
-            "pid": project_id,
-            "name": name or task_id,
-            "est_duration": float(est_duration or 1.0),
-            "end_date": end_dt_sql,
-            "assignee": assignee,
-        })
-    else:
-        db.execute(text("""
-            INSERT INTO tasks (id, project_id, name, estimate_days, end_date)
-            VALUES (:id, :pid, :name, :est_duration, :end_date)
-            ON CONFLICT (id) DO UPDATE SET
-              project_id = EXCLUDED.project_id,
-              name = EXCLUDED.name,
-              estimate_days = EXCLUDED.estimate_days,
-              end_date = EXCLUDED.end_date
-        """), {
-            "id": task_id,
-            "pid": project_id,
-            "name": name or task_id,
-            "est_duration": float(est_duration or 1.0),
-            "end_date": end_dt_sql,
-        })
-
-
-def _replace_dependencies(db: Session, project_id: int, task_id: str, depends_on: List[str]):
-    # Clear existing, then insert
-    db.execute(text("""
-        DELETE FROM dependencies WHERE task_id = :tid
-    """), {"tid": task_id})
-    for dep in depends_on:
-        if dep and dep != task_id:
-            # Ensure dependency task exists before adding relation
-            _upsert_task(db, project_id, dep, dep, 1.0, None, None)
-            db.execute(text("""
-                INSERT INTO dependencies (task_id, depends_on) VALUES (:tid, :dep)
+        columns.append("assignee")
+    values = []
+    for r in rows:
+        v = (r["id"], project_id, r["name"] or r["id"], float(r["est_duration"] or 1.0), _end_date_value(r["end_date"]))
+        if has_assignee_id or assignee_is_int:
+            v += (user_ids.get(r["assignee"]),)
+        elif has_assignee:
+            v += (r["assignee"],)
+        values.append(v)
+
+    updates = ",\n              ".join(f"{c} = EXCLUDED.{c}" for c in columns[1:])
+    sql = f"""
+        INSERT INTO tasks ({", ".join(columns)})
+        VALUES %s
+        ON CONFLICT (id) DO UPDATE SET
+              {updates}
+        RETURNING (xmax = 0) AS inserted
+    """
+    cur = db.connection().connection.cursor()
+    try:
+        flags = execute_values(cur, sql, values, page_size=_BULK_PAGE_SIZE, fetch=True)
+    finally:
+        cur.close()
+    inserted = sum(1 for (was_inserted,) in flags if was_inserted)
+    return inserted, len(flags) - inserted
+
+
+def _bulk_replace_dependencies(db: Session, project_id: int, deps_by_task: Dict[str, List[str]]):
+    """Replace the dependency rows of every task in deps_by_task with one DELETE and one INSERT.
+    Dependency targets missing from the tasks table get a placeholder task first.
+    Ids travel as text[] binds expanded by UNNEST, so each statement has a fixed number of parameters.
+    """
+    task_ids = list(deps_by_task)
+    if not task_ids:
+        return
+    pairs = list({(tid, dep): None for tid, deps in deps_by_task.items() for dep in deps if dep and dep != tid})
+    placeholders = sorted({dep for _, dep in pairs} - set(task_ids))
+    cur = db.connection().connection.cursor()
+    try:
+        if placeholders:
+            cur.execute("""
+                INSERT INTO tasks (id, project_id, name, estimate_days)
+                SELECT dep, %s, dep, 1.0 FROM UNNEST(%s::text[]) AS dep
+                ON CONFLICT (id) DO NOTHING
+            """, (project_id, placeholders))
+        cur.execute("DELETE FROM dependencies WHERE task_id = ANY(%s)", (task_ids,))
+        if pairs:
+            cur.execute("""
+                INSERT INTO dependencies (task_id, depends_on)
+                SELECT * FROM UNNEST(%s::text[], %s::text[])
                 ON CONFLICT DO NOTHING
-            """), {"tid": task_id, "dep": dep})
+            """, ([tid for tid, _ in pairs], [dep for _, dep in pairs]))
+    finally:
+        cur.close()
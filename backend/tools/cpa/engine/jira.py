@@ -1,11 +1,14 @@
-import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from datetime import datetime, date
-from typing import Dict, List, Tuple, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Tuple, Optional
 
-import requests
 from requests.auth import HTTPBasicAuth
-from sqlalchemy import text
 from dotenv import load_dotenv
+import orjson
+import redis
 from pathlib import Path
 
 try:
@@ -15,125 +18,222 @@ except ModuleNotFoundError:
     # When importing as backend.* from project root
     from backend.app.db.database import SessionLocal
 
+try:
+    from backend import config
+except ModuleNotFoundError:
+    import config
+
 try:
     from tools.jira.cpa_tools import _jira_env, _sp_field_key
 except ModuleNotFoundError:
     from backend.tools.jira.cpa_tools import _jira_env, _sp_field_key
 
-from .db import _ensure_project, _upsert_user, _upsert_task, _replace_dependencies
+from ._jira_http import SESSION
+from .db import _ensure_project, _bulk_upsert_users, _bulk_upsert_tasks, _bulk_replace_dependencies
 
 # Ensure environment variables from backend/.env are available when tools are invoked directly
 _ENV_PATH = (Path(__file__).parents[3] / ".env")
 load_dotenv(dotenv_path=_ENV_PATH)
 
 # ------------------------------
-# Lightweight in-memory cache (TTL) to reduce repeated Jira calls
+# Lightweight in-memory cache (TTL, stale-while-revalidate) to reduce repeated Jira calls
 # ------------------------------
-_JIRA_CACHE: Dict[Tuple[str, str], Tuple[float, List[dict]]] = {}
+_CacheKey = Tuple[str, str, int]
+_JIRA_CACHE: Dict[_CacheKey, Tuple[float, List[dict]]] = {}
+_JIRA_CACHE_MAX_ENTRIES = 256
+_JIRA_CACHE_LOCK = threading.Lock()
+# One fetch lock per key so concurrent misses wait for a single Jira call; dropped with the key's entry
+_JIRA_FETCH_LOCKS: Dict[_CacheKey, threading.Lock] = {}
+_JIRA_REFRESHING: set = set()
+_BG_EXEC = ThreadPoolExecutor(max_workers=1, thread_name_prefix="jira-cache-refresh")
+
+
+_SHARED_REDIS: Optional[redis.Redis] = None
+
+
+def _shared_cache() -> Optional[redis.Redis]:
+    """Redis client shared by every worker and CLI run, or None when REDIS_URL is unset."""
+    global _SHARED_REDIS
+    if _SHARED_REDIS is None and config.REDIS_URL:
+        _SHARED_REDIS = redis.Redis.from_url(config.REDIS_URL)
+    return _SHARED_REDIS
+
+
+def _shared_key(cache_key: _CacheKey) -> str:
+    return "jira:" + ":".join(str(part) for part in cache_key)
+
+
+def _shared_cache_get(cache_key: _CacheKey) -> Optional[Tuple[float, List[dict]]]:
+    """Return (age_seconds, issues) from the shared tier, or None."""
+    shared = _shared_cache()
+    if shared is None:
+        return None
+    try:
+        raw = shared.get(_shared_key(cache_key))
+        if not raw:
+            return None
+        entry = orjson.loads(raw)
+        return max(0.0, time.time() - entry["fetched_at"]), entry["issues"]
+    except Exception:
+        # The shared tier is best-effort (unreachable or a corrupt value); fall through to Jira
+        return None
+
 
-def _cached_current_sprint_issues(project_key: str, ttl_seconds: int = 60) -> List[dict]:
+def _shared_cache_put(cache_key: _CacheKey, issues: List[dict], ttl_seconds: int) -> None:
+    shared = _shared_cache()
+    if shared is None:
+        return
+    try:
+        shared.set(_shared_key(cache_key), orjson.dumps({"fetched_at": time.time(), "issues": issues}), ex=ttl_seconds)
+    except Exception:
+        pass
+
+
+def _jira_cache_put(cache_key: _CacheKey, issues: List[dict], age: float = 0.0) -> None:
+    with _JIRA_CACHE_LOCK:
+        _JIRA_CACHE.pop(cache_key, None)
+        while len(_JIRA_CACHE) >= _JIRA_CACHE_MAX_ENTRIES:
+            evicted = next(iter(_JIRA_CACHE))
+            del _JIRA_CACHE[evicted]
+            _JIRA_FETCH_LOCKS.pop(evicted, None)
+        _JIRA_CACHE[cache_key] = (time.monotonic() - age, issues)
+
+
+def _refresh_current_sprint_issues(cache_key: _CacheKey, project_key: str, max_results: int, ttl_seconds: int) -> None:
+    try:
+        issues = _jira_search_current_sprint_issues(project_key, max_results)
+        _jira_cache_put(cache_key, issues)
+        _shared_cache_put(cache_key, issues, ttl_seconds)
+    except Exception:
+        # Keep serving the stale entry; the next caller past the TTL fetches synchronously
+        pass
+    finally:
+        with _JIRA_CACHE_LOCK:
+            _JIRA_REFRESHING.discard(cache_key)
+
+
+def _cached_current_sprint_issues(project_key: str, ttl_seconds: int = 60, max_results: int = 100) -> List[dict]:
     """Cache wrapper for _jira_search_current_sprint_issues to reduce load.
-    Keyed by ("current_sprint", project_key) and expires after ttl_seconds.
+    Keyed by ("current_sprint", project_key, max_results). Entries older than half the TTL are
+    returned as-is while a background refresh runs; entries past ttl_seconds are refetched.
+    On a local miss the shared Redis tier (when REDIS_URL is set) is tried before Jira.
     """
-    now_ts = datetime.utcnow().timestamp()
-    cache_key = ("current_sprint", project_key)
-    entry = _JIRA_CACHE.get(cache_key)
-    if entry is not None:
-        ts, issues = entry
-        if (now_ts - ts) < ttl_seconds:
-            return issues
-    issues = _jira_search_current_sprint_issues(project_key)
-    _JIRA_CACHE[cache_key] = (now_ts, issues)
-    return issues
+    cache_key = ("current_sprint", project_key, max_results)
+    with _JIRA_CACHE_LOCK:
+        entry = _JIRA_CACHE.get(cache_key)
+        if entry is not None:
+            age = time.monotonic() - entry[0]
+            if age < ttl_seconds:
+                if age >= ttl_seconds / 2 and cache_key not in _JIRA_REFRESHING:
+                    _JIRA_REFRESHING.add(cache_key)
+                    _BG_EXEC.submit(_refresh_current_sprint_issues, cache_key, project_key, max_results, ttl_seconds)
+                return entry[1]
+        fetch_lock = _JIRA_FETCH_LOCKS.setdefault(cache_key, threading.Lock())
+    with fetch_lock:
+        # Another caller may have filled the entry while we waited
+        with _JIRA_CACHE_LOCK:
+            entry = _JIRA_CACHE.get(cache_key)
+        if entry is not None and time.monotonic() - entry[0] < ttl_seconds:
+            return entry[1]
+        # Another worker may have fetched it; keep its age so the TTL stays shared
+        shared = _shared_cache_get(cache_key)
+        if shared is not None and shared[0] < ttl_seconds:
+            _jira_cache_put(cache_key, shared[1], age=shared[0])
+            return shared[1]
+        try:
+            issues = _jira_search_current_sprint_issues(project_key, max_results)
+        except Exception:
+            # Keys that never get an entry must not leave a lock behind
+            with _JIRA_CACHE_LOCK:
+                if cache_key not in _JIRA_CACHE:
+                    _JIRA_FETCH_LOCKS.pop(cache_key, None)
+            raise
+        _jira_cache_put(cache_key, issues)
+        _shared_cache_put(cache_key, issues, ttl_seconds)
+        return issues
 
 
 # ------------------------------
 # Helpers: Jira fetch and parsing
 # ------------------------------
 
-def _jira_search_project_issues(project_key: str, max_results: int = 100) -> List[dict]:
-    """Fetch all issues for a Jira project via JQL search (Cloud v3 API)."""
+# Minimal field lists per caller; the story-points field is appended when configured
+_GRAPH_FIELDS = ["issuelinks", "aggregatetimeoriginalestimate"]
+_REFRESH_FIELDS = _GRAPH_FIELDS + ["summary", "assignee", "duedate"]
+_SPRINT_FIELDS = _REFRESH_FIELDS + ["status", "timetracking", "sprint"]
+
+
+def _iter_search_pages(jql: str, fields: List[str], max_results: int) -> Iterator[List[dict]]:
+    """Run a JQL search (Cloud v3 /search/jql) and yield each page of issues, in order.
+    Pages are followed via nextPageToken until Jira stops returning one.
+    """
     jira_server, jira_username, jira_api_token = _jira_env()
     auth = HTTPBasicAuth(jira_username, jira_api_token)
-    headers = {"Accept": "application/json"}
-    jql = f"project={project_key} ORDER BY created ASC"
-    start_at = 0
-    out: List[dict] = []
-    fields = [
-        "summary",
-        "assignee",
-        "duedate",
-        "issuelinks",
-        "issuetype",
-        "status",
-        "timetracking",
-        "aggregatetimeoriginalestimate",
-    ]
+    headers = {"Accept": "application/json", "Content-Type": "application/json"}
+    url = f"{jira_server}/rest/api/3/search/jql"
     sp_key = _sp_field_key()
     if sp_key:
-        fields.append(sp_key)
+        fields = fields + [sp_key]
 
+    token: Optional[str] = None
     while True:
-        params = {
-            "jql": jql,
-            "startAt": start_at,
-            "maxResults": max_results,
-            "fields": ",".join(fields),
-        }
-        url = f"{jira_server}/rest/api/3/search"
-        resp = requests.get(url, headers=headers, auth=auth, params=params)
+        body: Dict[str, Any] = {"jql": jql, "fields": fields, "maxResults": max_results}
+        if token:
+            body["nextPageToken"] = token
+        resp = SESSION.post(url, headers=headers, auth=auth, data=orjson.dumps(body))
         resp.raise_for_status()
-        data = resp.json()
-        issues = data.get("issues", [])
-        out.extend(issues)
-        if start_at + max_results >= data.get("total", 0):
-            break
-        start_at += max_results
-    return out
+        page = orjson.loads(resp.content)
+        yield page.get("issues", [])
+        token = page.get("nextPageToken")
+        if not token or page.get("isLast"):
+            return
+
+
+def _jira_search_all(jql: str, fields: List[str], max_results: int) -> List[dict]:
+    """Run a JQL search and return every page of issues, in order."""
+    return [issue for page in _iter_search_pages(jql, fields, max_results) for issue in page]
+
+
+def _prefetch(pages: Iterator[List[dict]]) -> Iterator[List[dict]]:
+    """Yield from pages while the following page is fetched on a background thread."""
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="jira-prefetch") as pool:
+        pending = pool.submit(next, pages, None)
+        while True:
+            page = pending.result()
+            if page is None:
+                return
+            pending = pool.submit(next, pages, None)
+            yield page
+
+
+def _iter_project_issue_pages(project_key: str, fields: Optional[List[str]] = None, max_results: int = 100) -> Iterator[List[dict]]:
+    """Yield a Jira project's issues page by page via JQL search (Cloud v3 API)."""
+    jql = f"project={project_key} ORDER BY created ASC"
+    return _iter_search_pages(jql, fields or _GRAPH_FIELDS, max_results)
+
+
+def _jira_search_project_issues(project_key: str, fields: Optional[List[str]] = None, max_results: int = 100) -> List[dict]:
+    """Fetch all issues for a Jira project via JQL search (Cloud v3 API).
+    `fields` defaults to what the dependency graph needs."""
+    return [issue for page in _iter_project_issue_pages(project_key, fields, max_results) for issue in page]
 
 
 def _jira_search_current_sprint_issues(project_key: str, max_results: int = 100) -> List[dict]:
     """Fetch issues that are in the current open sprint for the given project.
     Uses JQL: project=<key> AND sprint in openSprints(). Includes 'sprint' field to detect dates if available.
     """
-    jira_server, jira_username, jira_api_token = _jira_env()
-    auth = HTTPBasicAuth(jira_username, jira_api_token)
-    headers = {"Accept": "application/json"}
     jql = f"project={project_key} AND sprint in openSprints() ORDER BY created ASC"
-    start_at = 0
-    out: List[dict] = []
-    fields = [
-        "summary",
-        "assignee",
-        "duedate",
-        "issuelinks",
-        "issuetype",
-        "status",
-        "timetracking",
-        "aggregatetimeoriginalestimate",
-        "sprint",
-    ]
-    sp_key = _sp_field_key()
-    if sp_key:
-        fields.append(sp_key)
+    return _jira_search_all(jql, _SPRINT_FIELDS, max_results)
 
-    while True:
-        params = {
-            "jql": jql,
-            "startAt": start_at,
-            "maxResults": max_results,
-            "fields": ",".join(fields),
-        }
-        url = f"{jira_server}/rest/api/3/search"
-        resp = requests.get(url, headers=headers, auth=auth, params=params)
-        resp.raise_for_status()
-        data = resp.json()
-        issues = data.get("issues", [])
-        out.extend(issues)
-        if start_at + max_results >= data.get("total", 0):
-            break
-        start_at += max_results
-    return out
+
+@lru_cache(maxsize=8192)
+def _issue_key_number(k: Optional[str]) -> int:
+    try:
+        if not k or '-' not in k:
+            return 0
+        return int(k.rsplit('-', 1)[1])
+    except Exception:
+        return 0
 
 
 def _get_task_duration(fields: dict) -> float:
@@ -156,15 +256,20 @@ def _get_task_duration(fields: dict) -> float:
     return 1.0
 
 
+# Link type names treated as dependencies regardless of their inward description
+_DEP_TYPE_NAMES = frozenset({"blocks", "dependency", "depends"})
+
+
 def _parse_dependencies(fields: dict) -> List[str]:
     """Return list of issue keys this issue depends on (blocked by)."""
     deps: List[str] = []
     for link in (fields.get("issuelinks") or []):
-        link_type = (link.get("type") or {})
-        inward_desc = (link_type.get("inward") or "").lower()
-        type_name = (link_type.get("name") or "").lower()
+        # Only inward links can point at a blocker; skip outward ones before any string work
         inward_issue = link.get("inwardIssue")
-        if inward_issue and ("blocked" in inward_desc or type_name in {"blocks", "dependency", "depends"}):
+        if not inward_issue:
+            continue
+        link_type = link.get("type") or {}
+        if (link_type.get("name") or "").lower() in _DEP_TYPE_NAMES or "blocked" in (link_type.get("inward") or "").lower():
             key = inward_issue.get("key")
             if key:
                 deps.append(key)
@@ -207,90 +312,60 @@ def _extract_sprint_dates(issues: List[dict]) -> Tuple[Optional[date], Optional[
 # Public tools (to be wrapped by FunctionTool)
 # ------------------------------
 
+def _store_issues(db, project_id: int, issues: List[dict], deps_by_task: Dict[str, List[str]]) -> Tuple[int, int]:
+    """Write Jira issues as tasks with batched statements and collect their links into deps_by_task.
+    Returns (inserted, updated) task counts.
+    """
+    rows = []
+    for issue in issues:
+        key = issue.get("key")
+        fields = issue.get("fields", {})
+        rows.append({
+            "id": key,
+            "name": fields.get("summary"),
+            "est_duration": _get_task_duration(fields),
+            "assignee": (fields.get("assignee") or {}).get("displayName") if fields.get("assignee") else None,
+            "end_date": fields.get("duedate"),
+        })
+        deps_by_task[key] = _parse_dependencies(fields)
+    user_ids = _bulk_upsert_users(db, {r["assignee"] for r in rows if r["assignee"]})
+    return _bulk_upsert_tasks(db, project_id, rows, user_ids)
+
+def _sync_issues(project_key: str, pages: Iterable[List[dict]]) -> dict:
+    """Write issues for project_key in a single transaction, then drop its cached CPA result.
+    Each page is written as it arrives; links are replaced once every task exists, so a link
+    to an issue on a later page does not create a placeholder for it.
+    """
+    issue_count = inserted = updated = 0
+    deps_by_task: Dict[str, List[str]] = {}
+    with SessionLocal() as db, db.begin():
+        project_id = _ensure_project(db, project_key)
+        for page in pages:
+            page_inserted, page_updated = _store_issues(db, project_id, page, deps_by_task)
+            issue_count += len(page)
+            inserted += page_inserted
+            updated += page_updated
+        _bulk_replace_dependencies(db, project_id, deps_by_task)
+    # Late import: cpa imports this module
+    from .cpa import invalidate_cpa_cache
+    invalidate_cpa_cache(project_id)
+    return {
+        "project_id": project_id,
+        "project_key": project_key,
+        "issue_count": issue_count,
+        "inserted": inserted,
+        "updated": updated,
+    }
+
 def refresh_from_jira(project_key: str) -> dict:
     """Sync latest Jira issues for a project into the DB.
     Returns JSON: {"project_id", "project_key", "issue_count", "inserted": n, "updated": m}
     """
-    issues = _jira_search_project_issues(project_key)
-    db = SessionLocal()
-    try:
-        project_id = _ensure_project(db, project_key)
-        inserted = 0
-        updated = 0
-        for issue in issues:
-            key = issue.get("key")
-            fields = issue.get("fields", {})
-            name = fields.get("summary")
-            assignee = (fields.get("assignee") or {}).get("displayName") if fields.get("assignee") else None
-            duedate = fields.get("duedate")
-            est_duration = _get_task_duration(fields)
-            deps = _parse_dependencies(fields)
-
-            # Try upsert user
-            if assignee:
-                _upsert_user(db, assignee)
-
-            # Determine if task exists
-            existing = db.execute(text("""
-                SELECT id FROM tasks WHERE id = :id
-            """), {"id": key}).fetchone()
-            _upsert_task(db, project_id, key, name, est_duration, assignee, duedate)
-            _replace_dependencies(db, project_id, key, deps)
-            if existing:
-                updated += 1
-            else:
-                inserted += 1
-        db.commit()
-        return {
-            "project_id": project_id,
-            "project_key": project_key,
-            "issue_count": len(issues),
-            "inserted": inserted,
-            "updated": updated,
-        }
-    finally:
-        db.close()
+    # The next page downloads while the current one is written
+    return _sync_issues(project_key, _prefetch(_iter_project_issue_pages(project_key, _REFRESH_FIELDS)))
 
 def refresh_sprint_from_jira(project_key: str) -> dict:
     """Sync latest Jira issues for a project's current sprint into the DB.
     Returns JSON: {"project_id", "project_key", "issue_count", "inserted": n, "updated": m}
     """
-    issues = _cached_current_sprint_issues(project_key)
-    db = SessionLocal()
-    try:
-        project_id = _ensure_project(db, project_key)
-        inserted = 0
-        updated = 0
-        for issue in issues:
-            key = issue.get("key")
-            fields = issue.get("fields", {})
-            name = fields.get("summary")
-            assignee = (fields.get("assignee") or {}).get("displayName") if fields.get("assignee") else None
-            duedate = fields.get("duedate")
-            est_duration = _get_task_duration(fields)
-            deps = _parse_dependencies(fields)
-
-            # Try upsert user
-            if assignee:
-                _upsert_user(db, assignee)
-
-            # Determine if task exists
-            existing = db.execute(text("""
-                SELECT id FROM tasks WHERE id = :id
-            """), {"id": key}).fetchone()
-            _upsert_task(db, project_id, key, name, est_duration, assignee, duedate)
-            _replace_dependencies(db, project_id, key, deps)
-            if existing:
-                updated += 1
-            else:
-                inserted += 1
-        db.commit()
-        return {
-            "project_id": project_id,
-            "project_key": project_key,
-            "issue_count": len(issues),
-            "inserted": inserted,
-            "updated": updated,
-        }
-    finally:
-        db.close()
+    return _sync_issues(project_key, [_cached_current_sprint_issues(project_key)])
@@ -1,6 +1,6 @@
 from typing import Dict, List, Tuple
 
-from .jira import _jira_search_project_issues, _get_task_duration, _parse_dependencies
+from .jira import _jira_search_project_issues, _get_task_duration, _issue_key_number, _parse_dependencies
 
 def build_weighted_dependency_graph(project_key: str) -> dict:
     """Build a directed dependency graph for all issues in a Jira project.
@@ -35,27 +35,19 @@ def format_dependency_graph(graph: dict) -> str:
     project_key = graph.get("project_key")
     nodes: Dict[str, float] = graph.get("nodes", {})
     edges: List[Tuple[str, str]] = graph.get("edges", [])
-    lines: List[str] = []
-    lines.append(f"Dependency Graph for project {project_key}")
-    lines.append("")
-    lines.append("Nodes (duration in days):")
-    for k in sorted(nodes.keys(), key=lambda s: (s.split('-')[0] if isinstance(s, str) else '',
-                                                 int(s.rsplit('-', 1)[1]) if isinstance(s, str) and '-' in s and s.rsplit('-', 1)[1].isdigit() else 0,
-                                                 s)):
-        lines.append(f" - {k}: {nodes[k]:.2f}")
-    lines.append("")
-    lines.append("Edges (dependency -> issue):")
-    if edges:
-        # Sort edges deterministically by numeric part where possible
-        def _num(x: str) -> int:
-            try:
-                return int(x.rsplit('-', 1)[1]) if '-' in x else 0
-            except Exception:
-                return 0
-        for u, v in sorted(edges, key=lambda e: (_num(e[0]), e[0], _num(e[1]), e[1])):
-            lines.append(f" - {u} -> {v}")
-    else:
-        lines.append(" - (no dependencies detected)")
+    # Decorate once, sort the tuples, then read the key back out
+    decorated = sorted((k.split('-')[0], _issue_key_number(k), k) if isinstance(k, str) else ('', 0, k) for k in nodes)
+    # Sort edges deterministically by numeric part where possible
+    edge_lines = [f" - {u} -> {v}" for _, u, _, v in sorted((_issue_key_number(u), u, _issue_key_number(v), v) for u, v in edges)]
+    lines: List[str] = [
+        f"Dependency Graph for project {project_key}",
+        "",
+        "Nodes (duration in days):",
+        *[f" - {k}: {nodes[k]:.2f}" for _, _, k in decorated],
+        "",
+        "Edges (dependency -> issue):",
+        *(edge_lines or [" - (no dependencies detected)"]),
+    ]
     return "\n".join(lines)
 
 
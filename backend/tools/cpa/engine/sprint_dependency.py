@@ -1,5 +1,5 @@
 from datetime import datetime, date, timedelta
-from typing import Dict, List, Tuple, Optional, Set
+from typing import Dict, FrozenSet, List, Tuple, Optional
 import math
 import heapq
 
@@ -8,16 +8,12 @@ try:
 except ModuleNotFoundError:
     from backend.tools.jira.cpa_tools import _sp_field_key
 
-from .jira import _cached_current_sprint_issues, _get_task_duration, _parse_dependencies, _parse_iso_date, _extract_sprint_dates
+from .jira import _cached_current_sprint_issues, _get_task_duration, _issue_key_number, _parse_dependencies, _parse_iso_date, _extract_sprint_dates
 from .sprint_timeline import _advance_working_days, _to_date_set
 
-def current_sprint_dependency_graph(project_key: str) -> dict:
-    """Build a weighted dependency graph for issues in the current sprint.
-    Nodes store assignee, story points (as days), and dependencies limited to issues present in the sprint.
-    """
-    issues = _cached_current_sprint_issues(project_key)
-    sp_key = _sp_field_key()
-    present_keys = {iss.get("key") for iss in issues}
+def _build_graph_from_issues(issues: List[dict], sp_key: Optional[str]) -> Tuple[Dict[str, dict], List[Tuple[str, str]]]:
+    """Return (nodes, edges) for already-fetched sprint issues; see current_sprint_dependency_graph."""
+    present_keys = frozenset(iss.get("key") for iss in issues)
     nodes: Dict[str, dict] = {}
     edges: List[Tuple[str, str]] = []
     for iss in issues:
@@ -29,16 +25,22 @@ def current_sprint_dependency_graph(project_key: str) -> dict:
         duration_days = _get_task_duration(fields)
         duration_whole = int(math.ceil(max(0.0, float(duration_days)))) or 1
         # Limit dependencies to those also in this sprint
-        deps_all = _parse_dependencies(fields)
-        deps = [d for d in deps_all if d in present_keys and d != key]
+        deps = [d for d in _parse_dependencies(fields) if d in present_keys and d != key]
         nodes[key] = {
             "assignee": assignee,
             "story_points": float(fields.get(sp_key)) if (sp_key and fields.get(sp_key) is not None) else None,
             "duration_days": duration_whole,
             "dependencies": deps,
         }
-        for d in deps:
-            edges.append((d, key))
+        edges.extend((d, key) for d in deps)
+    return nodes, edges
+
+
+def current_sprint_dependency_graph(project_key: str) -> dict:
+    """Build a weighted dependency graph for issues in the current sprint.
+    Nodes store assignee, story points (as days), and dependencies limited to issues present in the sprint.
+    """
+    nodes, edges = _build_graph_from_issues(_cached_current_sprint_issues(project_key), _sp_field_key())
     return {"project_key": project_key, "nodes": nodes, "edges": edges}
 
 
@@ -49,27 +51,21 @@ def format_current_sprint_dependency_graph(graph: dict) -> str:
     project_key = graph.get("project_key")
     nodes: Dict[str, dict] = graph.get("nodes", {})
     edges: List[Tuple[str, str]] = graph.get("edges", [])
-    lines: List[str] = []
-    lines.append(f"Current Sprint Dependency Graph for project {project_key}")
-    lines.append("")
-    lines.append("Nodes (issue: days, assignee, story points):")
-    def _num(x: str) -> int:
-        try:
-            return int(x.rsplit('-', 1)[1]) if '-' in x else 0
-        except Exception:
-            return 0
-    for k in sorted(nodes.keys(), key=lambda s: (_num(s), s)):
+    def _node_line(k: str) -> str:
         nd = nodes[k]
         story_points = nd.get('story_points')
         sp_str = f", SP: {story_points}" if story_points is not None else ""
-        lines.append(f" - {k}: {nd.get('duration_days', 0)}d, {nd.get('assignee')}{sp_str}")
-    lines.append("")
-    lines.append("Edges (dependency -> issue):")
-    if edges:
-        for u, v in sorted(edges, key=lambda e: (_num(e[0]), e[0], _num(e[1]), e[1])):
-            lines.append(f" - {u} -> {v}")
-    else:
-        lines.append(" - (no dependencies detected)")
+        return f" - {k}: {nd.get('duration_days', 0)}d, {nd.get('assignee')}{sp_str}"
+    edge_lines = [f" - {u} -> {v}" for _, u, _, v in sorted((_issue_key_number(u), u, _issue_key_number(v), v) for u, v in edges)]
+    lines: List[str] = [
+        f"Current Sprint Dependency Graph for project {project_key}",
+        "",
+        "Nodes (issue: days, assignee, story points):",
+        *[_node_line(k) for _, k in sorted((_issue_key_number(k), k) for k in nodes)],
+        "",
+        "Edges (dependency -> issue):",
+        *(edge_lines or [" - (no dependencies detected)"]),
+    ]
     return "\n".join(lines)
 
 
@@ -112,11 +108,15 @@ def schedule_current_sprint_with_dependencies(
     start_dt = _parse_iso_date(start_on) if start_on else None
     base_start = sprint_start or start_dt or datetime.utcnow().date()
 
-    working_days_set: Set[int] = set(working_days) if working_days is not None else {0,1,2,3,4,5,6}
-    global_hols_set: Set[date] = _to_date_set(global_holidays)
+    working_days_set: FrozenSet[int] = frozenset(working_days) if working_days is not None else frozenset(range(7))
+    global_hols_set: FrozenSet[date] = frozenset(_to_date_set(global_holidays))
+    # Per-assignee holidays never change during scheduling; parse them once, not per task
+    hol_map: Dict[str, FrozenSet[date]] = {
+        u: frozenset(_to_date_set(hb) | global_hols_set) for u, hb in (holidays_by_user or {}).items()
+    }
 
-    graph = current_sprint_dependency_graph(project_key)
-    nodes = graph["nodes"]
+    # Reuse the issues fetched above instead of fetching them again via current_sprint_dependency_graph
+    nodes, _ = _build_graph_from_issues(issues, _sp_field_key())
 
     # Build indegrees and successors
     indeg: Dict[str, int] = {k: 0 for k in nodes}
@@ -133,8 +133,9 @@ def schedule_current_sprint_with_dependencies(
     start_dates: Dict[str, date] = {}
     end_dates: Dict[str, date] = {}
 
-    # Ready queue (issues with indegree 0)
-    ready: List[str] = [k for k, d in indeg.items() if d == 0]
+    # Ready issues as a min-heap on (issue number, key), so they are always started in key order
+    ready: List[Tuple[int, str]] = [(_issue_key_number(k), k) for k, d in indeg.items() if d == 0]
+    heapq.heapify(ready)
     # Min-heap of ongoing tasks by end date: (end_date, issue_key)
     heap: List[Tuple[date, str]] = []
 
@@ -142,7 +143,7 @@ def schedule_current_sprint_with_dependencies(
     def try_schedule(k: str, current_date: date):
         nd = nodes[k]
         user = nd["assignee"]
-        user_holidays = _to_date_set((holidays_by_user or {}).get(user)) | global_hols_set
+        user_holidays = hol_map.get(user, global_hols_set)
         avail = next_free.get(user, base_start)
         sdt = max(current_date, avail)
         edt = _advance_working_days(sdt, nd["duration_days"], working_days_set, user_holidays)
@@ -152,38 +153,26 @@ def schedule_current_sprint_with_dependencies(
         next_free[user] = edt + timedelta(days=1)
         heapq.heappush(heap, (edt, k))
 
-    current_date = base_start
-    # Deterministic order for ready list by numeric part then key
-    def _issue_key_number(k: Optional[str]) -> int:
-        try:
-            if not k or '-' not in k:
-                return 0
-            return int(k.rsplit('-', 1)[1])
-        except Exception:
-            return 0
-
-    ready.sort(key=lambda x: (_issue_key_number(x), x))
-
-    # Initially schedule as many as possible at base_start
-    i = 0
-    while i < len(ready):
-        k = ready[i]
-        try_schedule(k, current_date)
-        i += 1
+    def drain_ready(current_date: date):
+        while ready:
+            _, k = heapq.heappop(ready)
+            try_schedule(k, current_date)
 
-    scheduled_count = len(ready)
+    # Initially schedule everything with no dependencies at base_start
+    drain_ready(base_start)
 
     # Process events
     while heap:
-        edt, done_key = heapq.heappop(heap)
-        current_date = edt  # advance time to this completion
-        # Reduce indegree of successors
-        for v in succ.get(done_key, []):
-            indeg[v] -= 1
-            if indeg[v] == 0:
-                # Newly ready; schedule at the max of current time and assignee availability
-                try_schedule(v, current_date)
-                scheduled_count += 1
+        current_date = heap[0][0]  # advance time to the next completion
+        # Release every completion on this date first, so same-day successors start in key order
+        while heap and heap[0][0] == current_date:
+            _, done_key = heapq.heappop(heap)
+            for v in succ.get(done_key, []):
+                indeg[v] -= 1
+                if indeg[v] == 0:
+                    heapq.heappush(ready, (_issue_key_number(v), v))
+        # Newly ready; each starts at the max of current time and assignee availability
+        drain_ready(current_date)
 
     overall_end = max(end_dates.values()) if end_dates else base_start
 
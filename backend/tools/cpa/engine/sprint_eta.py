@@ -3,34 +3,75 @@ import math
 
 from .sprint_dependency import current_sprint_dependency_graph
 
+def _cycle_in_scc(succ: List[List[int]], scc: List[int]) -> List[int]:
+    """Walk dependency edges inside one strongly connected component until a node repeats.
+    Returns the closed loop, e.g. [a, b, a]; every member has a successor inside the SCC."""
+    members = set(scc)
+    cur = min(scc)
+    seen: Dict[int, int] = {}
+    path: List[int] = []
+    while cur not in seen:
+        seen[cur] = len(path)
+        path.append(cur)
+        cur = next(v for v in succ[cur] if v in members)
+    return path[seen[cur]:] + [cur]
+
+
 def _detect_cycles(nodes: Dict[str, dict]) -> List[List[str]]:
     """Detect cycles in dependency graph defined by nodes mapping with 'dependencies' list.
-    Returns a list of cycles, each cycle is a list of node ids in order of encounter.
+    Returns one cycle per strongly connected component that has one, as a list of node ids
+    starting and ending on the same node (e.g. [A, B, A]).
+    Iterative Tarjan SCC, O(V + E) and safe from the recursion limit on large sprints.
     """
-    color: Dict[str, int] = {k: 0 for k in nodes}  # 0=unvisited,1=visiting,2=done
-    stack: List[str] = []
+    ids = list(nodes)
+    pos = {k: i for i, k in enumerate(ids)}
+    succ = [[pos[v] for v in nodes[k].get("dependencies", []) if v in pos] for k in ids]
+    n = len(ids)
+    index = [-1] * n
+    low = [0] * n
+    on_stack = bytearray(n)
+    scc_stack: List[int] = []
     cycles: List[List[str]] = []
+    counter = 0
 
-    def dfs(u: str):
-        if color[u] == 1:
-            # found back-edge; extract cycle from stack
-            if u in stack:
-                idx = stack.index(u)
-                cycles.append(stack[idx:] + [u])
-            return
-        if color[u] == 2:
-            return
-        color[u] = 1
-        stack.append(u)
-        for v in nodes[u].get("dependencies", []):
-            if v in nodes:
-                dfs(v)
-        stack.pop()
-        color[u] = 2
-
-    for k in nodes.keys():
-        if color[k] == 0:
-            dfs(k)
+    for root in range(n):
+        if index[root] >= 0:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        scc_stack.append(root)
+        on_stack[root] = 1
+        # Explicit DFS stack of (node, next successor position)
+        work = [(root, 0)]
+        while work:
+            u, i = work[-1]
+            if i < len(succ[u]):
+                work[-1] = (u, i + 1)
+                v = succ[u][i]
+                if index[v] < 0:
+                    index[v] = low[v] = counter
+                    counter += 1
+                    scc_stack.append(v)
+                    on_stack[v] = 1
+                    work.append((v, 0))
+                elif on_stack[v] and index[v] < low[u]:
+                    low[u] = index[v]
+                continue
+            work.pop()
+            if work:
+                p = work[-1][0]
+                if low[u] < low[p]:
+                    low[p] = low[u]
+            if low[u] == index[u]:
+                scc: List[int] = []
+                while True:
+                    w = scc_stack.pop()
+                    on_stack[w] = 0
+                    scc.append(w)
+                    if w == u:
+                        break
+                if len(scc) > 1 or u in succ[u]:
+                    cycles.append([ids[x] for x in _cycle_in_scc(succ, scc)])
     return cycles
 
 
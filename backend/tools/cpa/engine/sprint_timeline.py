@@ -1,13 +1,37 @@
 from datetime import datetime, date, timedelta
-from typing import Dict, List, Optional, Set
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
 import math
 
+import numpy as np
+
 try:
     from tools.jira.cpa_tools import _sp_field_key
 except ModuleNotFoundError:
     from backend.tools.jira.cpa_tools import _sp_field_key
 
-from .jira import _cached_current_sprint_issues, _extract_sprint_dates, _get_task_duration, _parse_iso_date
+from .jira import _cached_current_sprint_issues, _extract_sprint_dates, _get_task_duration, _issue_key_number, _parse_iso_date
+
+
+# numpy business-day calendars keyed by (working weekdays, holidays); built once per assignee
+_BUSDAY_CALENDARS: Dict[Tuple[FrozenSet[int], FrozenSet[date]], np.busdaycalendar] = {}
+_BUSDAY_CALENDARS_MAX_ENTRIES = 256
+# Below this many days the plain loop beats the numpy call overhead
+_BUSDAY_MIN_DAYS = 6
+
+
+def _busday_calendar(working_days: Set[int], holidays: Set[date]) -> Optional[np.busdaycalendar]:
+    """Return a cached np.busdaycalendar, or None when no weekday is a working day."""
+    key = (frozenset(working_days), frozenset(holidays))
+    cal = _BUSDAY_CALENDARS.get(key)
+    if cal is None:
+        weekmask = [i in key[0] for i in range(7)]
+        if not any(weekmask):
+            return None
+        cal = np.busdaycalendar(weekmask=weekmask, holidays=np.array(sorted(key[1]), dtype="datetime64[D]"))
+        if len(_BUSDAY_CALENDARS) >= _BUSDAY_CALENDARS_MAX_ENTRIES:
+            _BUSDAY_CALENDARS.pop(next(iter(_BUSDAY_CALENDARS)))
+        _BUSDAY_CALENDARS[key] = cal
+    return cal
 
 
 def _advance_working_days(start: date, days: int, working_days: Set[int], holidays: Set[date]) -> date:
@@ -17,6 +41,10 @@ def _advance_working_days(start: date, days: int, working_days: Set[int], holida
     """
     if days <= 0:
         return start
+    cal = _busday_calendar(working_days, holidays) if days >= _BUSDAY_MIN_DAYS and days == int(days) else None
+    if cal is not None:
+        # Roll onto the first working day, then step over the remaining days-1 in C
+        return np.busday_offset(np.datetime64(start, "D"), int(days) - 1, roll="forward", busdaycal=cal).astype(date)
     d = start
     consumed = 0
     while consumed < days:
@@ -102,14 +130,6 @@ def current_sprint_cpa_timeline(
         by_user.setdefault(it["assignee"], []).append(it)
 
     # Ensure deterministic sequencing per assignee: sort by numeric suffix of issue key (e.g., TEST-123)
-    def _issue_key_number(k: Optional[str]) -> int:
-        try:
-            if not k or '-' not in k:
-                return 0
-            return int(k.rsplit('-', 1)[1])
-        except Exception:
-            return 0
-
     # Schedule
     schedules: Dict[str, List[dict]] = {}
     per_issue_completion: Dict[str, str] = {}
@@ -216,14 +236,6 @@ def sprint_completion_if_issue_removed(
     for it in items:
         by_user.setdefault(it["assignee"], []).append(it)
 
-    def _issue_key_number(k: Optional[str]) -> int:
-        try:
-            if not k or '-' not in k:
-                return 0
-            return int(k.rsplit('-', 1)[1])
-        except Exception:
-            return 0
-
     schedules: Dict[str, List[dict]] = {}
     for user, tasks in by_user.items():
         tasks = sorted(tasks, key=lambda t: (_issue_key_number(t.get("key")), t.get("key") or ""))
@@ -344,14 +356,6 @@ def estimate_issue_completion_in_current_sprint(
         })
 
     # Deterministic order by numeric key to mimic team conventions
-    def _issue_key_number(k: Optional[str]) -> int:
-        try:
-            if not k or '-' not in k:
-                return 0
-            return int(k.rsplit('-', 1)[1])
-        except Exception:
-            return 0
-
     tasks_for_assignee = sorted(tasks_for_assignee, key=lambda t: (_issue_key_number(t.get("key")), t.get("key") or ""))
 
     # Apply user-specific holidays
@@ -1,6 +1,8 @@
 import os
 from dotenv import load_dotenv
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from datetime import datetime, timedelta, timezone
 from typing import Optional, List
 
@@ -8,6 +10,19 @@ from typing import Optional, List
 GitHub repository tools: functions that can be wrapped by an orchestrating agent.
 """
 
+_GITHUB_TIMEOUT_SECONDS = 10
+
+
+def _build_session() -> requests.Session:
+    """Pooled session so repeated tool calls reuse the TLS connection to api.github.com."""
+    session = requests.Session()
+    retries = Retry(total=3, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504])
+    session.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=retries))
+    return session
+
+
+_SESSION = _build_session()
+
 def list_repositories(organization: str) -> str:
     """
     Lists repositories for a given GitHub organization, returns the latest changed repo.
@@ -26,7 +41,7 @@ def list_repositories(organization: str) -> str:
 
     try:
         repos_url = f"https://api.github.com/orgs/{organization}/repos"
-        response = requests.get(repos_url, headers=headers)
+        response = _SESSION.get(repos_url, headers=headers, timeout=_GITHUB_TIMEOUT_SECONDS)
         response.raise_for_status()
         repositories = response.json()
 
@@ -82,7 +97,7 @@ def list_todays_commits(repo_full_name: str, branch: Optional[str] = None) -> st
 
     try:
         commits_url = f"https://api.github.com/repos/{repo_full_name}/commits"
-        response = requests.get(commits_url, headers=headers, params=params)
+        response = _SESSION.get(commits_url, headers=headers, params=params, timeout=_GITHUB_TIMEOUT_SECONDS)
         response.raise_for_status()
         commits = response.json()
 
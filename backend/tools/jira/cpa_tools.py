@@ -1,7 +1,9 @@
 import json
 from logging import log
 import os
+import re
 from datetime import datetime, timedelta
+from functools import lru_cache
 from dotenv import load_dotenv
 import requests
 from requests.auth import HTTPBasicAuth
@@ -19,6 +21,10 @@ def load_tech_stack_info():
         return None
 
 
+# Full Jira issue key such as PROJ-123 (case-insensitive project part)
+_ISSUE_KEY_RE = re.compile(r"[A-Za-z][A-Za-z0-9]*-\d+")
+
+
 def _jira_env():
     jira_server = os.getenv("JIRA_SERVER")
     jira_username = os.getenv("JIRA_USERNAME")
@@ -30,8 +36,10 @@ def _jira_env():
     return jira_server, jira_username, jira_api_token
 
 
+@lru_cache(maxsize=None)
 def _sp_field_key() -> str | None:
-    """Return the Jira custom field key for Story Points, e.g., 'customfield_10016'. Config via JIRA_STORY_POINTS_FIELD."""
+    """Return the Jira custom field key for Story Points, e.g., 'customfield_10016'. Config via JIRA_STORY_POINTS_FIELD.
+    Read once per process; call _sp_field_key.cache_clear() after changing the variable."""
     key = os.getenv("JIRA_STORY_POINTS_FIELD")
     # Fallback to a common default if not configured. This is the default SP field in many Jira Cloud instances.
     # If your instance uses a different key, set JIRA_STORY_POINTS_FIELD in backend/.env.
@@ -319,8 +327,8 @@ def who_is_assigned(issue_key: str) -> dict:
     Error:
     {"error": str}
     """
-    # Basic validation
-    if not issue_key or not isinstance(issue_key, str) or "-" not in issue_key:
+    # Basic validation: malformed keys never reach Jira
+    if not issue_key or not isinstance(issue_key, str) or not _ISSUE_KEY_RE.fullmatch(issue_key):
         return {"error": "Invalid issue key"}
     try:
         details = _fetch_issue_details(issue_key)
@@ -1,5 +1,8 @@
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+import orjson
 import requests
 from requests.auth import HTTPBasicAuth
 from google.adk.agents import Agent
@@ -27,22 +30,51 @@ def _recall_project_key() -> str | None:
 def _recall_active_sprint() -> dict | None:
     return _MEMORY.get("sprint")
 
-def _fetch_active_sprint(project_key: str) -> dict | None:
-    """Fetch the first active sprint for the project and remember it."""
+# The pooled session and the credentials it was built with; close_jira_session closes exactly this one
+_SESSION: tuple[tuple[str, str], requests.Session] | None = None
+_SESSION_LOCK = threading.Lock()
+
+def _jira_session(jira_username: str, jira_api_token: str) -> requests.Session:
+    """Pooled session reused across tool calls for the same credentials."""
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is None or _SESSION[0] != (jira_username, jira_api_token):
+            session = requests.Session()
+            session.auth = HTTPBasicAuth(jira_username, jira_api_token)
+            session.headers.update({"Accept": "application/json"})
+            # A replaced session may still be serving another thread's request; it is left to the GC
+            _SESSION = ((jira_username, jira_api_token), session)
+        return _SESSION[1]
+
+def _jira_client() -> tuple[str, requests.Session]:
     jira_server = os.getenv("JIRA_SERVER")
     jira_username = os.getenv("JIRA_USERNAME")
     jira_api_token = os.getenv("JIRA_API")
     if not all([jira_server, jira_username, jira_api_token]):
         raise ValueError("Error: Jira environment variables (JIRA_SERVER, JIRA_USERNAME, JIRA_API) are not set.")
-    auth = HTTPBasicAuth(jira_username, jira_api_token)
-    headers = {"Accept": "application/json"}
+    return jira_server, _jira_session(jira_username, jira_api_token)
+
+def close_jira_session() -> None:
+    """Release pooled Jira connections (e.g. on application shutdown)."""
+    global _SESSION
+    with _SESSION_LOCK:
+        current, _SESSION = _SESSION, None
+    if current is not None:
+        current[1].close()
+
+# Concurrent page requests per sprint; stays well under Jira's rate limits
+_PAGE_FETCH_WORKERS = 4
+
+def _fetch_active_sprint(project_key: str) -> dict | None:
+    """Fetch the first active sprint for the project and remember it."""
+    jira_server, session = _jira_client()
     boards_url = f"{jira_server}/rest/agile/1.0/board?projectKeyOrId={project_key}"
-    boards = requests.get(boards_url, headers=headers, auth=auth).json()
+    boards = orjson.loads(session.get(boards_url).content)
     if not boards.get("values"):
         return None
     board_id = boards["values"][0]["id"]
     sprints_url = f"{jira_server}/rest/agile/1.0/board/{board_id}/sprint?state=active"
-    sprints = requests.get(sprints_url, headers=headers, auth=auth).json()
+    sprints = orjson.loads(session.get(sprints_url).content)
     if sprints.get("values"):
         active = sprints["values"][0]
         sprint_info = {
@@ -57,28 +89,25 @@ def _fetch_active_sprint(project_key: str) -> dict | None:
 
 def _fetch_issues_in_active_sprint(project_key: str, max_results: int = 50):
     """Fetch simplified issues for the active sprint."""
-    jira_server = os.getenv("JIRA_SERVER")
-    jira_username = os.getenv("JIRA_USERNAME")
-    jira_api_token = os.getenv("JIRA_API")
-    if not all([jira_server, jira_username, jira_api_token]):
-        raise ValueError("Error: Jira environment variables (JIRA_SERVER, JIRA_USERNAME, JIRA_API) are not set.")
-    auth = HTTPBasicAuth(jira_username, jira_api_token)
-    headers = {"Accept": "application/json"}
+    jira_server, session = _jira_client()
     sprint = _fetch_active_sprint(project_key)
     if not sprint:
         return f"No active sprint found for project {project_key}", None
     sprint_id = sprint["id"]
     issues_url = f"{jira_server}/rest/agile/1.0/sprint/{sprint_id}/issue"
-    all_issues = []
-    start_at = 0
-    while True:
+
+    def fetch_page(start_at: int) -> dict:
         params = {"startAt": start_at, "maxResults": max_results}
-        response = requests.get(issues_url, headers=headers, auth=auth, params=params).json()
-        issues = response.get("issues", [])
-        all_issues.extend(issues)
-        if start_at + max_results >= response.get("total", 0):
-            break
-        start_at += max_results
+        return orjson.loads(session.get(issues_url, params=params).content)
+
+    # The first page reports the total; the remaining pages are independent, so fetch them together
+    first = fetch_page(0)
+    all_issues = list(first.get("issues", []))
+    offsets = range(max_results, first.get("total", 0), max_results)
+    if offsets:
+        with ThreadPoolExecutor(max_workers=min(len(offsets), _PAGE_FETCH_WORKERS)) as pool:
+            for page in pool.map(fetch_page, offsets):
+                all_issues.extend(page.get("issues", []))
     simplified = []
     for issue in all_issues:
         fields = issue.get("fields", {})